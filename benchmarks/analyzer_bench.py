@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+BehavioralAnalyzer Batch Benchmark
+Per-log analyze_execution() vs. vectorized analyze_batch() over the same
+runs, plus a parity check of their detections. Risk scores are checked the
+same way: RiskScorer.score() per analysis vs. score_bitmasks() over the
+batch's behavior bitmasks.
+
+Both paths read the shared feature stage (analytics.compute_features via a
+FeatureStore), which reduces each run's timeline once; it is timed
+separately and filled before the two analysis paths run, as
+AnalyticsService.load_all_logs() does.
+
+The corpus is the real telemetry in logs/ (or --logs), replicated with
+distinct PIDs up to --runs, so the sample-count and behavior mix match
+what the dashboard analyzes.
+
+Usage:
+    python3 benchmarks/analyzer_bench.py [--runs 100000] [--logs logs] [--output result.json]
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "dashboard"))
+
+from analytics import FeatureStore  # noqa: E402
+from analytics_engine import BehavioralAnalyzer, BEHAVIOR_BITS, BEHAVIOR_CODES, RISK_LEVELS  # noqa: E402
+from risk_scoring import RiskScorer, RISK_CLASSES  # noqa: E402
+
+
+def load_corpus(log_dir, runs):
+    """Real logs, replicated (shallow copies, new PIDs) up to `runs`"""
+    logs = []
+    for path in sorted(glob.glob(os.path.join(log_dir, "*.json"))):
+        try:
+            with open(path) as fh:
+                logs.append(json.load(fh))
+        except (OSError, ValueError):
+            continue
+    if not logs:
+        return []
+    return [dict(logs[i % len(logs)], pid=i + 1) for i in range(runs)]
+
+
+def check_parity(analyses, batch):
+    """Indices where the two paths disagree on behaviors, risk level or key metrics"""
+    mismatches = []
+    for i, analysis in enumerate(analyses):
+        row = batch[i]
+        if (row['behaviors'] != analysis.behaviors
+                or RISK_LEVELS[row['risk_level']] != analysis.risk_level
+                or (analysis.memory.memory_growth_kb if analysis.memory else 0) != row['memory_growth_kb']
+                or (analysis.cpu and analysis.cpu.sustained_ms != row['high_cpu_ms'])):
+            mismatches.append(i)
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="analyze_execution() vs analyze_batch()")
+    parser.add_argument("--runs", type=int, default=100000, help="Runs to analyze")
+    parser.add_argument("--logs", default=os.path.join(PROJECT_ROOT, "logs"), help="Source log directory")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.logs, args.runs)
+    if not corpus:
+        print(f"[✗] No logs in {args.logs}")
+        return 1
+
+    print("=" * 80)
+    print(f"BEHAVIORAL ANALYZER BENCHMARK ({len(corpus)} runs)")
+    print("=" * 80)
+
+    store = FeatureStore()
+    start = time.perf_counter()
+    store.features(corpus)
+    feature_s = time.perf_counter() - start
+    
+    per_log = BehavioralAnalyzer(store)
+    start = time.perf_counter()
+    analyses = [per_log.analyze_execution(log, explain=False) for log in corpus]
+    per_log_s = time.perf_counter() - start
+
+    batch_analyzer = BehavioralAnalyzer(store)
+    start = time.perf_counter()
+    batch = batch_analyzer.analyze_batch(corpus)
+    batch_s = time.perf_counter() - start
+
+    mismatches = check_parity(analyses, batch)
+
+    # Fresh scorer: score() caches by PID
+    start = time.perf_counter()
+    scorer = RiskScorer()
+    per_log_scores = [scorer.score(a.pid, a.detected_behaviors, a.profile) for a in analyses]
+    per_log_score_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scores = RiskScorer().score_bitmasks(batch['behaviors'], batch['profile'] == 'STRICT')
+    batch_score_s = time.perf_counter() - start
+
+    score_mismatches = [i for i, r in enumerate(per_log_scores)
+                        if r.score != scores['score'][i]
+                        or r.risk_level != RISK_CLASSES[scores['risk_level'][i]]]
+
+    results = {
+        "runs": len(corpus),
+        "source_logs": len(glob.glob(os.path.join(args.logs, "*.json"))),
+        "feature_stage_s": round(feature_s, 4),
+        "per_log_s": round(per_log_s, 4),
+        "batch_s": round(batch_s, 4),
+        "per_log_runs_per_s": round(len(corpus) / per_log_s),
+        "batch_runs_per_s": round(len(corpus) / batch_s),
+        "speedup": round(per_log_s / batch_s, 1),
+        "behavior_counts": {b: int(np.count_nonzero(batch['behaviors'] & BEHAVIOR_BITS[b])) for b in BEHAVIOR_CODES},
+        "parity_mismatches": len(mismatches),
+        "per_log_score_s": round(per_log_score_s, 4),
+        "batch_score_s": round(batch_score_s, 4),
+        "score_speedup": round(per_log_score_s / batch_score_s, 1),
+        "score_parity_mismatches": len(score_mismatches),
+    }
+
+    print(f"  feature stage:     {feature_s:8.3f} s  ({round(len(corpus) / feature_s):>10,} runs/s, once per run)")
+    print(f"  analyze_execution: {per_log_s:8.3f} s  ({results['per_log_runs_per_s']:>10,} runs/s)")
+    print(f"  analyze_batch:     {batch_s:8.3f} s  ({results['batch_runs_per_s']:>10,} runs/s)")
+    print(f"  speedup:           {results['speedup']}x")
+    print(f"  parity:            {'✓ identical detections' if not mismatches else f'✗ {len(mismatches)} runs differ'}")
+    print(f"  RiskScorer.score:  {per_log_score_s:8.3f} s")
+    print(f"  score_bitmasks:    {batch_score_s:8.3f} s  ({results['score_speedup']}x)")
+    print(f"  score parity:      {'✓ identical scores' if not score_mismatches else f'✗ {len(score_mismatches)} runs differ'}")
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"Results written to {args.output}")
+    return 1 if mismatches or score_mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
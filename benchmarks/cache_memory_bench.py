@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Analysis Cache Memory Benchmark
+Bytes per cached run held by the dashboard's analysis and risk-score
+caches, for the compact representation (ExecutionAnalysis / RiskScore
+objects with __slots__, metric tuples, interned strings) and for the dict
+representation the caches held before (what to_dict() returns).
+
+Memory is measured with tracemalloc as the allocations still alive after
+the caches are filled, so temporaries of the analysis itself are not
+counted. The corpus is built before tracing starts. Both figures include
+the analyzer's FeatureStore (the per-run feature rows the analyses are
+computed from), filled in one batch as AnalyticsService does.
+
+Usage:
+    python3 benchmarks/cache_memory_bench.py [--runs 100000] [--logs logs] [--output result.json]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+from analyzer_bench import PROJECT_ROOT, load_corpus
+
+from analytics_engine import BehavioralAnalyzer  # noqa: E402
+
+
+def fill_compact(corpus):
+    analyzer = BehavioralAnalyzer()
+    analyzer.features.features(corpus)
+    for log in corpus:
+        analyzer.analyze_execution(log, explain=False)
+    return analyzer
+
+
+def fill_dicts(corpus):
+    """The same caches in their dict form"""
+    analyzer = fill_compact(corpus)
+    analysis_cache = {key: a.to_dict() for key, a in analyzer.analysis_cache.items()}
+    score_cache = {key: r.to_dict() for key, r in analyzer.risk_scorer.score_cache.items()}
+    return analyzer.features, analysis_cache, score_cache
+
+
+def retained_bytes(fill, corpus):
+    """Bytes still allocated after fill(corpus), with its result kept alive"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    caches = fill(corpus)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del caches
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes per cached run: dict vs compact analyses")
+    parser.add_argument("--runs", type=int, default=100000, help="Runs to cache")
+    parser.add_argument("--logs", default=os.path.join(PROJECT_ROOT, "logs"), help="Source log directory")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.logs, args.runs)
+    if not corpus:
+        print(f"[✗] No logs in {args.logs}")
+        return 1
+
+    print("=" * 80)
+    print(f"ANALYSIS CACHE MEMORY BENCHMARK ({len(corpus)} runs)")
+    print("=" * 80)
+
+    dict_bytes = retained_bytes(fill_dicts, corpus)
+    compact_bytes = retained_bytes(fill_compact, corpus)
+
+    results = {
+        "runs": len(corpus),
+        "dict_bytes_per_run": round(dict_bytes / len(corpus)),
+        "compact_bytes_per_run": round(compact_bytes / len(corpus)),
+        "dict_total_mb": round(dict_bytes / 2**20, 1),
+        "compact_total_mb": round(compact_bytes / 2**20, 1),
+        "reduction": round(dict_bytes / compact_bytes, 1),
+    }
+
+    print(f"  dict caches:    {results['dict_bytes_per_run']:>6} B/run  ({results['dict_total_mb']} MB)")
+    print(f"  compact caches: {results['compact_bytes_per_run']:>6} B/run  ({results['compact_total_mb']} MB)")
+    print(f"  reduction:      {results['reduction']}x")
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
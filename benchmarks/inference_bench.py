@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Risk Model Inference Benchmark
+sklearn predict_proba (scaler.transform + RandomForestClassifier) vs. the
+flattened-tree CompiledForest evaluator on the same fitted RiskClassifier,
+at 1, 50 (the /api/stats batch) and 10k rows, plus a parity check.
+
+Parity is validated on fixed data by validate_compiled_forest.py; the same
+check runs here on the benchmark's held-out rows for each --max-depth
+configuration.
+
+RiskClassifier predicts with CompiledForest only below its
+compiled_max_rows config: past ~2000 rows sklearn's Cython traversal is
+faster, which the 10k-row timing shows.
+
+Data is model_sweep.py's: jittered replicas of the real telemetry in
+logs/ (or --logs), held-out runs from source logs unseen in training.
+
+Usage:
+    python3 benchmarks/inference_bench.py [--runs 20000] [--rows 1 50 10000] [--max-depth 0 8]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from analyzer_bench import PROJECT_ROOT
+from model_sweep import build_dataset, median_latency_us
+
+sys.path.insert(0, PROJECT_ROOT)
+from ml_model import RiskClassifier, CompiledForest, FEATURE_COLS  # noqa: E402
+from validate_compiled_forest import check_parity, sklearn_proba  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="sklearn vs CompiledForest inference")
+    parser.add_argument("--runs", type=int, default=20000, help="Runs in the dataset (train + held-out)")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 50, 10000], help="Batch sizes to time")
+    parser.add_argument("--max-depth", type=int, nargs="+", default=[0, 8], help="0 = unlimited")
+    parser.add_argument("--repeats", type=int, default=200, help="Timed calls per batch size (median)")
+    parser.add_argument("--logs", default=os.path.join(PROJECT_ROOT, "logs"), help="Source log directory")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    train, test = build_dataset(args.logs, args.runs)
+    if train is None or len(train) < 5 or test.empty:
+        print(f"[✗] Not enough logs in {args.logs} for a held-out split")
+        return 1
+    X_test = test[FEATURE_COLS].fillna(0).values
+
+    print("=" * 80)
+    print(f"RISK MODEL INFERENCE BENCHMARK ({len(train)} train / {len(test)} held-out runs)")
+    print("=" * 80)
+
+    results = []
+    mismatched = 0
+    for max_depth in args.max_depth:
+        classifier = RiskClassifier(config={'max_depth': max_depth or None})
+        classifier.train(train)
+        compiled = CompiledForest(classifier.model, classifier.scaler)
+        mismatches = check_parity(classifier, X_test)
+        mismatched += len(mismatches)
+
+        result = {
+            "max_depth": max_depth or None,
+            "n_estimators": len(classifier.model.estimators_),
+            "nodes": len(compiled.threshold),
+            "tree_depth": compiled.depth,
+            "parity_mismatches": len(mismatches),
+            "latency_us": {},
+        }
+        print(f"[max_depth={max_depth or '-'}] {result['n_estimators']} trees, {result['nodes']} nodes, "
+              f"depth {compiled.depth}: "
+              f"{'✓ identical predictions' if not len(mismatches) else f'✗ {len(mismatches)} rows differ'}")
+        for rows in args.rows:
+            X = X_test[np.arange(rows) % len(X_test)]
+            repeats = max(5, args.repeats * 50 // max(rows, 50))
+            sk_us = median_latency_us(lambda: sklearn_proba(classifier, X), repeats)
+            compiled_us = median_latency_us(lambda: compiled.predict_proba(X), repeats)
+            result["latency_us"][rows] = {"sklearn": round(sk_us, 1), "compiled": round(compiled_us, 1),
+                                          "speedup": round(sk_us / compiled_us, 1)}
+            print(f"  {rows:>6} rows: sklearn {sk_us:>10.1f} us   compiled {compiled_us:>10.1f} us   "
+                  f"({sk_us / compiled_us:.1f}x)")
+        results.append(result)
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump({"train_runs": len(train), "held_out_runs": len(test), "configs": results}, fh, indent=2)
+        print(f"Results written to {args.output}")
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Auto-Labeling Benchmark
+Throughput of RiskClassifier.auto_label() (vectorized LABEL_RULES) vs. the
+previous per-row DataFrame.apply labeling, plus a parity check.
+
+Rows are the feature rows of the real telemetry in logs/ (or --logs),
+tiled up to --rows, with a share of rows given synthetic program names and
+exit reasons (including missing values) so every rule and the default are
+exercised.
+
+Usage:
+    python3 benchmarks/label_bench.py [--rows 1000000] [--logs logs] [--output result.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from analyzer_bench import PROJECT_ROOT, load_corpus
+
+from analytics import extract_features  # noqa: E402
+from ml_model import RiskClassifier  # noqa: E402
+
+VARIANT_PROGRAMS = ["/tmp/fork_bomb", "/usr/bin/cpu_stress_v2", "./memory_leak", "/bin/ls", None]
+VARIANT_EXITS = ["SECURITY_VIOLATION", "KILLED(9)", "ADAPATION", "EXITED(0)", "EXITED(1)", "SIGNALED(11)", None]
+
+
+def apply_label(feature_df):
+    """Per-row labeling as it was before auto_label() was vectorized (reference)"""
+    def get_label(row):
+        prog = str(row.get('program', ''))
+        if 'memory_leak' in prog:
+            return "Malicious"
+        if 'cpu_stress' in prog or 'fork_bomb' in prog:
+            return "Malicious"
+        if "VIOLATION" in str(row.get('exit_reason', '')):
+            return "Malicious"
+        if "KILL" in str(row.get('exit_reason', '')) or "ADAPATION" in str(row.get('exit_reason', '')):
+            return "Malicious"
+        if "EXITED(0)" in str(row.get('exit_reason', '')):
+            return "Benign"
+        return "Buggy"
+
+    return feature_df.apply(get_label, axis=1).values
+
+
+def build_rows(log_dir, rows):
+    base = extract_features(load_corpus(log_dir, len(os.listdir(log_dir))))
+    df = base.iloc[np.arange(rows) % len(base)].reset_index(drop=True)
+    rng = np.random.default_rng(0)
+    variant = rng.random(rows) < 0.5
+    df.loc[variant, 'program'] = rng.choice(np.array(VARIANT_PROGRAMS, dtype=object), variant.sum())
+    df.loc[variant, 'exit_reason'] = rng.choice(np.array(VARIANT_EXITS, dtype=object), variant.sum())
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized vs per-row auto-labeling")
+    parser.add_argument("--rows", type=int, default=1000000, help="Feature rows to label")
+    parser.add_argument("--logs", default=os.path.join(PROJECT_ROOT, "logs"), help="Source log directory")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.logs) or not os.listdir(args.logs):
+        print(f"[✗] No logs in {args.logs}")
+        return 1
+    df = build_rows(args.logs, args.rows)
+
+    print("=" * 80)
+    print(f"AUTO-LABELING BENCHMARK ({len(df)} rows)")
+    print("=" * 80)
+
+    start = time.perf_counter()
+    reference = apply_label(df)
+    apply_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    labels = RiskClassifier().auto_label(df)
+    vectorized_s = time.perf_counter() - start
+
+    mismatches = int((reference != labels).sum())
+    values, counts = np.unique(labels.astype(str), return_counts=True)
+    results = {
+        "rows": len(df),
+        "apply_s": round(apply_s, 3),
+        "vectorized_s": round(vectorized_s, 4),
+        "apply_rows_per_s": round(len(df) / apply_s),
+        "vectorized_rows_per_s": round(len(df) / vectorized_s),
+        "speedup": round(apply_s / vectorized_s, 1),
+        "labels": dict(zip(values.tolist(), counts.tolist())),
+        "parity_mismatches": mismatches,
+    }
+
+    print(f"  DataFrame.apply: {apply_s:8.3f} s  ({results['apply_rows_per_s']:>12,} rows/s)")
+    print(f"  auto_label:      {vectorized_s:8.3f} s  ({results['vectorized_rows_per_s']:>12,} rows/s)")
+    print(f"  speedup:         {results['speedup']}x")
+    print(f"  labels:          {results['labels']}")
+    print(f"  parity:          {'✓ identical labels' if not mismatches else f'✗ {mismatches} rows differ'}")
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"Results written to {args.output}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
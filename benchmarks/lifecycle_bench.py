@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Sandbox Lifecycle Benchmark
+Per-phase latency of one sandboxed execution, repeated over the
+test_programs/*.c binaries, written as JSON with percentiles for
+regression tracking.
+
+Phases (all in microseconds):
+    setup_cgroups   SandboxController.setup_cgroups()
+    compile         SandboxController.compile() (gcc)
+    clone_seccomp   clone() -> child ready to exec: namespaces, read-only
+                    root, rlimits, seccomp (launcher "startup.child_setup_us")
+    first_exec      execv() of the test binary (launcher "startup.exec_us")
+    monitoring      launcher time spent handling sampling ticks
+                    (launcher "sampling.monitor_us")
+    log_write       writing the JSON log (launcher "[Telemetry] ... Nus" line)
+    cleanup         SandboxController.cleanup()
+    launcher_wall   whole launcher invocation, for reference
+
+Hermetic: the launcher runs in a fresh temporary directory (its logs/ go
+there, nothing in the repo's logs/ is read or written), with live
+streaming disabled, and every iteration gets a fresh controller, cgroup
+and compiled binary. The first `--warmup` iterations of each program are
+discarded.
+
+Profile: LEARNING by default. The controller builds dynamically linked
+binaries, which STRICT's allowlist kills in the loader (and even -static
+glibc start-up needs set_tid_address, rseq, ... which STRICT lacks), so a
+STRICT run times a SIGSYS, not the program. Each program's exit reasons are
+recorded next to the timings so such runs are visible.
+
+Usage:
+    python3 benchmarks/lifecycle_bench.py [--iterations 5] [--programs sleep_test quick_exit]
+    python3 benchmarks/lifecycle_bench.py --baseline benchmarks/results/<earlier>.json
+"""
+
+import argparse
+import contextlib
+import glob
+import hashlib
+import io
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "runner"))
+
+from sandbox import SandboxController  # noqa: E402
+
+LAUNCHER = os.path.join(PROJECT_ROOT, "runner", "launcher")
+PROGRAM_DIR = os.path.join(PROJECT_ROOT, "test_programs")
+RESULTS_DIR = os.path.join(PROJECT_ROOT, "benchmarks", "results")
+
+SUITE = "sandbox_lifecycle"
+SCHEMA_VERSION = 1
+PHASES = ["setup_cgroups", "compile", "clone_seccomp", "first_exec",
+          "monitoring", "log_write", "cleanup", "launcher_wall"]
+PERCENTILES = [50, 90, 99]
+RUN_TIMEOUT_S = 30
+REGRESSION_THRESHOLD = 0.10  # p50 slowdown vs. baseline that counts as a regression
+
+LOG_WRITE_RE = re.compile(r"\[Telemetry\] Log written to (\S+) \(\d+ samples, (\d+)us\)")
+
+
+def timed_us(fn, *args):
+    """Run fn quietly; returns elapsed microseconds"""
+    start = time.perf_counter_ns()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn(*args)
+    return (time.perf_counter_ns() - start) // 1000
+
+
+def run_iteration(source, profile, launcher, workdir):
+    """One full lifecycle; returns {phase: us, "exit_reason": ...} (missing phases are omitted)"""
+    controller = SandboxController(profile=profile)
+    phases = {}
+    try:
+        phases["setup_cgroups"] = timed_us(controller.setup_cgroups)
+        try:
+            phases["compile"] = timed_us(controller.compile, source)
+        except SystemExit:
+            print(f"  [✗] {os.path.basename(source)} does not compile")
+            return phases
+
+        cmd = [launcher, f"--profile={profile}", "--stream="]
+        if os.path.exists(os.path.join(controller.cgroup_path, "cgroup.procs")):
+            cmd.append(f"--cgroup={controller.cgroup_path}")
+        cmd.append(controller.exec_path)
+
+        start = time.perf_counter_ns()
+        proc = subprocess.run(cmd, cwd=workdir, capture_output=True, timeout=RUN_TIMEOUT_S)
+        phases["launcher_wall"] = (time.perf_counter_ns() - start) // 1000
+
+        match = LOG_WRITE_RE.search(proc.stdout.decode(errors="replace"))
+        if not match:
+            print(f"  [✗] {os.path.basename(source)}: launcher wrote no log (exit {proc.returncode})")
+            return phases
+        phases["log_write"] = int(match.group(2))
+        with open(os.path.join(workdir, match.group(1))) as fh:
+            log = json.load(fh)
+
+        startup = log.get("startup", {})
+        if startup.get("child_setup_us", -1) >= 0:
+            phases["clone_seccomp"] = startup["child_setup_us"]
+            phases["first_exec"] = startup["exec_us"]
+        phases["monitoring"] = log.get("sampling", {}).get("monitor_us", 0)
+        phases["exit_reason"] = log.get("summary", {}).get("exit_reason")
+    finally:
+        phases["cleanup"] = timed_us(controller.cleanup)
+
+    return phases
+
+
+def summarize(values):
+    """Distribution of one phase"""
+    arr = np.asarray(values, dtype=float)
+    stats = {"n": int(arr.size), "mean": round(float(arr.mean()), 1),
+             "min": int(arr.min()), "max": int(arr.max())}
+    for q in PERCENTILES:
+        stats[f"p{q}"] = round(float(np.percentile(arr, q)), 1)
+    return stats
+
+
+def summarize_phases(iterations):
+    return {phase: summarize([it[phase] for it in iterations if phase in it])
+            for phase in PHASES if any(phase in it for it in iterations)}
+
+
+def environment(launcher):
+    with open(launcher, "rb") as fh:
+        launcher_sha = hashlib.sha256(fh.read()).hexdigest()[:16]
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "kernel": platform.release(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "git_commit": commit,
+        "launcher_sha256": launcher_sha,
+        "root": os.getuid() == 0,
+    }
+
+
+def compare(results, baseline_path):
+    """Print p50 changes vs. an earlier result file; returns number of regressions"""
+    with open(baseline_path) as fh:
+        baseline = json.load(fh)
+    if baseline.get("suite") != SUITE:
+        print(f"[!] {baseline_path} is not a {SUITE} result")
+        return 0
+
+    print(f"\nComparison with {baseline_path} (p50, >{REGRESSION_THRESHOLD:.0%} slower = regression)")
+    regressions = 0
+    for name, phases in results["programs"].items():
+        old_phases = baseline.get("programs", {}).get(name)
+        if not old_phases:
+            continue
+        print(f"[{name}]")
+        for phase, stats in phases.items():
+            old = old_phases.get(phase)
+            if not old or not old.get("p50"):
+                continue
+            change = (stats["p50"] - old["p50"]) / old["p50"]
+            flag = "REGRESSION" if change > REGRESSION_THRESHOLD else ""
+            regressions += 1 if flag else 0
+            print(f"  {phase:<14} {old['p50']:>12.1f} -> {stats['p50']:>12.1f} us  {change:>+7.1%}  {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-phase latency benchmark of the sandbox lifecycle")
+    parser.add_argument("--iterations", type=int, default=5, help="Measured iterations per program")
+    parser.add_argument("--warmup", type=int, default=1, help="Discarded iterations per program")
+    parser.add_argument("--programs", nargs="*", help="test_programs/<name>.c to run (default: all)")
+    parser.add_argument("--profile", default="LEARNING", choices=["STRICT", "RESOURCE-AWARE", "LEARNING"],
+                        help="STRICT kills the dynamically linked test programs at start-up")
+    parser.add_argument("--launcher", default=LAUNCHER, help="Launcher binary")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/lifecycle_<time>.json)")
+    parser.add_argument("--baseline", help="Earlier result file to compare against")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.launcher):
+        print(f"[✗] Launcher not found: {args.launcher} (run make)")
+        return 1
+
+    sources = sorted(glob.glob(os.path.join(PROGRAM_DIR, "*.c")))
+    if args.programs:
+        sources = [s for s in sources if os.path.basename(s)[:-2] in args.programs]
+    if not sources:
+        print("[✗] No test programs selected")
+        return 1
+
+    print("=" * 80)
+    print(f"SANDBOX LIFECYCLE BENCHMARK ({args.profile}, {args.iterations} iterations + {args.warmup} warm-up)")
+    print("=" * 80)
+
+    per_program = {}
+    exit_reasons = {}
+    measured = []
+    with tempfile.TemporaryDirectory(prefix="sandbox_bench_") as workdir:
+        for source in sources:
+            name = os.path.basename(source)[:-2]
+            print(f"[{name}]")
+            iterations = []
+            for i in range(args.warmup + args.iterations):
+                phases = run_iteration(source, args.profile, os.path.abspath(args.launcher), workdir)
+                if i >= args.warmup:
+                    iterations.append(phases)
+            measured.extend(iterations)
+            per_program[name] = summarize_phases(iterations)
+            reasons = [it.get("exit_reason") or "NO_LOG" for it in iterations]
+            exit_reasons[name] = {reason: reasons.count(reason) for reason in sorted(set(reasons))}
+            if "SECURITY_VIOLATION" in exit_reasons[name] and name != "policy_violation":
+                print(f"  [!] killed by seccomp under {args.profile}: timings cover start-up only")
+            for phase, stats in per_program[name].items():
+                print(f"  {phase:<14} p50 {stats['p50']:>12.1f} us   p99 {stats['p99']:>12.1f} us")
+
+    results = {
+        "suite": SUITE,
+        "version": SCHEMA_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "unit": "us",
+        "config": {"iterations": args.iterations, "warmup": args.warmup, "profile": args.profile,
+                   "linkage": "dynamic", "programs": sorted(per_program)},
+        "environment": environment(args.launcher),
+        "programs": per_program,
+        "exit_reasons": exit_reasons,
+        "overall": summarize_phases(measured),
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"lifecycle_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as fh:
+        json.dump(results, fh, indent=2)
+
+    print("=" * 80)
+    print(f"Results written to {output}")
+
+    if args.baseline and compare(results, args.baseline):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Risk Model Training Benchmark
+Latency of RiskClassifier.train() as the log archive grows: a full refit
+on the whole archive vs. an incremental update that learns the runs added
+since the previous train() call.
+
+The archive is the real telemetry in logs/ (or --logs) replicated with
+distinct PIDs. At each size the incremental model is first caught up to
+size - batch runs (untimed), then the timed call adds exactly --batch new
+runs, which is what the dashboard does when new logs arrive. Accuracy
+against the auto-labels of the whole archive is reported for both models.
+
+Usage:
+    python3 benchmarks/ml_train_bench.py [--sizes 1000 10000 50000 100000] [--batch 10] [--output result.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from analyzer_bench import PROJECT_ROOT, load_corpus
+
+from analytics import extract_features  # noqa: E402
+from ml_model import RiskClassifier, FEATURE_COLS  # noqa: E402
+
+
+def timed_s(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def accuracy(classifier, features, labels):
+    X = classifier.scaler.transform(features[FEATURE_COLS].fillna(0).values)
+    return float((classifier.model.predict(X) == labels).mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full refit vs incremental RiskClassifier updates")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000, 100000],
+                        help="Archive sizes (runs)")
+    parser.add_argument("--batch", type=int, default=10, help="New runs per incremental update")
+    parser.add_argument("--logs", default=os.path.join(PROJECT_ROOT, "logs"), help="Source log directory")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    sizes = sorted(args.sizes)
+    corpus = load_corpus(args.logs, sizes[-1])
+    if not corpus:
+        print(f"[✗] No logs in {args.logs}")
+        return 1
+    features = extract_features(corpus)
+    labels = RiskClassifier().auto_label(features)
+
+    print("=" * 80)
+    print(f"RISK MODEL TRAINING BENCHMARK (batch of {args.batch} new runs per update)")
+    print("=" * 80)
+    print(f"  {'archive':>8}  {'full refit':>12}  {'incremental':>12}  {'trees':>5}  {'acc full':>8}  {'acc incr':>8}")
+
+    incremental = RiskClassifier(incremental=True)
+    rows = []
+    for size in sizes:
+        archive = features.iloc[:size]
+        full = RiskClassifier()
+        full_s = timed_s(full.train, archive)
+
+        incremental.train(features.iloc[:max(5, size - args.batch)])
+        incremental_s = timed_s(incremental.train, archive)
+
+        row = {
+            "archive_runs": size,
+            "full_refit_s": round(full_s, 4),
+            "incremental_s": round(incremental_s, 4),
+            "estimators": len(incremental.model.estimators_),
+            "accuracy_full": round(accuracy(full, archive, labels[:size]), 4),
+            "accuracy_incremental": round(accuracy(incremental, archive, labels[:size]), 4),
+        }
+        rows.append(row)
+        print(f"  {size:>8}  {full_s:>10.3f} s  {incremental_s:>10.3f} s  {row['estimators']:>5}  "
+              f"{row['accuracy_full']:>8.3f}  {row['accuracy_incremental']:>8.3f}")
+
+    results = {"batch": args.batch, "reservoir_size": incremental.reservoir_size,
+               "trees_per_update": incremental.trees_per_update, "sizes": rows}
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Risk Model Size / Accuracy Sweep
+Fits RiskClassifier for every n_estimators x max_depth combination and
+reports fit time, predict latency (1 row and a --batch-rows batch) and
+accuracy on held-out runs, then picks a configuration.
+
+Data: the feature rows of the real telemetry in logs/ (or --logs),
+replicated to --runs with 5% multiplicative jitter on the model inputs so
+replicas are not identical. Held-out runs are all replicas of a random 25%
+of the source logs, so the test set never contains copies of a training
+run. Labels are RiskClassifier.auto_label().
+
+Selection: the most accurate configurations (within --tolerance of the
+best), then the lowest single-row predict latency. With --write-config the
+choice is written to dashboard/model_config.json, which RiskClassifier
+reads at startup; RiskClassifier.save() stores it with the fitted model.
+
+Usage:
+    python3 benchmarks/model_sweep.py [--runs 20000] [--n-estimators 5 10 25 50 100]
+                                      [--max-depth 0 4 8 16] [--n-jobs -1] [--write-config]
+"""
+
+import argparse
+import glob
+import itertools
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from analyzer_bench import PROJECT_ROOT, load_corpus
+
+from analytics import extract_features  # noqa: E402
+from ml_model import RiskClassifier, FEATURE_COLS, MODEL_CONFIG_PATH  # noqa: E402
+
+TEST_FRACTION = 0.25
+JITTER = 0.05
+LATENCY_REPEATS = 200
+SEED = 0
+
+
+def build_dataset(log_dir, runs):
+    """Jittered replicas of the source logs, split by source log"""
+    sources = load_corpus(log_dir, len(glob.glob(os.path.join(log_dir, "*.json"))))
+    if not sources:
+        return None, None
+    source = np.arange(runs) % len(sources)
+    features = extract_features([dict(sources[s], pid=i + 1) for i, s in enumerate(source)])
+
+    rng = np.random.default_rng(SEED)
+    jitter = rng.lognormal(0.0, JITTER, size=(len(features), len(FEATURE_COLS)))
+    features[FEATURE_COLS] = features[FEATURE_COLS].fillna(0).values * jitter
+
+    held_out = rng.permutation(len(sources))[:max(1, int(len(sources) * TEST_FRACTION))]
+    test = np.isin(source, held_out)
+    return features[~test].reset_index(drop=True), features[test].reset_index(drop=True)
+
+
+def median_latency_us(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        fn()
+        times.append(time.perf_counter_ns() - start)
+    return float(np.median(times)) / 1000
+
+
+def evaluate(train, test, n_estimators, max_depth, n_jobs, batch_rows):
+    config = {'n_estimators': n_estimators, 'max_depth': max_depth or None, 'n_jobs': n_jobs}
+    classifier = RiskClassifier(config=config)
+
+    start = time.perf_counter()
+    classifier.train(train)
+    fit_s = time.perf_counter() - start
+
+    labels = classifier.auto_label(test)
+    predictions = np.array([p['prediction'] for p in classifier.predict_batch(test)], dtype=object)
+
+    one = test.iloc[:1]
+    batch = test.iloc[np.arange(batch_rows) % len(test)]
+    return {
+        **config,
+        "fit_s": round(fit_s, 4),
+        "predict_1_us": round(median_latency_us(lambda: classifier.predict_batch(one), LATENCY_REPEATS), 1),
+        f"predict_{batch_rows}_ms": round(median_latency_us(lambda: classifier.predict_batch(batch), 5) / 1000, 2),
+        "accuracy": round(float((predictions == labels).mean()), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RiskClassifier n_estimators / max_depth sweep")
+    parser.add_argument("--runs", type=int, default=20000, help="Runs in the dataset (train + held-out)")
+    parser.add_argument("--n-estimators", type=int, nargs="+", default=[5, 10, 25, 50, 100])
+    parser.add_argument("--max-depth", type=int, nargs="+", default=[0, 4, 8, 16], help="0 = unlimited")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Training parallelism (-1 = all cores)")
+    parser.add_argument("--batch-rows", type=int, default=10000, help="Rows in the batched predict timing")
+    parser.add_argument("--tolerance", type=float, default=0.005, help="Accuracy slack when picking")
+    parser.add_argument("--logs", default=os.path.join(PROJECT_ROOT, "logs"), help="Source log directory")
+    parser.add_argument("--output", help="Write all results as JSON")
+    parser.add_argument("--write-config", action="store_true", help=f"Write the choice to {MODEL_CONFIG_PATH}")
+    args = parser.parse_args()
+
+    train, test = build_dataset(args.logs, args.runs)
+    if train is None or len(train) < 5 or test.empty:
+        print(f"[✗] Not enough logs in {args.logs} for a held-out split")
+        return 1
+
+    print("=" * 80)
+    print(f"RISK MODEL SWEEP ({len(train)} train / {len(test)} held-out runs, n_jobs={args.n_jobs}, "
+          f"{os.cpu_count()} CPUs)")
+    print("=" * 80)
+    print(f"  {'trees':>5} {'depth':>5}  {'fit':>9}  {'predict 1':>10}  {f'predict {args.batch_rows}':>14}  {'accuracy':>8}")
+
+    batch_key = f"predict_{args.batch_rows}_ms"
+    results = []
+    for n_estimators, max_depth in itertools.product(args.n_estimators, args.max_depth):
+        r = evaluate(train, test, n_estimators, max_depth, args.n_jobs, args.batch_rows)
+        results.append(r)
+        print(f"  {n_estimators:>5} {max_depth or '-':>5}  {r['fit_s']:>7.3f} s  {r['predict_1_us']:>7.0f} us  "
+              f"{r[batch_key]:>11.2f} ms  {r['accuracy']:>8.4f}")
+
+    best = max(r['accuracy'] for r in results)
+    chosen = min((r for r in results if r['accuracy'] >= best - args.tolerance), key=lambda r: r['predict_1_us'])
+    print(f"\nChosen: n_estimators={chosen['n_estimators']} max_depth={chosen['max_depth']} "
+          f"(accuracy {chosen['accuracy']}, {chosen['predict_1_us']:.0f} us per row)")
+
+    summary = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {"n_estimators": chosen['n_estimators'], "max_depth": chosen['max_depth'], "n_jobs": args.n_jobs},
+        "selected_by": f"accuracy within {args.tolerance} of best, then lowest 1-row predict latency",
+        "dataset": {"train_runs": len(train), "held_out_runs": len(test), "source_logs": args.logs},
+        "environment": {"cpus": os.cpu_count()},
+        "chosen": chosen,
+    }
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(dict(summary, results=results), fh, indent=2)
+        print(f"Results written to {args.output}")
+    if args.write_config:
+        with open(MODEL_CONFIG_PATH, "w") as fh:
+            json.dump(summary, fh, indent=2)
+        print(f"Model config written to {MODEL_CONFIG_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Paired-Run Overhead Engine
+Measures the cost of one sandbox profile relative to another on the same
+binary, for the dashboard's scenario comparison (Section C).
+
+Default pair: LEARNING vs. UNCONFINED (the binary exec'd directly, no
+launcher), i.e. the full cost of sandboxing. The test programs are
+dynamically linked and STRICT / RESOURCE-AWARE kill them in the loader
+(static glibc start-up is not on their allowlists either), so a pair with
+either of those only compares when --binary names a program they admit.
+
+Method:
+    - The binary runs once under each profile per round. The order
+      alternates every round (A B, B A, ...) so slow drift on the host
+      (thermal, page cache, other load) hits both profiles equally.
+    - The first `--warmup` rounds are discarded.
+    - Each round gives one pair. A pair only counts if both runs ended the
+      same way: a profile killing the run early (e.g. SIGSYS) is a
+      different execution, not lower overhead.
+    - The launcher runs with --no-adapt: LEARNING's policy adaptation (the
+      CPU backstop and the online detectors) would otherwise kill
+      cpu_stress and memory_leak, which the baseline runs to the end. The
+      detectors still run, so their monitoring cost is measured.
+    - Outlier pairs are rejected on the modified z-score of their relative
+      difference (|z| > OUTLIER_Z, median/MAD based, Iglewicz & Hoaglin).
+    - Overhead = mean(profile) / mean(baseline) - 1 over the kept pairs,
+      with a 95% bootstrap CI from resampling pairs (fixed seed, so a
+      result file is reproducible from its raw pairs).
+
+The metric is wall time measured here in microseconds: of the launcher
+(setup + monitored run + log write) for a profile, of the bare process for
+UNCONFINED. Runs are hermetic: the launcher works in a temporary directory,
+so its logs never reach logs/ and the dashboard's datasets.
+
+Results are stored as OVERHEAD_DIR/<scenario>.json and served by
+/api/analytics/scenario/<scenario>.
+
+Usage:
+    python3 benchmarks/overhead_engine.py --scenario cpu_stress [--iterations 20]
+    python3 benchmarks/overhead_engine.py --scenario all
+    python3 benchmarks/overhead_engine.py --scenario cpu_stress --profile STRICT --baseline LEARNING --binary <static>
+"""
+
+import argparse
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAUNCHER = os.path.join(PROJECT_ROOT, "runner", "launcher")
+OVERHEAD_DIR = os.path.join(PROJECT_ROOT, "logs", "overhead")
+
+# Dashboard scenario -> test_programs/<binary>
+SCENARIO_PROGRAMS = {
+    "cpu_stress": "cpu_stress",
+    "memory_leak": "memory_leak",
+    "policy_violation": "policy_violation",
+    "normal_program": "moderate_work",
+}
+
+SCHEMA_VERSION = 3
+UNCONFINED = "UNCONFINED"  # Pseudo-profile: run the binary without the launcher
+OUTLIER_Z = 3.5
+BOOTSTRAP_RESAMPLES = 10000
+BOOTSTRAP_SEED = 0
+CONFIDENCE = 0.95
+RUN_TIMEOUT_S = 60
+
+
+def unconfined_exit_reason(returncode):
+    """The launcher's exit_reason for a bare process's return code"""
+    if returncode >= 0:
+        return f"EXITED({returncode})"
+    if -returncode == signal.SIGSYS:
+        return "SECURITY_VIOLATION"
+    if -returncode == signal.SIGKILL:
+        return "KILLED_BY_OS"
+    return "SIGNALED"
+
+
+def run_once(launcher, profile, binary, workdir):
+    """One run (launcher invocation, or bare exec for UNCONFINED); returns {'wall_us', 'runtime_ms', 'exit_reason'}"""
+    if profile == UNCONFINED:
+        start = time.perf_counter_ns()
+        proc = subprocess.run([binary], cwd=workdir, capture_output=True, timeout=RUN_TIMEOUT_S)
+        wall_us = (time.perf_counter_ns() - start) // 1000
+        return {"wall_us": wall_us, "runtime_ms": wall_us // 1000,
+                "exit_reason": unconfined_exit_reason(proc.returncode)}
+
+    start = time.perf_counter_ns()
+    proc = subprocess.run([launcher, f"--profile={profile}", "--stream=", "--no-adapt", binary],
+                          cwd=workdir, capture_output=True, timeout=RUN_TIMEOUT_S)
+    wall_us = (time.perf_counter_ns() - start) // 1000
+
+    run = {"wall_us": wall_us, "runtime_ms": None, "exit_reason": f"LAUNCHER_EXIT({proc.returncode})"}
+    for line in proc.stdout.decode(errors="replace").splitlines():
+        if line.startswith("[Telemetry] Log written to "):
+            path = os.path.join(workdir, line.split()[4])
+            with open(path) as fh:
+                summary = json.load(fh).get("summary", {})
+            os.remove(path)
+            run["runtime_ms"] = summary.get("runtime_ms")
+            run["exit_reason"] = summary.get("exit_reason")
+    return run
+
+
+def collect_pairs(launcher, binary, profile, baseline, iterations, warmup):
+    """Interleaved rounds; returns the measured (non-warm-up) pairs"""
+    pairs = []
+    with tempfile.TemporaryDirectory(prefix="sandbox_overhead_") as workdir:
+        for i in range(warmup + iterations):
+            order = [profile, baseline] if i % 2 == 0 else [baseline, profile]
+            runs = {p: run_once(launcher, p, binary, workdir) for p in order}
+            if i >= warmup:
+                pairs.append({"round": i - warmup, "order": order, profile: runs[profile], baseline: runs[baseline]})
+    return pairs
+
+
+def reject_outliers(rel_diff):
+    """Boolean mask of pairs to keep (modified z-score)"""
+    median = np.median(rel_diff)
+    mad = np.median(np.abs(rel_diff - median))
+    if mad == 0:
+        return np.ones(len(rel_diff), dtype=bool)
+    z = 0.6745 * (rel_diff - median) / mad
+    return np.abs(z) <= OUTLIER_Z
+
+
+def bootstrap_ci(profile_us, baseline_us):
+    """CI of mean(profile)/mean(baseline) - 1, resampling whole pairs"""
+    rng = np.random.default_rng(BOOTSTRAP_SEED)
+    idx = rng.integers(0, len(profile_us), size=(BOOTSTRAP_RESAMPLES, len(profile_us)))
+    ratios = profile_us[idx].mean(axis=1) / baseline_us[idx].mean(axis=1) - 1
+    alpha = (1 - CONFIDENCE) / 2
+    return float(np.quantile(ratios, alpha)), float(np.quantile(ratios, 1 - alpha))
+
+
+def describe(values):
+    return {"mean": round(float(values.mean()), 1), "median": round(float(np.median(values)), 1),
+            "stdev": round(float(values.std(ddof=1)), 1) if len(values) > 1 else 0.0}
+
+
+def analyze(pairs, profile, baseline):
+    """Overhead of `profile` over `baseline` from raw pairs"""
+    comparable = [p for p in pairs if p[profile]["exit_reason"] == p[baseline]["exit_reason"]]
+    result = {
+        "pairs": len(pairs),
+        "comparable": len(comparable),
+        "excluded_mismatched_exit": len(pairs) - len(comparable),
+    }
+    if len(comparable) < 2:
+        mismatched = [(p[profile]["exit_reason"], p[baseline]["exit_reason"])
+                      for p in pairs if p[profile]["exit_reason"] != p[baseline]["exit_reason"]]
+        result["status"] = "not_comparable"
+        if mismatched:
+            ends, base_ends = max(set(mismatched), key=mismatched.count)
+            result["reason"] = f"Profiles end the run differently ({profile}: {ends}, {baseline}: {base_ends})"
+        else:
+            result["reason"] = "Fewer than 2 pairs"
+        return result
+
+    profile_us = np.array([p[profile]["wall_us"] for p in comparable], dtype=float)
+    baseline_us = np.array([p[baseline]["wall_us"] for p in comparable], dtype=float)
+    keep = reject_outliers((profile_us - baseline_us) / baseline_us)
+    profile_us, baseline_us = profile_us[keep], baseline_us[keep]
+
+    overhead = profile_us.mean() / baseline_us.mean() - 1
+    low, high = bootstrap_ci(profile_us, baseline_us)
+    result.update({
+        "status": "ok",
+        "outliers_rejected": int((~keep).sum()),
+        "used": int(keep.sum()),
+        "overhead_pct": round(overhead * 100, 2),
+        "ci_low_pct": round(low * 100, 2),
+        "ci_high_pct": round(high * 100, 2),
+        "confidence": CONFIDENCE,
+        # CI excluding 0: the profiles differ beyond run-to-run noise
+        "significant": bool(low > 0 or high < 0),
+        "wall_us": {profile: describe(profile_us), baseline: describe(baseline_us)},
+    })
+    return result
+
+
+def measure_scenario(scenario, launcher, profile, baseline, iterations, warmup, binary=None):
+    binary = binary or os.path.join(PROJECT_ROOT, "test_programs", SCENARIO_PROGRAMS[scenario])
+    print(f"[Overhead] {scenario}: {binary}, {profile} vs {baseline}, "
+          f"{iterations} rounds + {warmup} warm-up")
+
+    pairs = collect_pairs(launcher, binary, profile, baseline, iterations, warmup)
+    result = {
+        "version": SCHEMA_VERSION,
+        "scenario": scenario,
+        "program": os.path.basename(binary),
+        "profile": profile,
+        "baseline": baseline,
+        "metric": "wall_us",
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {"iterations": iterations, "warmup": warmup, "outlier_z": OUTLIER_Z,
+                   "bootstrap_resamples": BOOTSTRAP_RESAMPLES, "bootstrap_seed": BOOTSTRAP_SEED,
+                   "policy_adaptation": False},
+        "environment": {"kernel": platform.release(), "cpus": os.cpu_count()},
+        "result": analyze(pairs, profile, baseline),
+        "raw_pairs": pairs,
+    }
+
+    os.makedirs(OVERHEAD_DIR, exist_ok=True)
+    path = os.path.join(OVERHEAD_DIR, f"{scenario}.json")
+    with open(path, "w") as fh:
+        json.dump(result, fh, indent=2)
+
+    summary = result["result"]
+    if summary["status"] == "ok":
+        print(f"[Overhead]   {summary['overhead_pct']:+.2f}% "
+              f"(95% CI {summary['ci_low_pct']:+.2f}% .. {summary['ci_high_pct']:+.2f}%, "
+              f"{summary['used']} pairs, {summary['outliers_rejected']} outliers) -> {path}")
+    else:
+        print(f"[Overhead]   not comparable: {summary['reason']} -> {path}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paired, interleaved profile overhead measurement")
+    parser.add_argument("--scenario", required=True, choices=sorted(SCENARIO_PROGRAMS) + ["all"])
+    parser.add_argument("--iterations", type=int, default=20, help="Measured rounds (one pair each)")
+    parser.add_argument("--warmup", type=int, default=2, help="Discarded rounds")
+    parser.add_argument("--profile", default="LEARNING", help="Profile whose overhead is measured")
+    parser.add_argument("--baseline", default=UNCONFINED,
+                        help=f"Reference profile ({UNCONFINED} = the binary without the sandbox)")
+    parser.add_argument("--launcher", default=LAUNCHER, help="Launcher binary")
+    parser.add_argument("--binary", help="Program to run instead of the scenario's test_programs binary")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.launcher):
+        print(f"[✗] Launcher not found: {args.launcher} (run make)")
+        return 1
+    if args.binary and args.scenario == "all":
+        print("[✗] --binary needs a single --scenario")
+        return 1
+    if args.iterations < 2:
+        print("[✗] --iterations must be at least 2")
+        return 1
+
+    scenarios = sorted(SCENARIO_PROGRAMS) if args.scenario == "all" else [args.scenario]
+    for scenario in scenarios:
+        measure_scenario(scenario, os.path.abspath(args.launcher), args.profile, args.baseline,
+                         args.iterations, args.warmup, args.binary and os.path.abspath(args.binary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
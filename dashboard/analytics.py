@@ -1,6 +1,9 @@
 import os
 import json
 import glob
+import threading
+from collections import namedtuple
+from itertools import chain, islice, repeat
 import pandas as pd
 import numpy as np
 
@@ -18,72 +21,317 @@ def load_all_logs(log_dir="../logs"):
             print(f"[Analytics] Error reading {f}: {e}")
     return logs
 
-def extract_features(logs):
+# Feature stage: one vectorized pass over many runs' timelines, shared by the
+# ML classifier (extract_features) and BehavioralAnalyzer. Numeric features
+# only; strings (program, profile, exit reason) stay on the log.
+FEATURE_DTYPE = np.dtype([
+    # Summary counters
+    ('pid', 'i8'),
+    ('runtime_ms', 'i8'),
+    ('peak_cpu', 'i8'),
+    ('peak_memory_kb', 'i8'),
+    ('page_faults_minor', 'i8'),
+    ('page_faults_major', 'i8'),
+    ('read_syscalls', 'i8'),
+    ('write_syscalls', 'i8'),
+    ('blocked_syscalls', 'i8'),
+    ('sample_count', 'i8'),             # len(timeline.time_ms)
+    # CPU timeline
+    ('cpu_samples', 'i8'),
+    ('avg_cpu', 'i8'),
+    ('cpu_variance', 'f8'),
+    ('cpu_p50', 'f8'),
+    ('cpu_p90', 'f8'),
+    ('cpu_p99', 'f8'),
+    ('cpu_slope_per_s', 'f8'),          # Least-squares trend, percent per second
+    ('cpu_burstiness', 'f8'),           # (sd - mean) / (sd + mean): -1 steady .. 1 bursty
+    ('high_cpu_samples', 'i8'),         # Samples >= HIGH_CPU_PERCENT
+    ('high_cpu_ms', 'i8'),              # Wall time of those samples
+    ('total_ms', 'i8'),                 # Wall time of all samples
+    # Memory timeline
+    ('memory_samples', 'i8'),
+    ('starting_memory_kb', 'i8'),
+    ('ending_memory_kb', 'i8'),
+    ('memory_growth_kb', 'i8'),         # Last - first (0 below 2 samples)
+    ('memory_growth_rate', 'f8'),       # KB per sample
+    ('avg_memory_kb', 'i8'),            # Peak below 2 samples
+    ('memory_p50_kb', 'f8'),
+    ('memory_p90_kb', 'f8'),
+    ('memory_slope_kb_per_s', 'f8'),
+    ('monotonic_growth_ratio', 'f8'),   # Rising fraction of the 100ms memory trend
+    # Syscall rates
+    ('io_syscalls', 'i8'),
+    ('syscalls_per_100ms', 'f8'),       # Reads + writes; a missing runtime counts as 1 ms
+    ('read_syscalls_per_s', 'f8'),
+    ('write_syscalls_per_s', 'f8'),
+    ('blocked_syscalls_per_s', 'f8'),
+])
+
+# Feature row of one run with Python scalars (FeatureStore.get)
+RunFeatures = namedtuple('RunFeatures', FEATURE_DTYPE.names)
+
+HIGH_CPU_PERCENT = 80   # cpu_percent at or above this is a high-CPU sample
+SAMPLE_GRID_MS = 100    # Fixed rate of logs without timeline.interval_ms
+
+SUMMARY_COUNTERS = ('runtime_ms', 'peak_cpu', 'peak_memory_kb', 'page_faults_minor', 'page_faults_major',
+                    'read_syscalls', 'write_syscalls', 'blocked_syscalls')
+
+
+def _flatten(lists, count, dtype=np.int64):
+    """Concatenate per-run lists into one flat buffer"""
+    return np.fromiter(chain.from_iterable(lists), dtype=dtype, count=count)
+
+
+def _lengths(lists, n):
+    return np.fromiter(map(len, lists), dtype=np.int64, count=n)
+
+
+def _sample_times(times, time_flat, time_len, lengths):
+    """Flat time axis (ms) of each run's series: time_ms, or the legacy grid where it does not line up"""
+    if np.array_equal(time_len, lengths):
+        return time_flat
+    return _flatten((t if len(t) == m else range(0, m * SAMPLE_GRID_MS, SAMPLE_GRID_MS)
+                     for t, m in zip(times, lengths.tolist())),
+                    int(lengths.sum()))
+
+
+def _segment_percentiles(values, seg, start, length, qs):
+    """Per-run percentiles (linear interpolation) of a flat buffer, 0 for empty runs; one sort for all qs"""
+    ordered = values[np.lexsort((values, seg))].astype(np.float64)
+    has = length > 0
+    last = np.maximum(length - 1, 0)
+    results = []
+    for q in qs:
+        position = q / 100 * last
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, last)
+        lo_value, hi_value = ordered[(start + low)[has]], ordered[(start + high)[has]]
+        result = np.zeros(len(length))
+        result[has] = lo_value + (hi_value - lo_value) * (position - low)[has]
+        results.append(result)
+    return results
+
+
+def _segment_slope(x, y, seg, count):
+    """Per-run least-squares slope of y over x, 0 below two distinct x"""
+    n = len(count)
+    safe = np.maximum(count, 1)
+    dx = x - (np.bincount(seg, weights=x, minlength=n) / safe)[seg]
+    dy = y - (np.bincount(seg, weights=y, minlength=n) / safe)[seg]
+    sxx = np.bincount(seg, weights=dx * dx, minlength=n)
+    sxy = np.bincount(seg, weights=dx * dy, minlength=n)
+    return np.divide(sxy, sxx, out=np.zeros(n), where=sxx > 0)
+
+
+def compute_features(logs):
+    """
+    FEATURE STAGE: every numeric feature of many runs in one pass.
+    
+    All runs' samples are concatenated into flat NumPy buffers, each run a
+    segment, so per-run sums are np.bincount over segment ids. This is the
+    single definition of the timeline metrics used by the ML model and the
+    behavioral detectors; cache its rows with FeatureStore.
+    
+    Returns: structured array of FEATURE_DTYPE, one row per log, in order
+    """
+    n = len(logs)
+    result = np.zeros(n, dtype=FEATURE_DTYPE)
+    if n == 0:
+        return result
+    
+    timelines = [log.get('timeline', {}) for log in logs]
+    summaries = [log.get('summary', {}) for log in logs]
+    result['pid'] = [log.get('pid', 0) for log in logs]
+    counters = np.array([[s.get(k, 0) for k in SUMMARY_COUNTERS] for s in summaries],
+                        dtype=np.int64).reshape(n, len(SUMMARY_COUNTERS))
+    for i, key in enumerate(SUMMARY_COUNTERS):
+        result[key] = counters[:, i]
+    runs = np.arange(n)
+    times = [t.get('time_ms', []) for t in timelines]
+    time_len = _lengths(times, n)
+    time_flat = _flatten(times, int(time_len.sum()))
+    result['sample_count'] = time_len
+    
+    # ---- CPU ----
+    cpu = [t.get('cpu_percent', []) for t in timelines]
+    cpu_len = _lengths(cpu, n)
+    cpu_flat = _flatten(cpu, int(cpu_len.sum()))
+    cpu_seg = np.repeat(runs, cpu_len)
+    cpu_start = np.cumsum(cpu_len) - cpu_len
+    has_cpu = cpu_len > 0
+    cpu_n = np.maximum(cpu_len, 1)
+    
+    cpu_mean = np.bincount(cpu_seg, weights=cpu_flat, minlength=n) / cpu_n
+    cpu_var = np.bincount(cpu_seg, weights=(cpu_flat - cpu_mean[cpu_seg]) ** 2, minlength=n) / cpu_n
+    cpu_sd = np.sqrt(cpu_var)
+    result['cpu_samples'] = cpu_len
+    result['avg_cpu'] = cpu_mean.astype(np.int64)
+    result['cpu_variance'] = cpu_var
+    result['cpu_p50'], result['cpu_p90'], result['cpu_p99'] = _segment_percentiles(
+        cpu_flat, cpu_seg, cpu_start, cpu_len, (50, 90, 99))
+    result['cpu_slope_per_s'] = _segment_slope(_sample_times(times, time_flat, time_len, cpu_len) / 1000.0, cpu_flat,
+                                               cpu_seg, cpu_len)
+    result['cpu_burstiness'] = np.divide(cpu_sd - cpu_mean, cpu_sd + cpu_mean, out=np.zeros(n),
+                                         where=has_cpu & (cpu_sd + cpu_mean > 0))
+    
+    # Time-weighted high CPU: adaptive-rate logs record each sample's
+    # interval in timeline.interval_ms, older logs were sampled every 100ms
+    recorded = [t.get('interval_ms') for t in timelines]
+    intervals = _flatten(
+        (iv if iv and len(iv) == len(c) else repeat(SAMPLE_GRID_MS, len(c)) for iv, c in zip(recorded, cpu)),
+        len(cpu_flat))
+    high = cpu_flat >= HIGH_CPU_PERCENT
+    result['high_cpu_samples'] = np.bincount(cpu_seg, weights=high, minlength=n)
+    result['high_cpu_ms'] = np.bincount(cpu_seg, weights=intervals * high, minlength=n)
+    result['total_ms'] = np.bincount(cpu_seg, weights=intervals, minlength=n)
+    
+    # ---- Memory ----
+    mem = [t.get('memory_kb', []) for t in timelines]
+    mem_len = _lengths(mem, n)
+    mem_flat = _flatten(mem, int(mem_len.sum()))
+    mem_seg = np.repeat(runs, mem_len)
+    mem_start = np.cumsum(mem_len) - mem_len
+    has_mem = mem_len > 0
+    has_two = mem_len >= 2
+    first = np.zeros(n, dtype=np.int64)
+    last = np.zeros(n, dtype=np.int64)
+    first[has_mem] = mem_flat[mem_start[has_mem]]
+    last[has_mem] = mem_flat[(mem_start + mem_len - 1)[has_mem]]
+    growth = np.where(has_two, last - first, 0)
+    
+    result['memory_samples'] = mem_len
+    result['starting_memory_kb'] = first
+    result['ending_memory_kb'] = last
+    result['memory_growth_kb'] = growth
+    result['memory_growth_rate'] = np.divide(growth, mem_len, out=np.zeros(n), where=has_two)
+    mem_mean = np.bincount(mem_seg, weights=mem_flat, minlength=n) / np.maximum(mem_len, 1)
+    result['avg_memory_kb'] = np.where(has_two, mem_mean.astype(np.int64), result['peak_memory_kb'])
+    result['memory_p50_kb'], result['memory_p90_kb'] = _segment_percentiles(
+        mem_flat, mem_seg, mem_start, mem_len, (50, 90))
+    result['memory_slope_kb_per_s'] = _segment_slope(_sample_times(times, time_flat, time_len, mem_len) / 1000.0, mem_flat,
+                                                     mem_seg, mem_len)
+    
+    # Monotonic growth on the 100ms grid: adaptive logs keep the last sample
+    # of each bucket (fast sampling sees the plateaus between allocations),
+    # legacy logs keep every sample; empty buckets are skipped
+    adaptive = np.fromiter(('interval_ms' in t for t in timelines), dtype=bool, count=n)
+    trend_len = np.where(adaptive, np.minimum(time_len, mem_len), mem_len)
+    mem_index = np.arange(len(mem_flat)) - np.repeat(mem_start, mem_len)
+    if np.array_equal(time_len, mem_len):
+        bucket_times = np.where(np.repeat(adaptive, mem_len), time_flat, mem_index * SAMPLE_GRID_MS)
+    else:
+        bucket_times = _flatten(
+            (islice(t, m) if a else range(0, m * SAMPLE_GRID_MS, SAMPLE_GRID_MS)
+             for t, m, a in zip(times, trend_len.tolist(), adaptive.tolist())),
+            int(trend_len.sum()))
+    in_trend = mem_index < np.repeat(trend_len, mem_len)
+    trend = mem_flat[in_trend]
+    trend_seg = np.repeat(runs, trend_len)
+    bucket = bucket_times // SAMPLE_GRID_MS
+    
+    keep = np.ones(len(trend), dtype=bool)
+    keep[:-1] = (trend_seg[1:] != trend_seg[:-1]) | (bucket[1:] != bucket[:-1])
+    kept, kept_seg = trend[keep], trend_seg[keep]
+    rises = (np.diff(kept) > 0) & (kept_seg[1:] == kept_seg[:-1])
+    increasing = np.bincount(kept_seg[1:][rises], minlength=n)
+    steps = np.bincount(kept_seg, minlength=n) - 1
+    result['monotonic_growth_ratio'] = np.divide(increasing, steps, out=np.zeros(n), where=steps > 0)
+    
+    # ---- Syscall rates ----
+    runtime_ms = result['runtime_ms']
+    has_runtime = runtime_ms > 0
+    io_syscalls = result['read_syscalls'] + result['write_syscalls']
+    rate_runtime = np.array([s.get('runtime_ms', 1) for s in summaries], dtype=np.int64).reshape(n)
+    result['io_syscalls'] = io_syscalls
+    result['syscalls_per_100ms'] = np.divide(io_syscalls, rate_runtime, out=np.zeros(n),
+                                             where=rate_runtime > 0) * 100
+    for key in ('read_syscalls', 'write_syscalls', 'blocked_syscalls'):
+        result[f'{key}_per_s'] = np.divide(result[key] * 1000.0, runtime_ms, out=np.zeros(n), where=has_runtime)
+    return result
+
+
+def log_file_name(log):
+    """
+    Name of the file a log was loaded from (run_<pid>_<start time>.json),
+    or None for logs that never were on disk. The pid alone is not a run
+    identity: pids are recycled across runs.
+    """
+    path = log.get('_file')
+    return os.path.basename(path) if path else None
+
+
+class FeatureStore:
+    """
+    compute_features() rows cached per run (log file, pid, program,
+    profile): each run's timeline is reduced once, however many consumers
+    ask for it.
+    Rows live in one structured array that doubles when full, so runs
+    arriving one at a time cost amortized O(1) to store.
+    """
+    
+    def __init__(self):
+        self.rows = np.zeros(64, dtype=FEATURE_DTYPE)
+        self.size = 0
+        self.index = {}
+        self.lock = threading.Lock()
+    
+    def __len__(self):
+        return self.size
+    
+    @staticmethod
+    def run_key(log):
+        return (log_file_name(log), log.get('pid', 0), log.get('program', 'unknown'), log.get('profile', 'UNKNOWN'))
+    
+    def features(self, logs):
+        """FEATURE_DTYPE rows for logs, in order; only uncached runs are computed (in one batch)"""
+        keys = [self.run_key(log) for log in logs]
+        positions = [self.index.get(key, -1) for key in keys]
+        missing = [i for i, pos in enumerate(positions) if pos < 0]
+        if missing:
+            computed = compute_features([logs[i] for i in missing])
+            with self.lock:
+                start = self.size
+                if start + len(computed) > len(self.rows):
+                    grown = np.zeros(max(2 * len(self.rows), start + len(computed)), dtype=FEATURE_DTYPE)
+                    grown[:start] = self.rows[:start]
+                    self.rows = grown
+                self.rows[start:start + len(computed)] = computed
+                self.size = start + len(computed)
+                for offset, i in enumerate(missing):
+                    positions[i] = self.index.setdefault(keys[i], start + offset)
+        return self.rows[np.array(positions, dtype=np.int64)]
+    
+    def get(self, log):
+        """RunFeatures (Python scalars) of one log"""
+        position = self.index.get(self.run_key(log))
+        row = self.rows[position] if position is not None else self.features([log])[0]
+        return RunFeatures._make(row.item())
+
+
+def extract_features(logs, store=None):
     """
     FEATURE EXTRACTION LAYER (Critical for research correctness)
     
     Converts raw telemetry logs into structured feature DataFrame.
     This is the ONLY input to ML and analytics.
     
+    Numeric columns come from the feature stage (compute_features); pass
+    the FeatureStore shared with the analyzer to reuse its cached rows.
+    
     Returns: pandas DataFrame with flat structure
     """
-    features = []
-    
-    for log in logs:
-        summary = log.get('summary', {})
-        timeline = log.get('timeline', {})
-        
-        # Extract summary features (guaranteed fields)
-        feature_row = {
-            'program': log.get('program', 'unknown'),
-            'profile': log.get('profile', 'UNKNOWN'),
-            'pid': log.get('pid', 0),
-            
-            # Core metrics from summary
-            'runtime_ms': summary.get('runtime_ms', 0),
-            'peak_cpu': summary.get('peak_cpu', 0),
-            'peak_memory_kb': summary.get('peak_memory_kb', 0),
-            'page_faults_minor': summary.get('page_faults_minor', 0),
-            'page_faults_major': summary.get('page_faults_major', 0),
-            
-            # I/O syscall activity (from /proc/[pid]/io)
-            'read_syscalls': summary.get('read_syscalls', 0),
-            'write_syscalls': summary.get('write_syscalls', 0),
-            'blocked_syscalls': summary.get('blocked_syscalls', 0),
-            
-            # Exit information
-            'exit_reason': summary.get('exit_reason', 'UNKNOWN'),
-            'termination': summary.get('termination', ''),
-            'blocked_syscall': summary.get('blocked_syscall', ''),
-            
-            # Timeline-derived features
-            'sample_count': len(timeline.get('time_ms', [])),
-        }
-        
-        # Compute timeline statistics (safe)
-        cpu_samples = timeline.get('cpu_percent', [])
-        mem_samples = timeline.get('memory_kb', [])
-        
-        if cpu_samples:
-            feature_row['avg_cpu'] = int(np.mean(cpu_samples))
-            feature_row['cpu_variance'] = float(np.var(cpu_samples))
-        else:
-            feature_row['avg_cpu'] = 0
-            feature_row['cpu_variance'] = 0.0
-        
-        if mem_samples and len(mem_samples) >= 2:
-            # Memory growth rate (KB per sample)
-            feature_row['memory_growth_rate'] = float((mem_samples[-1] - mem_samples[0]) / len(mem_samples))
-            feature_row['memory_growth_kb'] = int(mem_samples[-1] - mem_samples[0])
-            feature_row['avg_memory_kb'] = int(np.mean(mem_samples))
-        else:
-            feature_row['memory_growth_rate'] = 0.0
-            feature_row['memory_growth_kb'] = 0
-            feature_row['avg_memory_kb'] = feature_row['peak_memory_kb']
-        
-        features.append(feature_row)
-    
-    return pd.DataFrame(features)
+    rows = store.features(logs) if store is not None else compute_features(logs)
+    summaries = [log.get('summary', {}) for log in logs]
+    df = pd.DataFrame({
+        'log_file': [log_file_name(log) for log in logs],
+        'program': [log.get('program', 'unknown') for log in logs],
+        'profile': [log.get('profile', 'UNKNOWN') for log in logs],
+        **{name: rows[name] for name in FEATURE_DTYPE.names},
+        'exit_reason': [s.get('exit_reason', 'UNKNOWN') for s in summaries],
+        'termination': [s.get('termination', '') for s in summaries],
+        'blocked_syscall': [s.get('blocked_syscall', '') for s in summaries],
+    })
+    return df
 
 def compute_statistics(df):
     """Compute comprehensive statistics from feature DataFrame"""
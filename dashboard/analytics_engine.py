@@ -9,31 +9,183 @@ NO machine learning, NO simulated data - purely deterministic analysis of real k
 import json
 import glob
 import os
+import sys
+from collections import namedtuple
 import numpy as np
-from typing import Dict, List, Tuple, Any
-from risk_scoring import RiskScorer, RiskScoringService
+from typing import Dict, List, Optional, Tuple, Any, Union
+from analytics import FeatureStore, HIGH_CPU_PERCENT, SAMPLE_GRID_MS, log_file_name
+from risk_scoring import RiskScorer, RiskScoringService, BEHAVIOR_CODES, BEHAVIOR_BITS
+
+# BEHAVIOR_CODES order = detection order of analyze_execution
+RISK_LEVELS = ('LOW', 'MEDIUM', 'HIGH')
+
+# One row per run, returned by BehavioralAnalyzer.analyze_batch()
+BATCH_DTYPE = np.dtype([
+    ('pid', 'i8'),
+    ('profile', 'U16'),
+    ('behaviors', 'u1'),            # OR of BEHAVIOR_BITS
+    ('risk_level', 'u1'),           # Index into RISK_LEVELS
+    ('peak_cpu', 'i4'),
+    ('cpu_samples', 'i4'),
+    ('high_cpu_samples', 'i4'),
+    ('high_cpu_ms', 'i8'),
+    ('total_ms', 'i8'),
+    ('peak_memory_kb', 'i8'),
+    ('memory_samples', 'i4'),
+    ('memory_growth_kb', 'i8'),
+    ('monotonic_ratio', 'f8'),      # Rising fraction of the 100ms memory trend
+    ('io_syscalls', 'i8'),
+    ('syscalls_per_100ms', 'f8'),
+    ('blocked_syscalls', 'i8'),
+])
+
+# Per-behavior metrics of a cached analysis (tuples: no per-instance dict)
+CpuMetrics = namedtuple('CpuMetrics', [
+    'peak_cpu', 'sustained_samples', 'total_samples', 'sustained_ms', 'total_ms', 'sustained_percentage'])
+MemoryMetrics = namedtuple('MemoryMetrics', [
+    'peak_memory_kb', 'starting_memory_kb', 'ending_memory_kb', 'memory_growth_kb', 'memory_samples',
+    'page_faults_major', 'monotonic_growth_ratio'], defaults=[None])
+IoMetrics = namedtuple('IoMetrics', [
+    'read_syscalls', 'write_syscalls', 'total_io_syscalls', 'runtime_ms', 'syscalls_per_100ms',
+    'baseline_syscalls_per_100ms'])
+PolicyMetrics = namedtuple('PolicyMetrics', [
+    'exit_reason', 'blocked_syscalls', 'blocked_syscall_name', 'termination_signal', 'profile'])
+
+
+class ExecutionAnalysis:
+    """
+    Cached analysis of one execution: behaviors as a bitmask, metrics as
+    tuples, strings interned. to_dict() gives the API form (the same keys
+    analyze_execution has always returned) at the JSON boundary.
+    """
+    __slots__ = ('pid', 'program', 'profile', 'behaviors', 'risk_level', 'cpu', 'memory', 'io', 'policy', 'risk')
+    
+    METRIC_GROUPS = ('cpu', 'memory', 'io', 'policy')
+    
+    def __init__(self, pid, program, profile):
+        self.pid = pid
+        self.program = _intern(program)
+        self.profile = _intern(profile)
+        self.behaviors = 0                      # OR of BEHAVIOR_BITS
+        self.risk_level = 'UNKNOWN'
+        self.cpu = self.memory = self.io = self.policy = None
+        self.risk = None                        # RiskScore (shared with the scorer's cache)
+    
+    @property
+    def detected_behaviors(self) -> List[str]:
+        return [b for b in BEHAVIOR_CODES if self.behaviors & BEHAVIOR_BITS[b]]
+    
+    @property
+    def metrics(self) -> Dict[str, Dict]:
+        metrics = {}
+        for group in self.METRIC_GROUPS:
+            values = getattr(self, group)
+            if values is not None:
+                metrics[group] = {k: v for k, v in values._asdict().items() if v is not None}
+        return metrics
+    
+    @property
+    def risk_score(self) -> int:
+        return self.risk.score
+    
+    @property
+    def risk_classification(self) -> str:
+        return self.risk.risk_level
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'pid': self.pid,
+            'program': self.program,
+            'profile': self.profile,
+            'detected_behaviors': self.detected_behaviors,
+            'metrics': self.metrics,
+            'risk_level': self.risk_level,
+            'risk_score': self.risk.score,
+            'risk_classification': self.risk.risk_level,
+            'risk_contributions': RiskScorer.contributions(self.risk),
+        }
+
+
+# Explanation texts, rendered from an analysis' metrics only when a single
+# run's detail is requested (BehavioralAnalyzer.explain). Keys are the
+# metrics dict of the behavior plus the extras from _explanation_params().
+EXPLANATION_METRICS = {
+    'SUSTAINED_HIGH_CPU': 'cpu',
+    'MONOTONIC_MEMORY_GROWTH': 'memory',
+    'HIGH_IO_SYSCALL_RATE': 'io',
+    'POLICY_VIOLATION': 'policy',
+}
+EXPLANATION_TEMPLATES = {
+    'SUSTAINED_HIGH_CPU': (
+        "Process maintained CPU usage ≥{threshold}% "
+        "for {sustained_ms} of {total_ms} ms ({sustained_samples} of {total_samples} samples, "
+        "{sustained_percentage:.0f}%). "
+        "Peak: {peak_cpu}%. This indicates compute-intensive activity (e.g., CPU stress test). "
+        "Source: /proc/[pid]/stat (delta-based calculation over ≥100ms windows)."
+    ),
+    'MONOTONIC_MEMORY_GROWTH': (
+        "Memory leak detected: {memory_growth_kb} KB growth over {memory_samples} samples. "
+        "Monotonic growth rate: {monotonic_growth_pct:.1f}% (threshold: 80%). "
+        "Pattern shows continuous allocation without freeing. "
+        "Source: /proc/[pid]/status (VmPeak)."
+    ),
+    'HIGH_IO_SYSCALL_RATE': (
+        "Detected {total_io_syscalls} I/O syscalls ({read_syscalls} reads + {write_syscalls} writes) "
+        "in {runtime_ms}ms ({syscalls_per_100ms:.1f} syscalls/100ms). "
+        "This exceeds normal baseline (~{baseline_syscalls_per_100ms} syscalls/100ms) by {baseline_factor:.1f}x. "
+        "Indicates intensive I/O operation or syscall flooding. "
+        "Source: /proc/[pid]/io (syscr/syscw fields)."
+    ),
+    'POLICY_VIOLATION': (
+        "Process terminated due to policy enforcement. "
+        "Exit reason: {exit_reason}{blocked_detail}. "
+        "Total blocked syscalls: {blocked_syscalls}. "
+        "Profile: {profile}. "
+        "Signal: {termination_signal} (SIG31 = SIGSYS from seccomp-BPF). "
+        "Indicates sandbox rules prevented unauthorized system call. "
+        "Source: Signal delivery from seccomp-BPF policy."
+    ),
+}
+
+
+def _log_started(log):
+    """Start time (epoch seconds) from a run_<pid>_<start>.json log name; 0 if unknown"""
+    stamp = os.path.splitext(log_file_name(log) or '')[0].rpartition('_')[2]
+    return int(stamp) if stamp.isdigit() else 0
+
+def _intern(value):
+    """Interned copy of repeated strings (profiles, exit reasons) held in the cache"""
+    return sys.intern(value) if isinstance(value, str) else value
 
 class BehavioralAnalyzer:
     """
     Deterministic behavioral analysis engine.
     Analyzes real telemetry data to detect patterns and anomalies.
+    
+    Timeline metrics come from the feature stage (analytics.compute_features)
+    through a FeatureStore, shared with the ML feature extraction when one
+    is passed in; the detection rules are applied to those rows in _detect().
     """
     
     # Thresholds based on observed behavior from Phase 3 tests
-    SUSTAINED_HIGH_CPU_THRESHOLD = 80  # % - cpu_stress showed 100%+
+    SUSTAINED_HIGH_CPU_THRESHOLD = HIGH_CPU_PERCENT  # % - cpu_stress showed 100%+
     HIGH_CPU_SAMPLES_REQUIRED = 5      # Must maintain for N samples
+    LEGACY_SAMPLE_INTERVAL_MS = SAMPLE_GRID_MS  # Fixed rate of logs without timeline.interval_ms
     
     MEMORY_LEAK_GROWTH_THRESHOLD = 1.0  # KB/sample - memory_leak showed ~15 KB/sample
+    MEMORY_LEAK_MIN_GROWTH_KB = 5000   # Significant increase, first to last sample
+    MEMORY_LEAK_MIN_SAMPLES = 5        # Enough data points
     MONOTONIC_GROWTH_THRESHOLD = 0.8   # % of samples showing growth
     
     HIGH_SYSCALL_RATE_THRESHOLD = 100  # syscalls per 100ms
     IO_ACTIVITY_BASELINE = 5           # Normal programs show ~5 syscalls
     
-    def __init__(self):
+    def __init__(self, feature_store: FeatureStore = None):
         self.analysis_cache = {}
+        self.features = feature_store if feature_store is not None else FeatureStore()
         self.risk_scorer = RiskScorer()  # Initialize risk scoring engine
     
-    def analyze_execution(self, log_data: Dict) -> Dict[str, Any]:
+    def analyze_execution(self, log_data: Dict, explain: bool = True):
         """
         Analyze a single execution log for behavioral patterns.
         
@@ -41,241 +193,181 @@ class BehavioralAnalyzer:
         - detected_behaviors: List of identified behaviors
         - explanations: Clear text explanations
         - risk_indicators: Objective metrics
+        
+        With explain=False (bulk callers) the cached ExecutionAnalysis is
+        returned as is: no dicts and no text are built.
         """
-        pid = log_data.get('pid', 0)
-        
-        # Cache check
-        if pid in self.analysis_cache:
-            return self.analysis_cache[pid]
-        
-        analysis = {
-            'pid': pid,
-            'program': log_data.get('program', 'unknown'),
-            'profile': log_data.get('profile', 'UNKNOWN'),
-            'detected_behaviors': [],
-            'explanations': {},
-            'metrics': {},
-            'risk_level': 'UNKNOWN'
-        }
+        # Cache check (per run: pids are recycled)
+        key = self.features.run_key(log_data)
+        analysis = self.analysis_cache.get(key)
+        if analysis is None:
+            analysis = self._analyze(log_data)
+            self.analysis_cache[key] = analysis
+        
+        return self.explain(analysis) if explain else analysis
+    
+    def _analyze(self, log_data: Dict) -> ExecutionAnalysis:
+        """Detections, metrics and risk score of one log (no explanation text)"""
+        analysis = ExecutionAnalysis(log_data.get('pid', 0),
+                                     log_data.get('program', 'unknown'),
+                                     log_data.get('profile', 'UNKNOWN'))
         
-        timeline = log_data.get('timeline', {})
         summary = log_data.get('summary', {})
-        
-        # Analyze each behavior
-        cpu_behavior = self._analyze_cpu_usage(timeline, summary)
-        if cpu_behavior:
-            analysis['detected_behaviors'].append(cpu_behavior['behavior'])
-            analysis['explanations'][cpu_behavior['behavior']] = cpu_behavior['explanation']
-            analysis['metrics']['cpu'] = cpu_behavior['metrics']
-        
-        mem_behavior = self._analyze_memory_growth(timeline, summary)
-        if mem_behavior:
-            # Always capture metrics
-            analysis['metrics']['memory'] = mem_behavior['metrics']
-            
-            # Conditionally capture behavior if detected
-            if mem_behavior.get('behavior'):
-                analysis['detected_behaviors'].append(mem_behavior['behavior'])
-                analysis['explanations'][mem_behavior['behavior']] = mem_behavior['explanation']
-        
-        io_behavior = self._analyze_io_activity(summary)
-        if io_behavior:
-            analysis['detected_behaviors'].append(io_behavior['behavior'])
-            analysis['explanations'][io_behavior['behavior']] = io_behavior['explanation']
-            analysis['metrics']['io'] = io_behavior['metrics']
-        
-        policy_behavior = self._analyze_policy_enforcement(summary)
-        if policy_behavior:
-            analysis['detected_behaviors'].append(policy_behavior['behavior'])
-            analysis['explanations'][policy_behavior['behavior']] = policy_behavior['explanation']
-            analysis['metrics']['policy'] = policy_behavior['metrics']
+        f = self.features.get(log_data)
+        analysis.behaviors = self._detect(f, 'VIOLATION' in summary.get('exit_reason', ''))
+        
+        # Metrics of each detected behavior
+        if analysis.behaviors & BEHAVIOR_BITS['SUSTAINED_HIGH_CPU']:
+            analysis.cpu = CpuMetrics(
+                peak_cpu=f.peak_cpu,
+                sustained_samples=f.high_cpu_samples,
+                total_samples=f.cpu_samples,
+                sustained_ms=f.high_cpu_ms,
+                total_ms=f.total_ms,
+                sustained_percentage=(f.high_cpu_ms / f.total_ms) * 100 if f.total_ms > 0 else 0
+            )
+        
+        # Memory metrics are always captured (dashboard display); the
+        # monotonic ratio only once growth and sample count qualify
+        analysis.memory = MemoryMetrics(
+            peak_memory_kb=f.peak_memory_kb,
+            starting_memory_kb=f.starting_memory_kb,
+            ending_memory_kb=f.ending_memory_kb,
+            memory_growth_kb=f.memory_growth_kb,
+            memory_samples=f.memory_samples,
+            page_faults_major=f.page_faults_major,
+            monotonic_growth_ratio=f.monotonic_growth_ratio if self._leak_candidate(f) else None
+        )
+        
+        if analysis.behaviors & BEHAVIOR_BITS['HIGH_IO_SYSCALL_RATE']:
+            analysis.io = IoMetrics(
+                read_syscalls=f.read_syscalls,
+                write_syscalls=f.write_syscalls,
+                total_io_syscalls=f.io_syscalls,
+                runtime_ms=summary.get('runtime_ms', 1),
+                syscalls_per_100ms=f.syscalls_per_100ms,
+                baseline_syscalls_per_100ms=self.IO_ACTIVITY_BASELINE
+            )
+        
+        if analysis.behaviors & BEHAVIOR_BITS['POLICY_VIOLATION']:
+            analysis.policy = PolicyMetrics(
+                exit_reason=_intern(summary.get('exit_reason', '')),
+                blocked_syscalls=f.blocked_syscalls,
+                blocked_syscall_name=_intern(summary.get('blocked_syscall', '')),
+                termination_signal=_intern(summary.get('termination', '')),
+                profile=_intern(summary.get('profile', 'UNKNOWN'))
+            )
         
         # Determine risk level
-        analysis['risk_level'] = self._compute_risk_level(analysis)
+        detected_behaviors = analysis.detected_behaviors
+        analysis.risk_level = self._compute_risk_level(detected_behaviors)
         
         # Compute risk score (Phase 5)
-        risk_score_result = self.risk_scorer.compute_risk_score(analysis)
-        analysis['risk_score'] = risk_score_result['score']
-        analysis['risk_classification'] = risk_score_result['risk_level']
-        analysis['risk_contributions'] = risk_score_result['contributions']
-        analysis['risk_explanation'] = risk_score_result['explanation']
+        analysis.risk = self.risk_scorer.score(analysis.pid, detected_behaviors, analysis.profile)
         
-        self.analysis_cache[pid] = analysis
         return analysis
     
-    def _analyze_cpu_usage(self, timeline: Dict, summary: Dict) -> Dict or None:
-        """Detect sustained high CPU usage pattern"""
-        cpu_samples = timeline.get('cpu_percent', [])
-        peak_cpu = summary.get('peak_cpu', 0)
-        
-        if not cpu_samples:
-            return None
-        
-        # Check for sustained high CPU
-        high_cpu_samples = [c for c in cpu_samples if c >= self.SUSTAINED_HIGH_CPU_THRESHOLD]
-        
-        if len(high_cpu_samples) >= self.HIGH_CPU_SAMPLES_REQUIRED:
-            sustained_percentage = (len(high_cpu_samples) / len(cpu_samples)) * 100
-            
-            return {
-                'behavior': 'SUSTAINED_HIGH_CPU',
-                'explanation': (
-                    f"Process maintained CPU usage ≥{self.SUSTAINED_HIGH_CPU_THRESHOLD}% "
-                    f"for {len(high_cpu_samples)} of {len(cpu_samples)} samples ({sustained_percentage:.0f}%). "
-                    f"Peak: {peak_cpu}%. This indicates compute-intensive activity (e.g., CPU stress test). "
-                    f"Source: /proc/[pid]/stat (delta-based calculation across 100ms samples)."
-                ),
-                'metrics': {
-                    'peak_cpu': peak_cpu,
-                    'sustained_samples': len(high_cpu_samples),
-                    'total_samples': len(cpu_samples),
-                    'sustained_percentage': sustained_percentage
-                }
-            }
-        
-        return None
-    
-    def _analyze_memory_growth(self, timeline: Dict, summary: Dict) -> Dict or None:
-        """Detect monotonic memory growth (memory leak indicator)"""
-        mem_samples = timeline.get('memory_kb', [])
-        peak_memory = summary.get('peak_memory_kb', 0)
-        page_faults_major = summary.get('page_faults_major', 0)
-        
-        # Calculate growth metrics (Rule 1 & 2)
-        samples = len(mem_samples)
-        growth_kb = 0
-        if samples >= 2:
-            growth_kb = mem_samples[-1] - mem_samples[0]
-            
-        # Metrics dict to be returned regardless of detection
-        metrics = {
-            'peak_memory_kb': peak_memory,
-            'starting_memory_kb': mem_samples[0] if samples > 0 else 0,
-            'ending_memory_kb': mem_samples[-1] if samples > 0 else 0,
-            'memory_growth_kb': growth_kb,
-            'memory_samples': samples,
-            'page_faults_major': page_faults_major
-        }
-        
-        # IMPROVED Heuristic Classification Rule
-        # A TRUE memory leak shows MONOTONIC (continuously increasing) growth
-        # NOT just a single large allocation!
-        #
-        # Detection criteria:
-        # 1. Growth > 5000 KB (significant memory increase)
-        # 2. Samples >= 5 (enough data points)
-        # 3. MONOTONIC PATTERN: At least 80% of samples show memory increase over previous
-        #
-        # This filters out:
-        # - Normal allocations (allocate → use → free) which plateau or drop
-        # - One-time large allocations (buffer allocation) which stay constant
-        
-        if growth_kb > 5000 and samples >= 5:
-            # Check if memory is monotonically increasing (leak pattern)
-            increasing_count = 0
-            for i in range(1, len(mem_samples)):
-                if mem_samples[i] > mem_samples[i-1]:
-                    increasing_count += 1
-            
-            growth_rate = increasing_count / (len(mem_samples) - 1) if len(mem_samples) > 1 else 0
-            
-            # Require 80% of samples to show growth (true leak pattern)
-            if growth_rate >= 0.8:
-                return {
-                    'behavior': 'MONOTONIC_MEMORY_GROWTH',
-                    'explanation': (
-                        f"Memory leak detected: {growth_kb} KB growth over {samples} samples. "
-                        f"Monotonic growth rate: {growth_rate*100:.1f}% (threshold: 80%). "
-                        f"Pattern shows continuous allocation without freeing. "
-                        f"Source: /proc/[pid]/status (VmPeak)."
-                    ),
-                    'metrics': metrics
-                }
-            else:
-                # Large growth but NOT monotonic = normal allocation pattern
-                # Example: allocate 10MB → use it → free it (plateau, not continuous growth)
-                return {
-                    'behavior': None,  # Don't flag as leak!
-                    'metrics': metrics
-                }
-            
-        # Return metrics even if no behavior detected (for dashboard display)
-        return {
-            'behavior': None, 
-            'metrics': metrics
+    def explain(self, analysis: ExecutionAnalysis) -> Dict[str, Any]:
+        """API dict of an analysis with behavior and risk explanations rendered"""
+        explained = analysis.to_dict()
+        explained['explanations'] = {
+            behavior: EXPLANATION_TEMPLATES[behavior].format(
+                **explained['metrics'][EXPLANATION_METRICS[behavior]],
+                **self._explanation_params(behavior, explained['metrics'][EXPLANATION_METRICS[behavior]]))
+            for behavior in explained['detected_behaviors']
         }
+        explained['risk_explanation'] = self.risk_scorer.explain(explained)
+        return explained
     
-    def _analyze_io_activity(self, summary: Dict) -> Dict or None:
-        """Detect abnormally high I/O syscall rate"""
-        read_syscalls = summary.get('read_syscalls', 0)
-        write_syscalls = summary.get('write_syscalls', 0)
-        runtime_ms = summary.get('runtime_ms', 1)
-        
-        total_io_syscalls = read_syscalls + write_syscalls
-        
-        # Normalize to syscalls per 100ms
-        syscalls_per_100ms = (total_io_syscalls / runtime_ms) * 100 if runtime_ms > 0 else 0
-        
-        # High I/O activity detection
-        if syscalls_per_100ms > self.HIGH_SYSCALL_RATE_THRESHOLD:
-            return {
-                'behavior': 'HIGH_IO_SYSCALL_RATE',
-                'explanation': (
-                    f"Detected {total_io_syscalls} I/O syscalls ({read_syscalls} reads + {write_syscalls} writes) "
-                    f"in {runtime_ms}ms ({syscalls_per_100ms:.1f} syscalls/100ms). "
-                    f"This exceeds normal baseline (~{self.IO_ACTIVITY_BASELINE} syscalls/100ms) by {syscalls_per_100ms/self.IO_ACTIVITY_BASELINE:.1f}x. "
-                    f"Indicates intensive I/O operation or syscall flooding. "
-                    f"Source: /proc/[pid]/io (syscr/syscw fields)."
-                ),
-                'metrics': {
-                    'read_syscalls': read_syscalls,
-                    'write_syscalls': write_syscalls,
-                    'total_io_syscalls': total_io_syscalls,
-                    'runtime_ms': runtime_ms,
-                    'syscalls_per_100ms': syscalls_per_100ms,
-                    'baseline_syscalls_per_100ms': self.IO_ACTIVITY_BASELINE
-                }
-            }
-        
-        return None
+    def _explanation_params(self, behavior: str, metrics: Dict) -> Dict[str, Any]:
+        """Template values derived from a behavior's metrics"""
+        if behavior == 'SUSTAINED_HIGH_CPU':
+            return {'threshold': self.SUSTAINED_HIGH_CPU_THRESHOLD}
+        if behavior == 'MONOTONIC_MEMORY_GROWTH':
+            return {'monotonic_growth_pct': metrics['monotonic_growth_ratio'] * 100}
+        if behavior == 'HIGH_IO_SYSCALL_RATE':
+            return {'baseline_factor': metrics['syscalls_per_100ms'] / self.IO_ACTIVITY_BASELINE}
+        if behavior == 'POLICY_VIOLATION':
+            name = metrics['blocked_syscall_name']
+            return {'blocked_detail': f" (blocked: {name})" if name else ""}
+        return {}
     
-    def _analyze_policy_enforcement(self, summary: Dict) -> Dict or None:
-        """Detect policy enforcement and violations"""
-        exit_reason = summary.get('exit_reason', '')
-        blocked_syscalls = summary.get('blocked_syscalls', 0)
-        blocked_syscall = summary.get('blocked_syscall', '')
-        termination = summary.get('termination', '')
-        profile = summary.get('profile', 'UNKNOWN')
-        
-        # Policy violation detection
-        if 'VIOLATION' in exit_reason or blocked_syscalls > 0:
-            blocked_detail = f" (blocked: {blocked_syscall})" if blocked_syscall else ""
-            
-            return {
-                'behavior': 'POLICY_VIOLATION',
-                'explanation': (
-                    f"Process terminated due to policy enforcement. "
-                    f"Exit reason: {exit_reason}{blocked_detail}. "
-                    f"Total blocked syscalls: {blocked_syscalls}. "
-                    f"Profile: {profile}. "
-                    f"Signal: {termination} (SIG31 = SIGSYS from seccomp-BPF). "
-                    f"Indicates sandbox rules prevented unauthorized system call. "
-                    f"Source: Signal delivery from seccomp-BPF policy."
-                ),
-                'metrics': {
-                    'exit_reason': exit_reason,
-                    'blocked_syscalls': blocked_syscalls,
-                    'blocked_syscall_name': blocked_syscall,
-                    'termination_signal': termination,
-                    'profile': profile
-                }
-            }
+    def analyze_batch(self, logs: List[Dict]) -> np.ndarray:
+        """
+        Run every detector over many logs at once.
         
-        return None
+        Same rules and thresholds as analyze_execution(), applied to the
+        feature rows of all logs at once (uncached runs are reduced in one
+        vectorized compute_features() pass). No explanations or risk scores
+        are built; use analyze_execution() for a single run's detail.
+        
+        Returns: structured array of BATCH_DTYPE, one row per log, in order
+        """
+        n = len(logs)
+        result = np.zeros(n, dtype=BATCH_DTYPE)
+        if n == 0:
+            return result
+        
+        features = self.features.features(logs)
+        exit_violation = np.fromiter(('VIOLATION' in log.get('summary', {}).get('exit_reason', '') for log in logs),
+                                     dtype=bool, count=n)
+        result['pid'] = features['pid']
+        result['profile'] = [log.get('profile', 'UNKNOWN') for log in logs]
+        result['peak_cpu'] = features['peak_cpu']
+        result['cpu_samples'] = features['cpu_samples']
+        result['high_cpu_samples'] = features['high_cpu_samples']
+        result['high_cpu_ms'] = features['high_cpu_ms']
+        result['total_ms'] = features['total_ms']
+        result['peak_memory_kb'] = features['peak_memory_kb']
+        result['memory_samples'] = features['memory_samples']
+        result['memory_growth_kb'] = features['memory_growth_kb']
+        result['monotonic_ratio'] = features['monotonic_growth_ratio']
+        result['io_syscalls'] = features['io_syscalls']
+        result['syscalls_per_100ms'] = features['syscalls_per_100ms']
+        result['blocked_syscalls'] = features['blocked_syscalls']
+        
+        detected = self._detect(features.view(np.recarray), exit_violation).astype(np.uint8)
+        result['behaviors'] = detected
+        # Same ladder as _compute_risk_level
+        violation = (detected & BEHAVIOR_BITS['POLICY_VIOLATION']) > 0
+        result['risk_level'] = np.where(violation, 2, np.where(detected > 0, 1, 0))
+        return result
+    
+    def _leak_candidate(self, f):
+        """Growth and sample count large enough to judge the monotonic ratio (RunFeatures or recarray)"""
+        return ((f.memory_growth_kb > self.MEMORY_LEAK_MIN_GROWTH_KB)
+                & (f.memory_samples >= self.MEMORY_LEAK_MIN_SAMPLES))
+    
+    def _detect(self, f, exit_violation):
+        """
+        Behavior bitmask (BEHAVIOR_BITS) from feature rows: a RunFeatures
+        (one run, int result) or a FEATURE_DTYPE recarray (array result).
+        exit_violation: the exit reason contains VIOLATION.
+        
+        - SUSTAINED_HIGH_CPU: samples >= SUSTAINED_HIGH_CPU_THRESHOLD covering
+          at least HIGH_CPU_SAMPLES_REQUIRED legacy intervals of wall time, so
+          adaptive sampling (many short samples) does not inflate the count
+        - MONOTONIC_MEMORY_GROWTH: a TRUE leak grows continuously, not in
+          one large allocation: growth > 5000 KB over >= 5 samples, and at
+          least 80% of the steps of the 100ms memory trend rising. Allocate,
+          use, free patterns plateau or drop and are not flagged.
+        - HIGH_IO_SYSCALL_RATE: read + write syscalls per 100ms of runtime
+        - POLICY_VIOLATION: a VIOLATION exit or any blocked syscall
+        """
+        sustained_cpu = ((f.cpu_samples > 0)
+                         & (f.high_cpu_ms >= self.HIGH_CPU_SAMPLES_REQUIRED * self.LEGACY_SAMPLE_INTERVAL_MS))
+        memory_leak = self._leak_candidate(f) & (f.monotonic_growth_ratio >= self.MONOTONIC_GROWTH_THRESHOLD)
+        high_io = f.syscalls_per_100ms > self.HIGH_SYSCALL_RATE_THRESHOLD
+        violation = exit_violation | (f.blocked_syscalls > 0)
+        
+        return (sustained_cpu * BEHAVIOR_BITS['SUSTAINED_HIGH_CPU']
+                | memory_leak * BEHAVIOR_BITS['MONOTONIC_MEMORY_GROWTH']
+                | high_io * BEHAVIOR_BITS['HIGH_IO_SYSCALL_RATE']
+                | violation * BEHAVIOR_BITS['POLICY_VIOLATION'])
     
-    def _compute_risk_level(self, analysis: Dict) -> str:
+    def _compute_risk_level(self, detected_behaviors: List[str]) -> str:
         """Compute overall risk level based on detected behaviors"""
-        behaviors = set(analysis['detected_behaviors'])
+        behaviors = set(detected_behaviors)
         
         if 'POLICY_VIOLATION' in behaviors:
             return 'HIGH'
@@ -293,10 +385,11 @@ class BehavioralAnalyzer:
 class AnalyticsService:
     """High-level analytics service for dashboard consumption"""
     
-    def __init__(self, log_dir: str = "../logs"):
+    def __init__(self, log_dir: str = "../logs", feature_store: FeatureStore = None):
         self.log_dir = log_dir
-        self.analyzer = BehavioralAnalyzer()
-        self.log_cache = {}
+        self.analyzer = BehavioralAnalyzer(feature_store)
+        self.log_cache = {}   # FeatureStore.run_key -> log
+        self.pid_runs = {}    # pid -> run_key of the newest log with that pid
     
     def load_all_logs(self) -> List[Dict]:
         """Load all telemetry logs from disk"""
@@ -309,34 +402,55 @@ class AnalyticsService:
                     log = json.load(fh)
                     log['_file'] = f
                     logs.append(log)
-                    self.log_cache[log.get('pid', 0)] = log
+                    self._cache_log(log)
             except Exception as e:
                 print(f"[Analytics] Error reading {f}: {e}")
         
+        # Reduce new runs' timelines in one batch, before per-run analysis asks one at a time
+        self.analyzer.features.features(logs)
         return logs
     
-    def get_execution_analysis(self, pid: int) -> Dict:
-        """Get behavioral analysis for a single execution"""
-        if pid in self.log_cache:
-            log = self.log_cache[pid]
-        else:
-            # Try to load it
+    def _cache_log(self, log: Dict):
+        key = FeatureStore.run_key(log)
+        self.log_cache[key] = log
+        pid = log.get('pid', 0)
+        newest = self.pid_runs.get(pid)
+        if newest is None or _log_started(log) >= _log_started(self.log_cache[newest]):
+            self.pid_runs[pid] = key
+    
+    def get_log(self, pid: int) -> Optional[Dict]:
+        """Newest log with this pid (logs on disk are reloaded once if unknown); None if none"""
+        key = self.pid_runs.get(pid)
+        if key is None:
+            self.load_all_logs()
+            key = self.pid_runs.get(pid)
+        return self.log_cache.get(key) if key is not None else None
+    
+    def analyze_batch(self, logs: List[Dict] = None) -> np.ndarray:
+        """Vectorized detections for many logs (all logs on disk by default)"""
+        if logs is None:
             logs = self.load_all_logs()
-            log = self.log_cache.get(pid)
-        
+        return self.analyzer.analyze_batch(logs)
+    
+    def get_execution_analysis(self, pid: int, explain: bool = True) -> Union[Dict, ExecutionAnalysis]:
+        """
+        Get behavioral analysis for a single execution: the explanation dict,
+        or with explain=False the cached ExecutionAnalysis (error dict if unknown)
+        """
+        log = self.get_log(pid)
         if not log:
             return {'error': f'Execution {pid} not found'}
         
-        return self.analyzer.analyze_execution(log)
+        return self.analyzer.analyze_execution(log, explain=explain)
     
     def compare_executions(self, pids: List[int]) -> Dict:
         """Compare multiple executions side-by-side"""
         analyses = []
         
         for pid in pids:
-            analysis = self.get_execution_analysis(pid)
-            if 'error' not in analysis:
-                analyses.append(analysis)
+            analysis = self.get_execution_analysis(pid, explain=False)
+            if isinstance(analysis, ExecutionAnalysis):
+                analyses.append(analysis.to_dict())
         
         if not analyses:
             return {'error': 'No valid executions to compare'}
@@ -378,11 +492,7 @@ class AnalyticsService:
         timelines = []
         
         for pid in pids:
-            log = self.log_cache.get(pid)
-            if not log:
-                logs = self.load_all_logs()
-                log = self.log_cache.get(pid)
-            
+            log = self.get_log(pid)
             if log:
                 timeline = log.get('timeline', {})
                 if metric in timeline:
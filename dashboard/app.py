@@ -1,24 +1,30 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response, stream_with_context
 import pandas as pd
+import numpy as np
 import traceback
-from ml_model import RiskClassifier
-from analytics import load_all_logs, extract_features, compute_statistics, get_syscall_frequency
+import json
+from ml_model import RiskClassifier, FEATURE_COLS
+from analytics import load_all_logs, extract_features, compute_statistics, get_syscall_frequency, FeatureStore, log_file_name
 from analytics_engine import AnalyticsService
-from risk_scoring import RiskScoringService
+from risk_scoring import RiskScorer, RiskScoringService
+from live_telemetry import LiveTelemetryHub
 
 app = Flask(__name__)
 
 # Global state (cached)
-classifier = RiskClassifier()
+classifier = RiskClassifier(incremental=True)  # Retrain cost independent of archive size
 cached_features = None
 last_log_count = 0
 import os
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 LOGS_DIR = os.path.abspath(os.path.join(BASE_DIR, "..", "logs"))
+OVERHEAD_DIR = os.path.join(LOGS_DIR, "overhead")  # benchmarks/overhead_engine.py results
 
-analytics_service = AnalyticsService(LOGS_DIR)
+feature_store = FeatureStore()  # Per-run features, shared by the ML model and the behavioral analyzer
+analytics_service = AnalyticsService(LOGS_DIR, feature_store=feature_store)
 risk_scoring_service = RiskScoringService()  # Phase 5: Risk scoring
+live_hub = LiveTelemetryHub()  # Live samples streamed by running launchers
 
 def get_feature_dataframe():
     """
@@ -34,7 +40,7 @@ def get_feature_dataframe():
         # Cache invalidation
         if len(logs) != last_log_count:
             print(f"[Analytics] Extracting features from {len(logs)} logs...")
-            cached_features = extract_features(logs)
+            cached_features = extract_features(logs, store=feature_store)
             last_log_count = len(logs)
             
             # Train ML once when data changes
@@ -72,27 +78,30 @@ def stats():
                 "runs": []
             })
         
-        # Create a mapping of PID to original log (for timeline data)
-        log_map = {log.get('pid'): log for log in original_logs}
+        # Feature row -> original log (for timeline data); pids are recycled,
+        # so rows are matched on the log file they came from
+        log_map = {log_file_name(log): log for log in original_logs}
         
         enriched_runs = []
-        for idx, row in df.head(50).iterrows():
+        top = df.head(50)
+        ml_results = classifier.predict_batch(top)  # One batched inference for all rows
+        for (idx, row), ml_result in zip(top.iterrows(), ml_results):
             try:
                 # Enrich with ML predictions AND Heuristic Risk
-                ml_result = classifier.predict(row.to_dict())
                 run_data = row.to_dict()
                 run_data.update(ml_result) # Adds 'prediction' and 'confidence'
                 
                 # HEURISTIC ANALYZER (Deterministically overrides ML for enforcement)
                 # We need the full log to analyze properly
                 pid = row.get('pid', 0)
-                if pid in log_map:
-                    log = log_map[pid]
-                    analysis = analytics_service.analyzer.analyze_execution(log)
+                log_file = row.get('log_file')
+                if log_file in log_map:
+                    log = log_map[log_file]
+                    analysis = analytics_service.analyzer.analyze_execution(log, explain=False)
                     
                     # Logic 1: Heuristic Risk is the final authority
-                    run_data['heuristic_risk'] = analysis.get('risk_level', 'UNKNOWN')
-                    run_data['detected_behaviors'] = analysis.get('detected_behaviors', [])
+                    run_data['heuristic_risk'] = analysis.risk_level
+                    run_data['detected_behaviors'] = analysis.detected_behaviors
                     
                     # Logic 2: Short-lived execution check (< 2 samples)
                     # We need to know if timeline exists and has samples
@@ -100,12 +109,11 @@ def stats():
                     time_samples = timeline.get('time_ms', [])
                     sample_count = len(time_samples)
                     
-                    mem_metrics = analysis.get('metrics', {}).get('memory', {})
-                    mem_growth = mem_metrics.get('memory_growth_kb', 0)
+                    mem_growth = analysis.memory.memory_growth_kb if analysis.memory else 0
                     
                     peak_memory = log.get('summary', {}).get('peak_memory_kb', 0)
                     
-                    behaviors = analysis.get('detected_behaviors', [])
+                    behaviors = run_data['detected_behaviors']
 
                     if sample_count < 2:
                         exit_reason = log.get('summary', {}).get('exit_reason', 'UNKNOWN')
@@ -120,7 +128,7 @@ def stats():
                             mem_growth = 0
                         else:
                             # Dangerous short-lived
-                            risk_val = analysis.get('risk_level', 'UNKNOWN')
+                            risk_val = analysis.risk_level
                             if risk_val == 'UNKNOWN':
                                 risk_val = 'HIGH' if "VIOLATION" in exit_reason else 'MEDIUM'
                             
@@ -129,7 +137,7 @@ def stats():
                             mem_growth = 0 
                     else:
                         # Normal Execution (> 2 samples)
-                        risk_val = analysis.get('risk_level', 'UNKNOWN')
+                        risk_val = analysis.risk_level
                         
                         # Explicitly map behaviors to dashboard risks with HIGH confidence
                         if 'MONOTONIC_MEMORY_GROWTH' in behaviors:
@@ -203,8 +211,8 @@ def stats():
                     run_data['memory_samples'] = 0
                         
                 # Add timeline data
-                if pid in log_map:
-                    run_data['timeline'] = log_map[pid].get('timeline', {})
+                if log_file in log_map:
+                    run_data['timeline'] = log_map[log_file].get('timeline', {})
                 else:
                     run_data['timeline'] = {'time_ms': [], 'cpu_percent': [], 'memory_kb': []}
                 
@@ -270,9 +278,9 @@ def ml_predictions():
             return jsonify({"predictions": [], "model_info": {"trained": False}})
         
         predictions = []
-        for idx, row in df.head(20).iterrows():
+        top = df.head(20)
+        for (idx, row), pred in zip(top.iterrows(), classifier.predict_batch(top)):
             try:
-                pred = classifier.predict(row.to_dict())
                 pred['program'] = row.get('program', 'unknown')
                 pred['profile'] = row.get('profile', 'unknown')
                 predictions.append(pred)
@@ -283,8 +291,12 @@ def ml_predictions():
             "predictions": predictions,
             "model_info": {
                 "type": "RandomForest",
-                "features": ["runtime_ms", "peak_cpu", "peak_memory_kb", "page_faults_minor", "page_faults_major"],
-                "trained": classifier.is_trained
+                "features": FEATURE_COLS,
+                "trained": classifier.is_trained,
+                "mode": "incremental" if classifier.incremental else "full",
+                "estimators": len(getattr(classifier.model, 'estimators_', [])),
+                "config": classifier.config,
+                "prediction_cache": classifier.prediction_cache_stats()
             }
         })
     
@@ -316,8 +328,7 @@ def get_all_executions():
         executions = []
         for log in logs:
             pid = log.get('pid', 0)
-            analysis = analytics_service.get_execution_analysis(pid)
-            risk_score = risk_scoring_service.score_execution(analysis)
+            analysis = analytics_service.analyzer.analyze_execution(log, explain=False)
             
             # MANDATORY: Derive sample count directly from timeline
             timeline = log.get('timeline', {})
@@ -326,11 +337,10 @@ def get_all_executions():
             sample_count = len(time_samples)
             
             # Safe extraction of memory metrics (relies on analytics_engine to calculate growth)
-            mem_metrics = analysis.get('metrics', {}).get('memory', {})
-            mem_growth = mem_metrics.get('memory_growth_kb', 0)
+            mem_growth = analysis.memory.memory_growth_kb if analysis.memory else 0
             
             # Logic 3: Enforcement Overrides based on sample count
-            final_risk = analysis.get('risk_level', 'UNKNOWN')
+            final_risk = analysis.risk_level
             
             if sample_count < 2:
                 final_risk = "SHORT_LIVED_UTILITY"
@@ -349,8 +359,8 @@ def get_all_executions():
                 'blocked_syscalls': log.get('summary', {}).get('blocked_syscalls', 0),
                 'exit_reason': log.get('summary', {}).get('exit_reason', 'UNKNOWN'),
                 'risk_level': final_risk,
-                'risk_score': risk_score['score'],
-                'risk_classification': risk_score['risk_level']
+                'risk_score': analysis.risk_score,
+                'risk_classification': analysis.risk_classification
             })
         
         return jsonify({'executions': executions})
@@ -439,25 +449,33 @@ def get_risk_score(pid):
         traceback.print_exc()
         return jsonify({'error': str(e), 'pid': pid}), 200
 
+@app.route('/api/risk-methodology')
+def get_risk_methodology():
+    """Scoring methodology (static, shared by every risk score)"""
+    return jsonify({
+        'methodology': RiskScorer.methodology(),
+        'weights': RiskScorer.BEHAVIOR_WEIGHTS,
+        'multipliers': RiskScorer.MULTIPLIERS,
+        'thresholds': RiskScorer.THRESHOLDS
+    })
+
 @app.route('/api/risk-scores')
 def get_all_risk_scores():
-    """Get risk scores for all executions with explanations"""
+    """Get risk scores for all executions (explanations: /api/risk-score/<pid>)"""
     try:
         logs = analytics_service.load_all_logs()
         
         risk_scores = []
         for log in logs:
             pid = log.get('pid', 0)
-            analysis = analytics_service.get_execution_analysis(pid)
-            risk_result = risk_scoring_service.score_execution(analysis)
+            analysis = analytics_service.analyzer.analyze_execution(log, explain=False)
             
             risk_scores.append({
                 'pid': pid,
                 'program': log.get('program', 'unknown'),
                 'profile': log.get('profile', 'UNKNOWN'),
-                'score': risk_result['score'],
-                'risk_level': risk_result['risk_level'],
-                'explanation': risk_result['explanation']
+                'score': analysis.risk_score,
+                'risk_level': analysis.risk_classification
             })
         
         # Sort by risk score (descending)
@@ -474,10 +492,9 @@ def get_all_risk_scores():
 def get_risk_distribution():
     """Get distribution of risk across all executions"""
     try:
-        logs = analytics_service.load_all_logs()
-        analyses = [analytics_service.get_execution_analysis(log.get('pid', 0)) for log in logs]
-        
-        distribution = risk_scoring_service.get_risk_distribution(analyses)
+        # Scores only: vectorized detections + bitmask scoring, no explanations
+        batch = analytics_service.analyze_batch()
+        distribution = risk_scoring_service.get_risk_distribution(batch)
         return jsonify(distribution)
     
     except Exception as e:
@@ -489,19 +506,10 @@ def get_risk_distribution():
 def get_risk_by_profile():
     """Compare risk scores across sandbox profiles"""
     try:
-        logs = analytics_service.load_all_logs()
+        batch = analytics_service.analyze_batch()
         
-        # Group analyses by profile
-        profiles = {}
-        for log in logs:
-            profile = log.get('profile', 'UNKNOWN')
-            pid = log.get('pid', 0)
-            
-            if profile not in profiles:
-                profiles[profile] = []
-            
-            analysis = analytics_service.get_execution_analysis(pid)
-            profiles[profile].append(analysis)
+        # Group runs by profile
+        profiles = {str(profile): batch[batch['profile'] == profile] for profile in np.unique(batch['profile'])}
         
         # Compute comparison
         comparison = risk_scoring_service.compare_profile_risk(profiles)
@@ -511,6 +519,57 @@ def get_risk_by_profile():
         print(f"[ERROR] Failed to get profile comparison: {e}")
         traceback.print_exc()
         return jsonify({'error': str(e)}), 200
+# ============================================================================
+# LIVE TELEMETRY (streamed by the launcher while the sandbox runs)
+# ============================================================================
+
+@app.route('/api/live')
+def get_live_runs():
+    """Running (and recently finished) executions with their latest sample"""
+    return jsonify({'runs': live_hub.list_runs()})
+
+@app.route('/api/live/<int:pid>')
+def get_live_run(pid):
+    """
+    Live samples of one execution.
+    Server-Sent Events when requested with Accept: text/event-stream,
+    otherwise a JSON snapshot of the buffered timeline.
+    """
+    if request.accept_mimetypes.best == 'text/event-stream':
+        return Response(stream_with_context(live_hub.stream(pid)),
+                        mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    run = live_hub.get_run(pid)
+    if run is None:
+        return jsonify({'error': f'No live telemetry for PID {pid}', 'pid': pid}), 200
+    return jsonify(run)
+
+def load_overhead_result(scenario_name):
+    """
+    Stored result of benchmarks/overhead_engine.py for a scenario.
+    Returns: (display message, metric description, result dict or None)
+    """
+    path = os.path.join(OVERHEAD_DIR, f"{os.path.basename(scenario_name)}.json")
+    if not os.path.exists(path):
+        return (f"Not measured (run benchmarks/overhead_engine.py --scenario {scenario_name})",
+                "Paired runs of the same binary", None)
+
+    with open(path) as f:
+        stored = json.load(f)
+    result = stored.get('result', {})
+    metric = (f"Wall time, {stored.get('profile')} vs {stored.get('baseline')} "
+              f"on {stored.get('program')} ({stored.get('created', '')[:10]})")
+
+    if result.get('status') != 'ok':
+        return f"Not comparable: {result.get('reason', 'no valid pairs')}", metric, result
+
+    message = (f"{result['overhead_pct']:+.1f}% (95% CI {result['ci_low_pct']:+.1f}% to "
+               f"{result['ci_high_pct']:+.1f}%, {result['used']} paired runs)")
+    if not result.get('significant'):
+        message += " - within noise"
+    return message, metric, result
+
 @app.route('/api/analytics/scenario/<scenario_name>')
 def get_scenario_analytics(scenario_name):
     """
@@ -578,45 +637,14 @@ def get_scenario_analytics(scenario_name):
         # Risk Distribution in selected set
         risk_counts = {}
         for l in matching_logs:
-            pid = l.get('pid')
-            analysis = analytics_service.get_execution_analysis(pid)
-            risk = analysis.get('risk_level', 'UNKNOWN')
+            analysis = analytics_service.analyzer.analyze_execution(l, explain=False)
+            risk = analysis.risk_level
             risk_counts[risk] = risk_counts.get(risk, 0) + 1
             
         dominant_risk = max(risk_counts, key=risk_counts.get) if risk_counts else "UNKNOWN"
 
-        # 3. Calculate Overhead (Section C)
-        # Compare STRICT vs LEARNING profiles - try specific scenario first, then fallback to all runs
-        strict_apps = [l for l in matching_logs if l.get('profile') == 'STRICT']
-        learning_apps = [l for l in matching_logs if l.get('profile') == 'LEARNING']
-        
-        overhead_pct = 0
-        overhead_msg = "Not computed (Requires paired runs)"
-        
-        # If no paired runs in selected scenario, try ANY programs from all logs
-        if not (strict_apps and learning_apps):
-            # Fallback: Use any STRICT vs any LEARNING from entire dataset
-            all_strict = [l for l in all_logs if l.get('profile') == 'STRICT']
-            all_learning = [l for l in all_logs if l.get('profile') == 'LEARNING']
-            
-            if all_strict and all_learning:
-                strict_apps = all_strict
-                learning_apps = all_learning
-        
-        if strict_apps and learning_apps:
-            avg_strict = sum([l.get('summary', {}).get('runtime_ms', 0) for l in strict_apps]) / len(strict_apps)
-            avg_learning = sum([l.get('summary', {}).get('runtime_ms', 0) for l in learning_apps]) / len(learning_apps)
-            
-            if avg_learning > 0:
-                overhead_pct = ((avg_strict - avg_learning) / avg_learning) * 100
-                
-                # Provide context about what was compared
-                if len(strict_apps) == len(learning_apps) and strict_apps[0].get('program') == learning_apps[0].get('program'):
-                    overhead_msg = f"{overhead_pct:.1f}% (Same Program: {len(strict_apps)} runs)"
-                else:
-                    overhead_msg = f"{overhead_pct:.1f}% (STRICT: {len(strict_apps)} runs vs LEARNING: {len(learning_apps)} runs)"
-            else:
-                overhead_msg = "Invalid Baseline (0ms)"
+        # 3. Overhead (Section C): precomputed paired runs of the same binary
+        overhead_msg, overhead_metric, overhead_detail = load_overhead_result(scenario_name)
         
         # Detection Latency (Hardcoded Logic per rules)
         latency_val = "N/A"
@@ -644,6 +672,8 @@ def get_scenario_analytics(scenario_name):
             },
             'analysis': {
                 'overhead': overhead_msg,
+                'overhead_metric': overhead_metric,
+                'overhead_detail': overhead_detail,
                 'latency': latency_val,
                 'latency_reason': latency_reason
             },
@@ -658,7 +688,12 @@ def get_scenario_analytics(scenario_name):
 if __name__ == '__main__':
     print("[Flask] Starting OS Sandbox Analytics Dashboard...")
     print("[Flask] Initializing ML model with seed data...")
+    debug = True
+    use_reloader = debug
+    # With the debug reloader, only the serving child (not the watcher) owns the live socket
+    if not use_reloader or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        live_hub.start()
     print("[Flask] Server ready at http://0.0.0.0:5000")
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=5000, debug=debug, use_reloader=use_reloader)
 
 
@@ -0,0 +1,197 @@
+"""
+Live Telemetry Hub
+Receives the launcher's live telemetry stream and keeps per-run sample
+buffers for the dashboard.
+
+The launcher sends one NDJSON datagram per event to LIVE_TELEMETRY_SOCKET
+(runner/telemetry.h):
+    {"event": "start",  "pid": ..., "program": ..., "profile": ...}
+    {"event": "sample", "pid": ..., "time_ms": ..., "interval_ms": ...,
+                        "cpu_percent": ..., "memory_kb": ...}
+    {"event": "alert",  "pid": ..., "behavior": ..., "time_ms": ...}
+    {"event": "end",    "pid": ..., "runtime_ms": ..., "exit_reason": ..., "log": ...}
+
+Runs become visible as soon as they start; finished runs are kept for
+FINISHED_RETENTION_S so late subscribers still get the full stream.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterator, List, Optional
+
+LIVE_TELEMETRY_SOCKET = "/tmp/sandbox_telemetry.sock"
+MAX_DATAGRAM = 4096
+
+
+class LiveRun:
+    """Samples and status of one streamed execution"""
+
+    def __init__(self, pid: int, max_samples: int):
+        self.pid = pid
+        self.program = 'unknown'
+        self.profile = 'UNKNOWN'
+        self.status = 'running'
+        self.started_at = time.time()
+        self.finished_at = None
+        self.summary = {}
+        self.alerts = []            # Behaviors flagged by the launcher's online detectors
+        self.samples = deque(maxlen=max_samples)
+        self.sample_seq = 0         # Total samples received (index of the next one)
+
+    def to_dict(self) -> Dict:
+        latest = self.samples[-1] if self.samples else {}
+        return {
+            'pid': self.pid,
+            'program': self.program,
+            'profile': self.profile,
+            'status': self.status,
+            'samples': self.sample_seq,
+            'latest': latest,
+            'alerts': list(self.alerts),
+            'summary': self.summary,
+        }
+
+
+class LiveTelemetryHub:
+    """
+    Datagram listener + in-memory store of running executions.
+    Thread-safe: the listener thread writes, request threads read and wait.
+    """
+
+    FINISHED_RETENTION_S = 300
+    MAX_SAMPLES_PER_RUN = 5000
+
+    def __init__(self, socket_path: str = LIVE_TELEMETRY_SOCKET):
+        self.socket_path = socket_path
+        self.runs: Dict[int, LiveRun] = {}
+        self.condition = threading.Condition()
+        self.sock = None
+        self.thread = None
+
+    def start(self):
+        """Bind the socket and start the listener thread (idempotent)"""
+        if self.thread is not None:
+            return
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(self.socket_path)
+        # Owner and group only: any local user able to send could forge runs.
+        # Launchers started with sudo reach it as root regardless.
+        os.chmod(self.socket_path, 0o660)
+
+        self.thread = threading.Thread(target=self._listen, name='live-telemetry', daemon=True)
+        self.thread.start()
+        print(f"[Live] Listening for launcher telemetry on {self.socket_path}")
+
+    def _listen(self):
+        while True:
+            try:
+                data = self.sock.recv(MAX_DATAGRAM)
+            except OSError:
+                return
+            for line in data.decode(errors='replace').splitlines():
+                try:
+                    self.handle_event(json.loads(line))
+                except (ValueError, KeyError, TypeError) as e:
+                    print(f"[Live] Dropping malformed event: {e}")
+
+    def handle_event(self, event: Dict):
+        """Apply one launcher event to the run store"""
+        pid = int(event['pid'])
+        kind = event.get('event')
+
+        with self.condition:
+            run = self.runs.get(pid)
+            if run is None or (kind == 'start' and run.status == 'finished'):
+                # PIDs are reused across runs; a new start replaces the old run
+                run = self.runs[pid] = LiveRun(pid, self.MAX_SAMPLES_PER_RUN)
+
+            if kind == 'start':
+                run.program = event.get('program', run.program)
+                run.profile = event.get('profile', run.profile)
+            elif kind == 'sample':
+                run.samples.append({
+                    'time_ms': event.get('time_ms', 0),
+                    'interval_ms': event.get('interval_ms', 0),
+                    'cpu_percent': event.get('cpu_percent', 0),
+                    'memory_kb': event.get('memory_kb', 0),
+                })
+                run.sample_seq += 1
+            elif kind == 'alert':
+                run.alerts.append({'behavior': event.get('behavior'), 'time_ms': event.get('time_ms', 0)})
+            elif kind == 'end':
+                run.status = 'finished'
+                run.finished_at = time.time()
+                run.summary = {k: v for k, v in event.items() if k not in ('event', 'pid')}
+
+            self._expire_finished()
+            self.condition.notify_all()
+
+    def _expire_finished(self):
+        cutoff = time.time() - self.FINISHED_RETENTION_S
+        for pid in [pid for pid, run in self.runs.items()
+                    if run.finished_at is not None and run.finished_at < cutoff]:
+            del self.runs[pid]
+
+    def list_runs(self) -> List[Dict]:
+        """Running executions first, then recently finished ones"""
+        with self.condition:
+            runs = [run.to_dict() for run in self.runs.values()]
+        return sorted(runs, key=lambda r: (r['status'] != 'running', -r['pid']))
+
+    def get_run(self, pid: int) -> Optional[Dict]:
+        with self.condition:
+            run = self.runs.get(pid)
+            if run is None:
+                return None
+            result = run.to_dict()
+            result['timeline'] = list(run.samples)
+            return result
+
+    def stream(self, pid: int, heartbeat_s: float = 15.0) -> Iterator[str]:
+        """
+        Server-Sent Events for one run: every buffered sample, then new
+        samples and alerts as they arrive, then an 'end' event. Yields nothing if the run is
+        unknown.
+        """
+        sent = None
+        alerts_sent = 0
+        while True:
+            with self.condition:
+                run = self.runs.get(pid)
+                if run is None:
+                    return
+                if sent is None:
+                    # Start at the oldest sample still buffered
+                    sent = run.sample_seq - len(run.samples)
+                if run.sample_seq == sent and len(run.alerts) == alerts_sent and run.status == 'running':
+                    self.condition.wait(timeout=heartbeat_s)
+                    run = self.runs.get(pid)
+                    if run is None:
+                        return
+
+                first_new = max(sent, run.sample_seq - len(run.samples))
+                buffered = list(run.samples)
+                offset = run.sample_seq - len(buffered)
+                new_samples = buffered[first_new - offset:]
+                sent = run.sample_seq
+                new_alerts = run.alerts[alerts_sent:]
+                alerts_sent = len(run.alerts)
+                finished = run.status == 'finished'
+                summary = dict(run.summary)
+
+            if not new_samples and not new_alerts and not finished:
+                yield ": keep-alive\n\n"
+            for sample in new_samples:
+                yield f"event: sample\ndata: {json.dumps(sample)}\n\n"
+            for alert in new_alerts:
+                yield f"event: alert\ndata: {json.dumps(alert)}\n\n"
+            if finished:
+                yield f"event: end\ndata: {json.dumps(summary)}\n\n"
+                return
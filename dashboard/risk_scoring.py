@@ -5,8 +5,30 @@ Deterministic, transparent risk scoring based on behavioral analysis.
 No machine learning, no randomization - purely rule-based scoring with clear explanations.
 """
 
+import numpy as np
 from typing import Dict, List, Tuple, Any
 
+# Behavior bitmask encoding shared with BehavioralAnalyzer.analyze_batch()
+BEHAVIOR_CODES = ('SUSTAINED_HIGH_CPU', 'MONOTONIC_MEMORY_GROWTH', 'HIGH_IO_SYSCALL_RATE', 'POLICY_VIOLATION')
+BEHAVIOR_BITS = {name: 1 << i for i, name in enumerate(BEHAVIOR_CODES)}
+RISK_CLASSES = ('NORMAL', 'SUSPICIOUS', 'MALICIOUS')
+
+# One row per run, returned by RiskScorer.score_bitmasks()
+SCORE_DTYPE = np.dtype([
+    ('score', 'i4'),
+    ('base_score', 'i4'),
+    ('multiplier', 'f8'),
+    ('risk_level', 'u1'),   # Index into RISK_CLASSES
+])
+
+
+def encode_behaviors(analyses: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Behavior bitmasks and STRICT flags of analysis dicts"""
+    behaviors = np.fromiter((sum(BEHAVIOR_BITS.get(b, 0) for b in set(a.get('detected_behaviors', [])))
+                             for a in analyses), dtype=np.uint8, count=len(analyses))
+    strict = np.fromiter((a.get('profile') == 'STRICT' for a in analyses), dtype=bool, count=len(analyses))
+    return behaviors, strict
+
 class RiskScorer:
     """
     Deterministic risk scoring engine.
@@ -45,6 +67,13 @@ class RiskScorer:
         'malicious': 100,       # 61-100: Malicious
     }
     
+    # Risk level wording used in explanations
+    RISK_DESCRIPTIONS = {
+        'NORMAL': 'Normal execution behavior',
+        'SUSPICIOUS': 'Suspicious behavior detected',
+        'MALICIOUS': 'High-risk behavior detected',
+    }
+    
     def __init__(self):
         self.score_cache = {}
     
@@ -56,35 +85,31 @@ class RiskScorer:
         - score: Integer 0-100
         - risk_level: "Normal", "Suspicious", "Malicious"
         - contributions: List of (behavior, weight, explanation)
-        - explanation: Plain text explanation
-        """
-        pid = analysis.get('pid', 0)
         
+        The plain text explanation is rendered separately by explain(), and
+        the methodology is static (methodology()).
+        """
+        return self.score(analysis.get('pid', 0),
+                          analysis.get('detected_behaviors', []),
+                          analysis.get('profile', 'UNKNOWN')).to_dict()
+    
+    def score(self, pid: int, detected_behaviors: List[str], profile: str) -> 'RiskScore':
+        """Compact risk result of one execution (cached per PID and inputs: pids are recycled)"""
         # Check cache
-        if pid in self.score_cache:
-            return self.score_cache[pid]
-        
-        detected_behaviors = analysis.get('detected_behaviors', [])
-        explanations = analysis.get('explanations', {})
-        metrics = analysis.get('metrics', {})
-        profile = analysis.get('profile', 'UNKNOWN')
-        
-        # Initialize score calculation
-        base_score = 0
-        contributions = []
+        key = (pid, tuple(detected_behaviors), profile)
+        cached = self.score_cache.get(key)
+        if cached is not None:
+            return cached
         
         # ====================================================================
         # STEP 1: Add base weights for each detected behavior
         # ====================================================================
+        base_score = 0
+        behaviors = 0
         for behavior in detected_behaviors:
             if behavior in self.BEHAVIOR_WEIGHTS:
-                weight = self.BEHAVIOR_WEIGHTS[behavior]
-                base_score += weight
-                contributions.append({
-                    'behavior': behavior,
-                    'weight': weight,
-                    'reason': f"{behavior} detected"
-                })
+                base_score += self.BEHAVIOR_WEIGHTS[behavior]
+                behaviors |= BEHAVIOR_BITS[behavior]
         
         # ====================================================================
         # STEP 2: Apply multipliers for severity factors
@@ -92,29 +117,15 @@ class RiskScorer:
         multiplier = 1.0
         
         # Policy violation in strict profile = very high risk
-        if 'POLICY_VIOLATION' in detected_behaviors and profile == 'STRICT':
+        policy_strict = 'POLICY_VIOLATION' in detected_behaviors and profile == 'STRICT'
+        if policy_strict:
             multiplier *= self.MULTIPLIERS['policy_violation_high_severity']
-            contributions.append({
-                'behavior': 'POLICY_VIOLATION_STRICT',
-                'weight': f"+{int((multiplier - 1.0) * 100)}%",
-                'reason': "Policy violation in STRICT profile (maximum enforcement)"
-            })
         
         # Multiple behaviors detected = compounding risk
         if len(detected_behaviors) >= 3:
             multiplier *= self.MULTIPLIERS['multi_combined_behaviors']
-            contributions.append({
-                'behavior': 'MULTIPLE_BEHAVIORS',
-                'weight': f"+{int((multiplier - 1.0) * 100)}%",
-                'reason': "3+ behaviors detected (compounding risk indicators)"
-            })
         elif len(detected_behaviors) >= 2:
             multiplier *= self.MULTIPLIERS['combined_behaviors']
-            contributions.append({
-                'behavior': 'COMBINED_BEHAVIORS',
-                'weight': f"+{int((multiplier - 1.0) * 100)}%",
-                'reason': "2+ behaviors detected (combined risk indicators)"
-            })
         
         # ====================================================================
         # STEP 3: Apply multiplier and clamp to 0-100
@@ -127,17 +138,59 @@ class RiskScorer:
         # ====================================================================
         if final_score <= self.THRESHOLDS['normal']:
             risk_level = 'NORMAL'
-            risk_description = 'Normal execution behavior'
         elif final_score <= self.THRESHOLDS['suspicious']:
             risk_level = 'SUSPICIOUS'
-            risk_description = 'Suspicious behavior detected'
         else:
             risk_level = 'MALICIOUS'
-            risk_description = 'High-risk behavior detected'
         
-        # ====================================================================
-        # STEP 5: Generate explanation
-        # ====================================================================
+        result = RiskScore(pid, final_score, base_score, multiplier, risk_level,
+                           behaviors, policy_strict, len(detected_behaviors))
+        self.score_cache[key] = result
+        return result
+    
+    @classmethod
+    def contributions(cls, risk: 'RiskScore') -> List[Dict[str, Any]]:
+        """Score breakdown of a RiskScore, rebuilt on demand"""
+        contributions = [
+            {'behavior': behavior, 'weight': cls.BEHAVIOR_WEIGHTS[behavior], 'reason': f"{behavior} detected"}
+            for behavior in BEHAVIOR_CODES if risk.behaviors & BEHAVIOR_BITS[behavior]
+        ]
+        
+        multiplier = 1.0
+        if risk.policy_strict:
+            multiplier *= cls.MULTIPLIERS['policy_violation_high_severity']
+            contributions.append({
+                'behavior': 'POLICY_VIOLATION_STRICT',
+                'weight': f"+{int((multiplier - 1.0) * 100)}%",
+                'reason': "Policy violation in STRICT profile (maximum enforcement)"
+            })
+        
+        if risk.behavior_count >= 3:
+            multiplier *= cls.MULTIPLIERS['multi_combined_behaviors']
+            contributions.append({
+                'behavior': 'MULTIPLE_BEHAVIORS',
+                'weight': f"+{int((multiplier - 1.0) * 100)}%",
+                'reason': "3+ behaviors detected (compounding risk indicators)"
+            })
+        elif risk.behavior_count >= 2:
+            multiplier *= cls.MULTIPLIERS['combined_behaviors']
+            contributions.append({
+                'behavior': 'COMBINED_BEHAVIORS',
+                'weight': f"+{int((multiplier - 1.0) * 100)}%",
+                'reason': "2+ behaviors detected (combined risk indicators)"
+            })
+        
+        return contributions
+    
+    def explain(self, analysis: Dict[str, Any]) -> str:
+        """Plain text explanation of an execution's risk score"""
+        result = self.compute_risk_score(analysis)
+        detected_behaviors = analysis.get('detected_behaviors', [])
+        metrics = analysis.get('metrics', {})
+        final_score = result['score']
+        multiplier = result['multiplier']
+        risk_description = self.RISK_DESCRIPTIONS[result['risk_level']]
+        
         if len(detected_behaviors) == 0:
             explanation = (
                 "No anomalous behaviors detected. Process executed normally "
@@ -181,44 +234,60 @@ class RiskScorer:
             if multiplier > 1.0:
                 explanation += f"(Risk amplified {multiplier:.1f}x due to compounding factors.)"
         
-        # ====================================================================
-        # BUILD RESULT
-        # ====================================================================
-        result = {
-            'pid': pid,
-            'score': final_score,
-            'risk_level': risk_level,
-            'threshold_normal': self.THRESHOLDS['normal'],
-            'threshold_suspicious': self.THRESHOLDS['suspicious'],
-            'threshold_malicious': self.THRESHOLDS['malicious'],
-            'base_score': base_score,
-            'multiplier': multiplier,
-            'contributions': contributions,
-            'explanation': explanation,
-            'scoring_methodology': self._get_methodology()
-        }
+        return explanation
+    
+    def score_bitmasks(self, behaviors: np.ndarray, strict: np.ndarray) -> np.ndarray:
+        """
+        Fast path of compute_risk_score() for many runs: same weights,
+        multipliers, clamping and thresholds, computed with NumPy from each
+        run's behavior bitmask (BEHAVIOR_BITS) and whether it ran STRICT.
+        No contributions or explanations are built.
         
-        self.score_cache[pid] = result
+        Returns: structured array of SCORE_DTYPE, one row per run
+        """
+        behaviors = np.asarray(behaviors, dtype=np.uint8)
+        bits = (behaviors[:, None] >> np.arange(len(BEHAVIOR_CODES), dtype=np.uint8)) & 1
+        weights = np.array([self.BEHAVIOR_WEIGHTS[b] for b in BEHAVIOR_CODES])
+        base_score = bits @ weights
+        count = bits.sum(axis=1)
+        
+        # Multipliers applied in the same order as compute_risk_score, so
+        # the float products (and their truncation) are identical
+        multiplier = np.ones(len(behaviors))
+        policy_strict = (bits[:, BEHAVIOR_CODES.index('POLICY_VIOLATION')] == 1) & np.asarray(strict, dtype=bool)
+        multiplier[policy_strict] *= self.MULTIPLIERS['policy_violation_high_severity']
+        multiplier[count >= 3] *= self.MULTIPLIERS['multi_combined_behaviors']
+        multiplier[count == 2] *= self.MULTIPLIERS['combined_behaviors']
+        
+        score = np.clip(np.trunc(base_score * multiplier), 0, 100).astype(np.int32)
+        
+        result = np.zeros(len(behaviors), dtype=SCORE_DTYPE)
+        result['score'] = score
+        result['base_score'] = base_score
+        result['multiplier'] = multiplier
+        # <= normal -> 0, <= suspicious -> 1, else 2
+        result['risk_level'] = np.searchsorted([self.THRESHOLDS['normal'], self.THRESHOLDS['suspicious']], score)
         return result
     
-    def _get_methodology(self) -> str:
-        """Return explanation of scoring methodology"""
+    @classmethod
+    def methodology(cls) -> str:
+        """Explanation of the scoring methodology (same for every run)"""
         return (
             "SCORING METHODOLOGY:\n"
             "1. Base Score: Each detected behavior adds fixed weight\n"
-            f"   - SUSTAINED_HIGH_CPU: +{self.BEHAVIOR_WEIGHTS['SUSTAINED_HIGH_CPU']} points\n"
-            f"   - MONOTONIC_MEMORY_GROWTH: +{self.BEHAVIOR_WEIGHTS['MONOTONIC_MEMORY_GROWTH']} points\n"
-            f"   - HIGH_IO_SYSCALL_RATE: +{self.BEHAVIOR_WEIGHTS['HIGH_IO_SYSCALL_RATE']} points\n"
-            f"   - POLICY_VIOLATION: +{self.BEHAVIOR_WEIGHTS['POLICY_VIOLATION']} points\n"
+            f"   - SUSTAINED_HIGH_CPU: +{cls.BEHAVIOR_WEIGHTS['SUSTAINED_HIGH_CPU']} points\n"
+            f"   - MONOTONIC_MEMORY_GROWTH: +{cls.BEHAVIOR_WEIGHTS['MONOTONIC_MEMORY_GROWTH']} points\n"
+            f"   - HIGH_IO_SYSCALL_RATE: +{cls.BEHAVIOR_WEIGHTS['HIGH_IO_SYSCALL_RATE']} points\n"
+            f"   - POLICY_VIOLATION: +{cls.BEHAVIOR_WEIGHTS['POLICY_VIOLATION']} points\n"
             "\n2. Multipliers (amplify risk for compounding factors)\n"
-            f"   - Policy violation in STRICT: ×{self.MULTIPLIERS['policy_violation_high_severity']}\n"
-            f"   - 2+ behaviors: ×{self.MULTIPLIERS['combined_behaviors']}\n"
-            f"   - 3+ behaviors: ×{self.MULTIPLIERS['multi_combined_behaviors']}\n"
+            f"   - Policy violation in STRICT: ×{cls.MULTIPLIERS['policy_violation_high_severity']}\n"
+            f"   - 2+ behaviors: ×{cls.MULTIPLIERS['combined_behaviors']}\n"
+            f"   - 3+ behaviors: ×{cls.MULTIPLIERS['multi_combined_behaviors']}\n"
             "\n3. Final Score: (Base Score × Multiplier) clamped to 0-100\n"
             "\n4. Classification:\n"
-            f"   - 0–{self.THRESHOLDS['normal']}: NORMAL\n"
-            f"   - {self.THRESHOLDS['normal']+1}–{self.THRESHOLDS['suspicious']}: SUSPICIOUS\n"
-            f"   - {self.THRESHOLDS['suspicious']+1}–100: MALICIOUS"
+            f"   - 0–{cls.THRESHOLDS['normal']}: NORMAL\n"
+            f"   - {cls.THRESHOLDS['normal']+1}–{cls.THRESHOLDS['suspicious']}: SUSPICIOUS\n"
+            f"   - {cls.THRESHOLDS['suspicious']+1}–100: MALICIOUS"
         )
     
     def get_risk_profile_comparison(self, profile_scores: Dict[str, List[int]]) -> Dict[str, Any]:
@@ -228,73 +297,108 @@ class RiskScorer:
         Input: {profile_name: [score1, score2, ...], ...}
         Returns aggregated statistics
         """
-        import numpy as np
-        
         comparison = {}
         for profile, scores in profile_scores.items():
-            if scores:
+            scores = np.asarray(scores)
+            if scores.size:
                 comparison[profile] = {
-                    'count': len(scores),
+                    'count': int(scores.size),
                     'avg_score': float(np.mean(scores)),
                     'max_score': int(np.max(scores)),
                     'min_score': int(np.min(scores)),
                     'median_score': float(np.median(scores)),
-                    'std_dev': float(np.std(scores)) if len(scores) > 1 else 0.0,
-                    'high_risk_count': sum(1 for s in scores if s > self.THRESHOLDS['suspicious']),
-                    'suspicious_count': sum(1 for s in scores if self.THRESHOLDS['normal'] < s <= self.THRESHOLDS['suspicious']),
-                    'normal_count': sum(1 for s in scores if s <= self.THRESHOLDS['normal']),
+                    'std_dev': float(np.std(scores)) if scores.size > 1 else 0.0,
+                    'high_risk_count': int(np.count_nonzero(scores > self.THRESHOLDS['suspicious'])),
+                    'suspicious_count': int(np.count_nonzero((scores > self.THRESHOLDS['normal']) &
+                                                             (scores <= self.THRESHOLDS['suspicious']))),
+                    'normal_count': int(np.count_nonzero(scores <= self.THRESHOLDS['normal'])),
                 }
         
         return comparison
 
 
+class RiskScore:
+    """
+    Cached risk result of one execution. Holds only the numbers; the
+    contributions list and dict form are built by to_dict() at the JSON
+    boundary.
+    """
+    __slots__ = ('pid', 'score', 'base_score', 'multiplier', 'risk_level',
+                 'behaviors', 'policy_strict', 'behavior_count')
+    
+    def __init__(self, pid, score, base_score, multiplier, risk_level, behaviors, policy_strict, behavior_count):
+        self.pid = pid
+        self.score = score
+        self.base_score = base_score
+        self.multiplier = multiplier
+        self.risk_level = risk_level            # 'NORMAL' / 'SUSPICIOUS' / 'MALICIOUS'
+        self.behaviors = behaviors              # OR of BEHAVIOR_BITS
+        self.policy_strict = policy_strict
+        self.behavior_count = behavior_count
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'pid': self.pid,
+            'score': self.score,
+            'risk_level': self.risk_level,
+            'threshold_normal': RiskScorer.THRESHOLDS['normal'],
+            'threshold_suspicious': RiskScorer.THRESHOLDS['suspicious'],
+            'threshold_malicious': RiskScorer.THRESHOLDS['malicious'],
+            'base_score': self.base_score,
+            'multiplier': self.multiplier,
+            'contributions': RiskScorer.contributions(self),
+        }
+
+
 class RiskScoringService:
     """High-level service for risk scoring integrated with analytics"""
     
     def __init__(self):
         self.scorer = RiskScorer()
     
-    def score_execution(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
-        """Score a single execution"""
-        return self.scorer.compute_risk_score(analysis)
+    def score_execution(self, analysis: Dict[str, Any], explain: bool = True) -> Dict[str, Any]:
+        """Score a single execution (explain: include the rendered explanation)"""
+        result = self.scorer.compute_risk_score(analysis)
+        if explain:
+            result = dict(result, explanation=self.scorer.explain(analysis))
+        return result
     
     def score_batch(self, analyses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Score multiple executions"""
+        """Score multiple executions (no explanations)"""
         return [self.scorer.compute_risk_score(a) for a in analyses]
     
-    def compare_profile_risk(self, analyses_by_profile: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
-        """Compare risk across profiles"""
-        profile_scores = {}
-        
-        for profile, analyses in analyses_by_profile.items():
-            scores = []
-            for analysis in analyses:
-                score_result = self.scorer.compute_risk_score(analysis)
-                scores.append(score_result['score'])
-            profile_scores[profile] = scores
-        
+    def scores(self, analyses) -> np.ndarray:
+        """
+        Integer scores only, via the bitmask fast path.
+        analyses: list of analysis dicts, or an analyze_batch() result
+        """
+        if isinstance(analyses, np.ndarray):
+            behaviors, strict = analyses['behaviors'], analyses['profile'] == 'STRICT'
+        else:
+            behaviors, strict = encode_behaviors(analyses)
+        return self.scorer.score_bitmasks(behaviors, strict)['score']
+    
+    def compare_profile_risk(self, analyses_by_profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Compare risk across profiles ({profile: analyses or analyze_batch() rows})"""
+        profile_scores = {profile: self.scores(analyses) for profile, analyses in analyses_by_profile.items()}
         return self.scorer.get_risk_profile_comparison(profile_scores)
     
-    def get_risk_distribution(self, analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Get distribution of risk across executions"""
-        scores = []
-        for analysis in analyses:
-            score_result = self.scorer.compute_risk_score(analysis)
-            scores.append(score_result['score'])
-        
-        import numpy as np
-        if not scores:
+    def get_risk_distribution(self, analyses) -> Dict[str, Any]:
+        """Get distribution of risk across executions (analyses or analyze_batch() rows)"""
+        scores = self.scores(analyses)
+        if not scores.size:
             return {'error': 'No scores to analyze'}
         
+        normal, suspicious = RiskScorer.THRESHOLDS['normal'], RiskScorer.THRESHOLDS['suspicious']
         return {
-            'total_executions': len(scores),
+            'total_executions': int(scores.size),
             'avg_risk': float(np.mean(scores)),
             'median_risk': float(np.median(scores)),
             'max_risk': int(np.max(scores)),
             'min_risk': int(np.min(scores)),
             'risk_distribution': {
-                'normal': sum(1 for s in scores if s <= RiskScorer.THRESHOLDS['normal']),
-                'suspicious': sum(1 for s in scores if RiskScorer.THRESHOLDS['normal'] < s <= RiskScorer.THRESHOLDS['suspicious']),
-                'malicious': sum(1 for s in scores if s > RiskScorer.THRESHOLDS['suspicious']),
+                'normal': int(np.count_nonzero(scores <= normal)),
+                'suspicious': int(np.count_nonzero((scores > normal) & (scores <= suspicious))),
+                'malicious': int(np.count_nonzero(scores > suspicious)),
             }
         }
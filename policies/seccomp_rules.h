@@ -4,27 +4,135 @@
 #include <seccomp.h>
 #include <stdio.h>
 #include <stdlib.h>
+#include <string.h>
 #include <errno.h>
+#include <fcntl.h>
+#include <unistd.h>
+#include <sys/mman.h>
+#include <sys/prctl.h>
+#include <sys/stat.h>
+#include <linux/filter.h>
+#include <linux/seccomp.h>
 
-#include <errno.h>
+#include "../runner/telemetry.h" // for sandbox_profile_t definition
+
+// Policies are declared per profile in POLICY_DIR/<profile>.policy and
+// compiled programs are cached under BPF_CACHE_DIR (both relative to the
+// project root, like logs/). A cached program older than its policy file is
+// recompiled; bump SECCOMP_RULES_VERSION when the built-in rules or the
+// policy syntax change.
+#define SECCOMP_RULES_VERSION 2
+#define POLICY_DIR "policies/profiles"
+#define BPF_CACHE_DIR "policies/cache"
+
+static const char *profile_cache_name(sandbox_profile_t profile) {
+    switch (profile) {
+        case PROFILE_RESOURCE_AWARE: return "resource_aware";
+        case PROFILE_LEARNING:       return "learning";
+        default:                     return "strict";
+    }
+}
+
+void policy_file_path(sandbox_profile_t profile, char *buf, size_t len) {
+    snprintf(buf, len, "%s/%s.policy", POLICY_DIR, profile_cache_name(profile));
+}
 
 /**
- * 5. Mandatory OS Algorithms & Kernel Mechanisms
- * D. SYSTEM CALL HANDLING
+ * Parses a declarative policy file into a libseccomp filter context.
+ * See policies/profiles/strict.policy for the syntax.
  *
- * This function loads the seccomp filter into the kernel.
- * It uses a WHITELIST approach: Default action is KILL.
+ * Rules carry an optional priority (0-255): libseccomp places higher
+ * priority syscalls earlier in the generated BPF, so hot syscalls such as
+ * read/write/mmap are matched after fewer comparisons.
+ *
+ * Returns: the context, or NULL if the file does not exist.
+ * A malformed policy is fatal: silently weakening the sandbox is worse.
  */
-#include "../runner/telemetry.h" // for sandbox_profile_t definition
+scmp_filter_ctx load_policy_file(const char *path) {
+    FILE *fp = fopen(path, "r");
+    if (!fp) return NULL;
+
+    scmp_filter_ctx ctx = NULL;
+    char line[256];
+    int lineno = 0;
+
+    while (fgets(line, sizeof(line), fp)) {
+        lineno++;
+        char *comment = strchr(line, '#');
+        if (comment) *comment = '\0';
+
+        char directive[32], arg[64];
+        int priority = -1;
+        int fields = sscanf(line, "%31s %63s %d", directive, arg, &priority);
+        if (fields <= 0) continue;  // Blank or comment-only line
+
+        if (fields < 2) goto malformed;
+
+        if (strcmp(directive, "default") == 0) {
+            if (ctx) goto malformed;  // Must come before any rule
+            uint32_t action;
+            if (strcmp(arg, "kill") == 0) action = SCMP_ACT_KILL;
+            else if (strcmp(arg, "log") == 0) action = SCMP_ACT_LOG;
+            else if (strcmp(arg, "allow") == 0) action = SCMP_ACT_ALLOW;
+            else goto malformed;
+
+            ctx = seccomp_init(action);
+            if (ctx == NULL) {
+                perror("seccomp_init");
+                exit(1);
+            }
+        } else if (!ctx) {
+            goto malformed;
+        } else if (strcmp(directive, "optimize") == 0) {
+            if (strcmp(arg, "binary_tree") == 0) {
+#if defined(SCMP_VER_MAJOR) && (SCMP_VER_MAJOR > 2 || (SCMP_VER_MAJOR == 2 && SCMP_VER_MINOR >= 5))
+                seccomp_attr_set(ctx, SCMP_FLTATR_CTL_OPTIMIZE, 2);
+#else
+                fprintf(stderr, "[Sandbox] %s: binary_tree needs libseccomp >= 2.5, using priority order\n", path);
+#endif
+            } else if (strcmp(arg, "priority") != 0) {
+                goto malformed;
+            }
+        } else if (strcmp(directive, "allow") == 0) {
+            int nr = seccomp_syscall_resolve_name(arg);
+            if (nr == __NR_SCMP_ERROR) {
+                fprintf(stderr, "[Sandbox] %s:%d: unknown syscall '%s'\n", path, lineno, arg);
+                goto fatal;
+            }
+            if (seccomp_rule_add(ctx, SCMP_ACT_ALLOW, nr, 0) < 0) goto malformed;
+            if (fields == 3) {
+                if (priority < 0 || priority > 255) goto malformed;
+                seccomp_syscall_priority(ctx, nr, (uint8_t)priority);
+            }
+        } else {
+            goto malformed;
+        }
+    }
+    fclose(fp);
+
+    if (!ctx) {
+        fprintf(stderr, "[Sandbox] %s: missing 'default' directive\n", path);
+        exit(1);
+    }
+    return ctx;
+
+malformed:
+    fprintf(stderr, "[Sandbox] %s:%d: malformed policy line\n", path, lineno);
+fatal:
+    fclose(fp);
+    if (ctx) seccomp_release(ctx);
+    exit(1);
+}
 
 /**
  * 5. Mandatory OS Algorithms & Kernel Mechanisms
  * D. SYSTEM CALL HANDLING
  *
- * This function loads the seccomp filter into the kernel.
+ * Built-in rules, used when the launcher runs outside the project root
+ * and the policy files are not available.
  * It uses a WHITELIST approach: Default action is KILL.
  */
-void install_syscall_filter(sandbox_profile_t profile) {
+scmp_filter_ctx build_builtin_syscall_filter(sandbox_profile_t profile) {
     scmp_filter_ctx ctx;
 
     // 1. Initialize the filter.
@@ -84,7 +192,33 @@ void install_syscall_filter(sandbox_profile_t profile) {
     // DANGER: fork() / clone() -> Prevent simple fork bombs inside the sandbox (defense in depth)
     // Note: Python or standard libs might try to clone threads, which will fail here.
     // For this strict sandbox, we essentially allow single-threaded execution only.
-    
+
+    return ctx;
+}
+
+/**
+ * Builds the libseccomp filter context for a profile from its policy file,
+ * falling back to the built-in rules.
+ * The caller owns the returned context (seccomp_release).
+ */
+scmp_filter_ctx build_syscall_filter(sandbox_profile_t profile) {
+    char path[256];
+    policy_file_path(profile, path, sizeof(path));
+
+    scmp_filter_ctx ctx = load_policy_file(path);
+    if (ctx) return ctx;
+
+    fprintf(stderr, "[Sandbox] WARNING: %s not found, using built-in rules\n", path);
+    return build_builtin_syscall_filter(profile);
+}
+
+/**
+ * Loads the seccomp filter for a profile into the kernel (libseccomp path).
+ * The filter is rebuilt from scratch on every call.
+ */
+void install_syscall_filter(sandbox_profile_t profile) {
+    scmp_filter_ctx ctx = build_syscall_filter(profile);
+
     // 4. Load the filter
     printf("[Sandbox] Loading Seccomp-BPF Profile...\n");
     if (seccomp_load(ctx) < 0) {
@@ -97,4 +231,171 @@ void install_syscall_filter(sandbox_profile_t profile) {
     printf("[Sandbox] Seccomp Enforced. System is locked down.\n");
 }
 
+/**
+ * Compiles the filter for a profile into a raw BPF program.
+ *
+ * libseccomp can only export to a file descriptor, so the program is
+ * exported into an anonymous memfd and read back into a heap buffer.
+ * The caller owns prog->filter (free).
+ *
+ * Returns: 0 on success, -1 on error
+ */
+int compile_syscall_filter(sandbox_profile_t profile, struct sock_fprog *prog) {
+    scmp_filter_ctx ctx = build_syscall_filter(profile);
+
+    int fd = memfd_create("seccomp_bpf", MFD_CLOEXEC);
+    if (fd < 0) {
+        perror("memfd_create");
+        seccomp_release(ctx);
+        return -1;
+    }
+
+    int rc = seccomp_export_bpf(ctx, fd);
+    seccomp_release(ctx);
+    if (rc < 0) {
+        fprintf(stderr, "seccomp_export_bpf: %s\n", strerror(-rc));
+        close(fd);
+        return -1;
+    }
+
+    struct stat st;
+    if (fstat(fd, &st) < 0 || st.st_size == 0 || st.st_size % sizeof(struct sock_filter) != 0) {
+        fprintf(stderr, "[Sandbox] Exported BPF program has invalid size\n");
+        close(fd);
+        return -1;
+    }
+
+    struct sock_filter *insns = malloc(st.st_size);
+    if (!insns || pread(fd, insns, st.st_size, 0) != st.st_size) {
+        perror("read exported BPF");
+        free(insns);
+        close(fd);
+        return -1;
+    }
+    close(fd);
+
+    prog->len = (unsigned short)(st.st_size / sizeof(struct sock_filter));
+    prog->filter = insns;
+    return 0;
+}
+
+/**
+ * Loads a precompiled BPF program with a single prctl().
+ * Mirrors what seccomp_load() does: NO_NEW_PRIVS first, then the filter.
+ */
+void load_compiled_filter(const struct sock_fprog *prog) {
+    if (prctl(PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0) != 0) {
+        perror("prctl(PR_SET_NO_NEW_PRIVS)");
+        exit(1);
+    }
+
+    if (prctl(PR_SET_SECCOMP, SECCOMP_MODE_FILTER, prog) != 0) {
+        perror("prctl(PR_SET_SECCOMP)");
+        exit(1);
+    }
+    printf("[Sandbox] Seccomp Enforced (precompiled, %u instructions).\n", prog->len);
+}
+
+void bpf_cache_path(sandbox_profile_t profile, char *buf, size_t len) {
+    snprintf(buf, len, "%s/%s.v%d.bpf", BPF_CACHE_DIR, profile_cache_name(profile), SECCOMP_RULES_VERSION);
+}
+
+/**
+ * Reads a cached BPF program.
+ * The file must be owned by us and not group/world writable: a tampered
+ * cache would silently replace the sandbox policy.
+ *
+ * Returns: 0 on success, -1 if missing or untrusted
+ */
+int read_cached_filter(const char *path, struct sock_fprog *prog) {
+    int fd = open(path, O_RDONLY | O_CLOEXEC);
+    if (fd < 0) return -1;
+
+    struct stat st;
+    if (fstat(fd, &st) < 0 || st.st_uid != geteuid() || (st.st_mode & (S_IWGRP | S_IWOTH)) ||
+        st.st_size == 0 || st.st_size % sizeof(struct sock_filter) != 0 ||
+        st.st_size / sizeof(struct sock_filter) > BPF_MAXINSNS) {
+        close(fd);
+        return -1;
+    }
+
+    struct sock_filter *insns = malloc(st.st_size);
+    if (!insns || pread(fd, insns, st.st_size, 0) != st.st_size) {
+        free(insns);
+        close(fd);
+        return -1;
+    }
+    close(fd);
+
+    prog->len = (unsigned short)(st.st_size / sizeof(struct sock_filter));
+    prog->filter = insns;
+    return 0;
+}
+
+/**
+ * Writes a BPF program to the cache atomically (temp file + rename),
+ * so concurrent launchers never read a half-written program.
+ *
+ * Returns: 0 on success, -1 on error
+ */
+int write_cached_filter(const char *path, const struct sock_fprog *prog) {
+    mkdir(BPF_CACHE_DIR, 0755);
+
+    char tmp_path[256];
+    snprintf(tmp_path, sizeof(tmp_path), "%s.%d.tmp", path, getpid());
+
+    int fd = open(tmp_path, O_WRONLY | O_CREAT | O_TRUNC | O_CLOEXEC, 0644);
+    if (fd < 0) return -1;
+
+    ssize_t size = prog->len * sizeof(struct sock_filter);
+    if (write(fd, prog->filter, size) != size) {
+        close(fd);
+        unlink(tmp_path);
+        return -1;
+    }
+    close(fd);
+
+    if (rename(tmp_path, path) != 0) {
+        unlink(tmp_path);
+        return -1;
+    }
+    return 0;
+}
+
+static int timespec_before(const struct timespec *a, const struct timespec *b) {
+    return a->tv_sec < b->tv_sec || (a->tv_sec == b->tv_sec && a->tv_nsec < b->tv_nsec);
+}
+
+/**
+ * Returns the compiled filter for a profile, compiling it with libseccomp
+ * and populating the cache only on a miss.
+ *
+ * Returns: 0 on success, -1 on error
+ */
+int get_cached_syscall_filter(sandbox_profile_t profile, struct sock_fprog *prog) {
+    char path[256], policy_path[256];
+    bpf_cache_path(profile, path, sizeof(path));
+    policy_file_path(profile, policy_path, sizeof(policy_path));
+
+    // Stale if the policy file was edited after the program was compiled.
+    // Full nanosecond timestamps: comparing seconds would treat a cache
+    // written in the same second as the edit as stale on every launch.
+    struct stat cache_st, policy_st;
+    int stale = stat(policy_path, &policy_st) == 0 &&
+                (stat(path, &cache_st) != 0 || !timespec_before(&policy_st.st_mtim, &cache_st.st_mtim));
+
+    if (!stale && read_cached_filter(path, prog) == 0) {
+        return 0;
+    }
+
+    if (compile_syscall_filter(profile, prog) != 0) {
+        return -1;
+    }
+
+    if (write_cached_filter(path, prog) == 0) {
+        printf("[Sandbox] Cached compiled seccomp filter: %s\n", path);
+    }
+    return 0;
+}
+
 #endif
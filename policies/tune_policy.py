@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Seccomp policy tuner: orders policy rules by observed syscall frequency.
+
+libseccomp checks syscalls in rule order unless told otherwise; giving hot
+syscalls (read/write/mmap) a higher priority puts them at the front of the
+generated BPF program, so syscall-heavy workloads pay for fewer comparisons
+per syscall.
+
+Frequency sources:
+- LEARNING-mode telemetry logs (logs/*.json): read_syscalls/write_syscalls
+  from /proc/[pid]/io. These only cover the read/write families.
+- Optional `strace -c -f` summaries (--strace) for full per-syscall counts.
+
+Only the priority column of `allow` lines is rewritten; comments and rule
+order in the file are preserved. The launcher recompiles the BPF cache
+automatically because the policy file becomes newer than the cached program.
+
+Usage:
+    python3 policies/tune_policy.py [--logs logs] [--strace trace.txt ...]
+                                    [--optimize priority|binary_tree] [--dry-run]
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+from collections import Counter
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POLICY_DIR = os.path.join(PROJECT_ROOT, "policies", "profiles")
+LOGS_DIR = os.path.join(PROJECT_ROOT, "logs")
+
+# /proc/[pid]/io counts the whole read/write syscall families (syscr/syscw);
+# attribute them to the plain read/write rules, by far the common case.
+IO_COUNTERS = {
+    'read_syscalls': 'read',
+    'write_syscalls': 'write',
+}
+
+MAX_PRIORITY = 255
+
+ALLOW_RE = re.compile(r'^(\s*allow\s+)(\w+)(\s+\d+)?(\s*(#.*)?)$')
+OPTIMIZE_RE = re.compile(r'^(\s*optimize\s+)(\w+)(.*)$')
+
+
+def count_from_logs(log_dir):
+    """Accumulate syscall counts from LEARNING-mode telemetry logs"""
+    counts = Counter()
+    runs = 0
+
+    for path in glob.glob(os.path.join(log_dir, "*.json")):
+        try:
+            with open(path) as fh:
+                log = json.load(fh)
+        except Exception as e:
+            print(f"[Policy] Skipping {path}: {e}")
+            continue
+
+        if log.get('profile') != 'LEARNING':
+            continue
+
+        runs += 1
+        summary = log.get('summary', {})
+        for field, name in IO_COUNTERS.items():
+            counts[name] += summary.get(field, 0)
+
+    print(f"[Policy] {runs} LEARNING runs in {log_dir}")
+    return counts
+
+
+def count_from_strace(path):
+    """
+    Parse an `strace -c` summary table:
+        % time     seconds  usecs/call     calls    errors syscall
+    """
+    counts = Counter()
+
+    with open(path) as fh:
+        for line in fh:
+            tokens = line.split()
+            if len(tokens) < 5 or not re.match(r'^\d+(\.\d+)?$', tokens[0]):
+                continue
+            name = tokens[-1]
+            if name == 'total' or not tokens[3].isdigit():
+                continue
+            counts[name] += int(tokens[3])
+
+    return counts
+
+
+def assign_priorities(counts):
+    """Rank syscalls by frequency: most frequent gets MAX_PRIORITY"""
+    ranked = [name for name, count in counts.most_common() if count > 0]
+    return {name: max(1, MAX_PRIORITY - rank) for rank, name in enumerate(ranked)}
+
+
+def rewrite_policy(path, priorities, optimize=None, dry_run=False):
+    """Update priorities (and optionally the layout) of one policy file"""
+    with open(path) as fh:
+        lines = fh.read().splitlines()
+
+    output = []
+    for line in lines:
+        match = ALLOW_RE.match(line)
+        if match:
+            prefix, name, _, rest = match.group(1), match.group(2), match.group(3), match.group(4)
+            if name in priorities:
+                line = f"{prefix}{name} {priorities[name]}{rest}"
+            else:
+                line = f"{prefix}{name}{rest}"
+        elif optimize:
+            opt_match = OPTIMIZE_RE.match(line)
+            if opt_match:
+                line = f"{opt_match.group(1)}{optimize}{opt_match.group(3)}"
+        output.append(line)
+
+    if dry_run:
+        print(f"--- {os.path.relpath(path, PROJECT_ROOT)}")
+        print("\n".join(output))
+        return
+
+    with open(path, "w") as fh:
+        fh.write("\n".join(output) + "\n")
+    print(f"[Policy] Updated {os.path.relpath(path, PROJECT_ROOT)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Order seccomp policy rules by observed syscall frequency')
+    parser.add_argument('--logs', default=LOGS_DIR, help='Telemetry log directory')
+    parser.add_argument('--strace', action='append', default=[], help='strace -c summary file (repeatable)')
+    parser.add_argument('--optimize', choices=['priority', 'binary_tree'], help='Rule layout to set in every policy')
+    parser.add_argument('--dry-run', action='store_true', help='Print the updated policies instead of writing them')
+    args = parser.parse_args()
+
+    counts = count_from_logs(args.logs)
+    for trace in args.strace:
+        counts.update(count_from_strace(trace))
+
+    priorities = assign_priorities(counts)
+    if not priorities:
+        print("[Policy] No syscall frequency data found; policies unchanged.")
+        return
+
+    for name, prio in sorted(priorities.items(), key=lambda item: -item[1]):
+        print(f"[Policy] {name:<16} calls={counts[name]:<10} priority={prio}")
+
+    for path in sorted(glob.glob(os.path.join(POLICY_DIR, "*.policy"))):
+        rewrite_policy(path, priorities, args.optimize, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
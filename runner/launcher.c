@@ -7,15 +7,44 @@
 #include <sys/resource.h>
 #include <sys/mount.h>
 #include <string.h>
+#include <limits.h>
 #include <errno.h>
 #include <fcntl.h>
 #include <time.h>
+#include <signal.h>
+#include <sys/socket.h>
+#include <sys/un.h>
+#include <sys/epoll.h>
+#include <sys/timerfd.h>
+#include <sys/syscall.h>
+#include <sys/ipc.h>
+#include <sys/shm.h>
+#include <sys/sem.h>
+#include <sys/msg.h>
 #include "../policies/seccomp_rules.h"
 #include "telemetry.h"
 
 // Stack size for cloned child
 #define STACK_SIZE (1024 * 1024)
 
+#ifndef SYS_pidfd_open
+#define SYS_pidfd_open 434  // Linux 5.3+, same number on every architecture
+#endif
+
+// Events returned by supervisor_wait()
+#define SUPERVISE_TICK 0
+#define SUPERVISE_EXITED 1
+
+// Server mode limits
+#define MAX_REQUEST_LEN 4096
+#define MAX_REQUEST_ARGS 64
+#define NUM_PROFILES 3
+
+// Warm namespaces (--repeat): joined in this order, user namespace first so
+// the child holds capabilities over the others
+#define WARM_NS_COUNT 4
+static const char *warm_ns_names[WARM_NS_COUNT] = {"user", "mnt", "ipc", "uts"};
+
 /**
  * STRUCTURE:
  * 1. Parse Arguments (Binary to run)
@@ -29,12 +58,67 @@ struct container_config {
     char *binary_path;
     char **args;
     sandbox_profile_t profile;
+    const char *profile_name;
+    const struct sock_fprog *filter;  // Precompiled BPF program, NULL = build in child
+    long time_limit_ms;               // 0 = no limit
+    int adapt;                        // LEARNING acts on its detectors (0 = record only)
+    int sample_min_ms;                // Adaptive sampling bounds (equal = fixed rate)
+    int sample_max_ms;
+    int max_samples;                  // Timeline cap before downsampling
+    const char *stream_path;          // Live telemetry socket (NULL = off)
+    const char *ring_path;            // Shared-memory sample ring (NULL = off)
+    const char *cgroup_path;          // Sample the run's cgroup instead of /proc/[pid]
+    const int *warm_ns_fds;           // Join these namespaces instead of creating new ones
+    const char *batch_id;             // Set for --repeat runs
+    int batch_iteration;
+    int batch_size;
+    long namespace_setup_us;          // One-off cost of the warm namespaces
+    int exec_report_fd;               // Child writes its pre-exec timestamp here (-1 = off)
 };
 
+// Outcome of one sandboxed execution (reported back to server clients)
+struct run_result {
+    pid_t child_pid;
+    char log_path[128];
+    char exit_reason[32];
+    const char *startup_mode;   // "cold" or "warm"
+    long launch_us;
+    long exec_us;
+};
+
+// Private, read-only root in the current mount namespace
+static void lock_root_filesystem(void) {
+    // 1. make mount setting private
+    if (mount(NULL, "/", NULL, MS_PRIVATE | MS_REC, NULL) != 0) {
+        perror("mount / private");
+    }
+    
+    // 2. Remount / as Read-Only
+    // This prevents the untrusted process from modifying ANY file in the system
+    // unless we explicitly mount a writable tmpfs (which we skip for strict sandbox).
+    if (mount(NULL, "/", NULL, MS_REMOUNT | MS_BIND | MS_RDONLY, NULL) != 0) {
+       perror("mount / read-only");
+       // Non-fatal for demo if unprivileged, but critical for security.
+    } else {
+       printf("[Sandbox-Child] Filesystem locked (Read-Only Root Enforced).\n");
+    }
+}
+
 // Child process function
 int child_fn(void *arg) {
     struct container_config *config = (struct container_config *)arg;
 
+    if (config->warm_ns_fds) {
+        // Warm run: enter the namespaces kept alive by the holder process
+        // (PID namespace was entered by the parent for its children)
+        for (int i = 0; i < WARM_NS_COUNT; i++) {
+            if (setns(config->warm_ns_fds[i], 0) != 0) {
+                fprintf(stderr, "setns(%s): %s\n", warm_ns_names[i], strerror(errno));
+                return 1;
+            }
+        }
+    }
+
     printf("[Sandbox-Child] PID: %d inside new namespace\n", getpid());
 
     // -------------------------------------------------------------
@@ -47,19 +131,9 @@ int child_fn(void *arg) {
     // E. FILE SYSTEM MANAGEMENT
     // Mechanism: Mount Namespace + Read-Only Root
     // -------------------------------------------------------------
-    // 1. make mount setting private
-    if (mount(NULL, "/", NULL, MS_PRIVATE | MS_REC, NULL) != 0) {
-        perror("mount / private");
-    }
-    
-    // 2. Remount / as Read-Only
-    // This prevents the untrusted process from modifying ANY file in the system
-    // unless we explicitly mount a writable tmpfs (which we skip for strict sandbox).
-    if (mount(NULL, "/", NULL, MS_REMOUNT | MS_BIND | MS_RDONLY, NULL) != 0) {
-       perror("mount / read-only");
-       // Non-fatal for demo if unprivileged, but critical for security.
-    } else {
-       printf("[Sandbox-Child] Filesystem locked (Read-Only Root Enforced).\n");
+    // (Warm runs share the holder's mount namespace, already locked)
+    if (!config->warm_ns_fds) {
+        lock_root_filesystem();
     }
     
     // -------------------------------------------------------------
@@ -100,7 +174,12 @@ int child_fn(void *arg) {
     // D. SYSTEM CALL HANDLING
     // Mechanism: Seccomp BPF
     // -------------------------------------------------------------
-    install_syscall_filter(config->profile);
+    if (config->filter) {
+        // The program was compiled (or read from the cache) by the parent
+        load_compiled_filter(config->filter);
+    } else {
+        install_syscall_filter(config->profile);
+    }
 
     // -------------------------------------------------------------
     // C. PROCESS MANAGEMENT
@@ -108,68 +187,137 @@ int child_fn(void *arg) {
     // Replaces the current process image with the untrusted code.
     // -------------------------------------------------------------
     printf("[Sandbox-Child] Executing untrusted binary: %s\n", config->binary_path);
+    if (config->exec_report_fd >= 0) {
+        // Setup done: the parent splits launch time into setup and exec
+        long long ready_us = get_monotonic_us();
+        if (write(config->exec_report_fd, &ready_us, sizeof(ready_us)) != sizeof(ready_us)) {
+            // Timing only; the run goes ahead
+        }
+    }
     execv(config->binary_path, config->args);
 
-    // If execv returns, it failed
+    // If execv returns, it failed. The report pipe is still open (CLOEXEC
+    // only closes it on success): send errno so no exec time is recorded.
+    int exec_errno = errno;
     perror("execv failed");
+    if (config->exec_report_fd >= 0) {
+        if (write(config->exec_report_fd, &exec_errno, sizeof(exec_errno)) != sizeof(exec_errno)) {
+            // The parent then times the failed exec; nothing else to do
+        }
+    }
     return 1;
 }
 
-void print_usage(const char *prog) {
-    fprintf(stderr, "Usage: %s [--profile=STRICT|RESOURCE-AWARE|LEARNING] <executable> [args...]\n", prog);
-}
+/**
+ * Child supervision: epoll over a pidfd (readable when the child exits) and a
+ * timerfd (next sampling tick). Exit is observed the moment it happens instead
+ * of at the next poll, and ticks follow absolute CLOCK_MONOTONIC deadlines so
+ * the time spent sampling does not stretch the interval.
+ *
+ * Kernels without pidfd_open (< 5.3) fall back to usleep + waitpid(WNOHANG).
+ */
+typedef struct {
+    pid_t pid;
+    int pidfd;              // -1 = polling fallback
+    int timerfd;
+    int epfd;
+    struct timespec next_tick;
+} supervisor_t;
 
-int main(int argc, char *argv[]) {
-    if (argc < 2) {
-        print_usage(argv[0]);
-        return 1;
+static void supervisor_open(supervisor_t *sup, pid_t pid) {
+    sup->pid = pid;
+    sup->pidfd = (int)syscall(SYS_pidfd_open, pid, 0);
+    sup->timerfd = -1;
+    sup->epfd = -1;
+    clock_gettime(CLOCK_MONOTONIC, &sup->next_tick);
+
+    if (sup->pidfd < 0) {
+        perror("pidfd_open (falling back to waitpid polling)");
+        return;
     }
 
-    // Default profile
-    sandbox_profile_t profile = PROFILE_STRICT;
-    char *profile_str = "STRICT";
-    
-    int bin_index = 1;
-    if (strncmp(argv[1], "--profile=", 10) == 0) {
-        char *pinfo = argv[1] + 10;
-        if (strcmp(pinfo, "STRICT") == 0) {
-            profile = PROFILE_STRICT;
-            profile_str = "STRICT";
-        } else if (strcmp(pinfo, "RESOURCE-AWARE") == 0) {
-            profile = PROFILE_RESOURCE_AWARE;
-            profile_str = "RESOURCE-AWARE";
-        } else if (strcmp(pinfo, "LEARNING") == 0) {
-            profile = PROFILE_LEARNING;
-            profile_str = "LEARNING";
-        } else {
-             fprintf(stderr, "Unknown profile: %s. Using STRICT.\n", pinfo);
-        }
-        bin_index++;
+    sup->timerfd = timerfd_create(CLOCK_MONOTONIC, TFD_CLOEXEC);
+    sup->epfd = epoll_create1(EPOLL_CLOEXEC);
+
+    struct epoll_event ev = {.events = EPOLLIN};
+    ev.data.fd = sup->pidfd;
+    int ok = sup->timerfd >= 0 && sup->epfd >= 0 &&
+             epoll_ctl(sup->epfd, EPOLL_CTL_ADD, sup->pidfd, &ev) == 0;
+    ev.data.fd = sup->timerfd;
+    ok = ok && epoll_ctl(sup->epfd, EPOLL_CTL_ADD, sup->timerfd, &ev) == 0;
+
+    if (!ok) {
+        perror("epoll/timerfd setup (falling back to waitpid polling)");
+        if (sup->timerfd >= 0) close(sup->timerfd);
+        if (sup->epfd >= 0) close(sup->epfd);
+        close(sup->pidfd);
+        sup->pidfd = sup->timerfd = sup->epfd = -1;
     }
+}
 
-    if (bin_index >= argc) {
-        print_usage(argv[0]);
-        return 1;
+/**
+ * Blocks until the next sampling tick (interval_ms after the previous one)
+ * or until the child exits, whichever comes first. On exit the child is
+ * reaped into *status.
+ *
+ * Returns: SUPERVISE_TICK, SUPERVISE_EXITED, or -1 on error
+ */
+static int supervisor_wait(supervisor_t *sup, int interval_ms, int *status) {
+    if (sup->pidfd < 0) {
+        if (interval_ms > 0) usleep(interval_ms * 1000);
+        pid_t r = waitpid(sup->pid, status, WNOHANG);
+        if (r < 0) return -1;
+        return r == 0 ? SUPERVISE_TICK : SUPERVISE_EXITED;
     }
 
-    printf("[Sandbox-Parent] Preparing execution environment (Profile: %s)...\n", profile_str);
-    
-    // Ensure logs directory exists
-    ensure_logs_directory();
+    sup->next_tick.tv_nsec += (long)interval_ms * 1000000L;
+    while (sup->next_tick.tv_nsec >= 1000000000L) {
+        sup->next_tick.tv_nsec -= 1000000000L;
+        sup->next_tick.tv_sec++;
+    }
 
-    // Prepare child stack
-    char *stack = malloc(STACK_SIZE);
-    if (!stack) {
-        perror("malloc stack");
-        exit(1);
+    // An absolute deadline already in the past fires immediately
+    struct itimerspec its = {0};
+    its.it_value = sup->next_tick;
+    if (timerfd_settime(sup->timerfd, TFD_TIMER_ABSTIME, &its, NULL) != 0) return -1;
+
+    for (;;) {
+        struct epoll_event events[2];
+        int n = epoll_wait(sup->epfd, events, 2, -1);
+        if (n < 0) {
+            if (errno == EINTR) continue;
+            return -1;
+        }
+
+        int ticked = 0;
+        for (int i = 0; i < n; i++) {
+            if (events[i].data.fd == sup->pidfd) {
+                // Exit wins over a simultaneous tick
+                return waitpid(sup->pid, status, 0) < 0 ? -1 : SUPERVISE_EXITED;
+            }
+            uint64_t expirations;
+            if (read(sup->timerfd, &expirations, sizeof(expirations)) == sizeof(expirations)) {
+                ticked = 1;
+            }
+        }
+        if (ticked) return SUPERVISE_TICK;
     }
-    
-    // Setup config
-    struct container_config config;
-    config.binary_path = argv[bin_index];
-    config.args = &argv[bin_index]; // Pass the executable + its args
-    config.profile = profile;
+}
+
+static void supervisor_close(supervisor_t *sup) {
+    if (sup->pidfd < 0) return;
+    close(sup->timerfd);
+    close(sup->epfd);
+    close(sup->pidfd);
+}
 
+/**
+ * Clones the sandboxed child, supervises it until exit and writes the
+ * telemetry log. Shared by single-shot mode and server mode.
+ *
+ * Returns: 0 on success, -1 if the child could not be launched
+ */
+static int run_sandbox(struct container_config *config, char *stack, struct run_result *result) {
     // -------------------------------------------------------------
     // C. PROCESS MANAGEMENT & E. FILESYSTEM
     // Mechanism: clone() with CLONE_NEW* flags
@@ -179,30 +327,69 @@ int main(int argc, char *argv[]) {
     // Note: Creating User Namespaces (CLONE_NEWUSER) allows unprivileged users 
     // to usage other namespaces. Required for WSL2 often.
     
-    int flags = CLONE_NEWNS | CLONE_NEWPID | CLONE_NEWIPC | CLONE_NEWUTS | CLONE_NEWUSER | SIGCHLD;
+    // Warm runs join existing namespaces (see warm_sandbox_create)
+    int flags = config->warm_ns_fds ? SIGCHLD
+              : CLONE_NEWNS | CLONE_NEWPID | CLONE_NEWIPC | CLONE_NEWUTS | CLONE_NEWUSER | SIGCHLD;
+    
+    // Launch latency (clone -> successful execv): the child holds the write
+    // end of a CLOEXEC pipe, so our read returns EOF exactly at exec. Just
+    // before execv it writes its timestamp, which splits setup from exec.
+    int exec_pipe[2];
+    if (pipe2(exec_pipe, O_CLOEXEC) != 0) {
+        exec_pipe[0] = exec_pipe[1] = -1;
+    }
+    config->exec_report_fd = exec_pipe[1];
+    long long launch_start_us = get_monotonic_us();
     
     long start_time = get_current_time_ms();
     
-    pid_t child_pid = clone(child_fn, stack + STACK_SIZE, flags, &config);
+    pid_t child_pid = clone(child_fn, stack + STACK_SIZE, flags, config);
 
+    if (exec_pipe[1] >= 0) close(exec_pipe[1]);
     
     if (child_pid == -1) {
         perror("clone failed (Trying fallback to simple fork without namespaces if unprivileged)");
-        exit(1);
+        if (exec_pipe[0] >= 0) close(exec_pipe[0]);
+        return -1;
     }
 
+    long launch_us = -1, child_setup_us = -1, exec_us = -1;
+    if (exec_pipe[0] >= 0) {
+        long long ready_us = 0;
+        ssize_t n;
+        while ((n = read(exec_pipe[0], &ready_us, sizeof(ready_us))) < 0 && errno == EINTR) {}
+        int exec_failed = 0;
+        if (n == sizeof(ready_us)) {
+            // EOF at a successful exec; a failed execv sends its errno
+            int exec_errno;
+            ssize_t m;
+            while ((m = read(exec_pipe[0], &exec_errno, sizeof(exec_errno))) < 0 && errno == EINTR) {}
+            exec_failed = m > 0;
+        }
+        long long exec_done_us = get_monotonic_us();
+        // Child gone before or in execv: no launch to time, all stay -1
+        if (n == sizeof(ready_us) && !exec_failed) {
+            launch_us = (long)(exec_done_us - launch_start_us);
+            child_setup_us = (long)(ready_us - launch_start_us);
+            exec_us = (long)(exec_done_us - ready_us);
+        }
+        close(exec_pipe[0]);
+    }
+    config->exec_report_fd = -1;
+
     printf("[Sandbox-Parent] Child launched with PID: %d\n", child_pid);
 
     // -------------------------------------------------------------
     // H. TIME MANAGEMENT & TELEMETRY
-    // Mechanism: waitpid(WNOHANG) + Polling
+    // Mechanism: pidfd + timerfd in an epoll loop (supervisor_wait)
     // -------------------------------------------------------------
-    int status;
+    int status = 0;
     int child_running = 1;
+    int killed_by_monitor = 0;
     
     telemetry_log_t log_data = {0};
-    log_data.program_name = config.binary_path;
-    log_data.profile_name = profile_str;
+    log_data.program_name = config->binary_path;
+    log_data.profile_name = config->profile_name;
     log_data.cpu_usage_percent = 0;
     log_data.memory_peak_kb = 0;
     log_data.minflt = 0;
@@ -212,46 +399,105 @@ int main(int argc, char *argv[]) {
     log_data.blocked_syscalls = 0;
     log_data.samples = NULL;
     log_data.sample_count = 0;
+    log_data.max_samples = config->max_samples;
+    log_data.downsample_factor = 1;
+    detector_init(&log_data.detector);
+    log_data.startup_mode = config->warm_ns_fds ? "warm" : "cold";
+    log_data.launch_us = launch_us;
+    log_data.child_setup_us = child_setup_us;
+    log_data.exec_us = exec_us;
+    log_data.namespace_setup_us = config->namespace_setup_us;
+    log_data.batch_id = config->batch_id;
+    log_data.batch_iteration = config->batch_iteration;
+    log_data.batch_size = config->batch_size;
     
     unsigned long long total_ticks = 0;
     
-    // CPU Usage Tracking (Delta-based calculation)
-    // We need previous measurements to compute CPU% over time intervals
-    unsigned long long prev_process_ticks = 0;
-    unsigned long long prev_total_ticks = 0;
+    // CPU Usage Tracking (Delta-based calculation over a sliding window)
+    cpu_window_t cpu_window = {0};
+    long prev_sample_ms = 0;
+
+    // Sampling schedule: adaptive between sample_min_ms and sample_max_ms
+    sample_schedule_t schedule;
+    schedule_init(&schedule, config->sample_min_ms, config->sample_max_ms);
+    log_data.sample_min_ms = schedule.min_interval_ms;
+    log_data.sample_max_ms = schedule.max_interval_ms;
+
     int num_cores = sysconf(_SC_NPROCESSORS_ONLN);
     if (num_cores <= 0) num_cores = 1;  // Fallback if sysconf fails
 
+    // Telemetry files stay open for the child's whole lifetime (pread per
+    // sample): the run's cgroup if given (whole process tree), else /proc/[pid]
+    proc_sampler_t sampler;
+    cgroup_sampler_t cgroup_sampler;
+    int sampler_ok;
+    if (config->cgroup_path && cgroup_sampler_open(&cgroup_sampler, config->cgroup_path, child_pid) == 0) {
+        log_data.cgroup_source = 1;
+        sampler_ok = 1;
+        printf("[Sandbox-Parent] Telemetry source: cgroup %s\n", config->cgroup_path);
+    } else {
+        sampler_ok = proc_sampler_open(&sampler, child_pid) == 0;
+    }
+
+    // Live telemetry for the dashboard (no-op unless it is listening)
+    telemetry_stream_t stream;
+    telemetry_stream_open(&stream, config->stream_path, child_pid);
+    telemetry_stream_start(&stream, &log_data);
+
+    // Shared-memory ring for a supervising controller
+    telemetry_ring_t ring;
+    telemetry_ring_open(&ring, config->ring_path, child_pid);
+
+    supervisor_t supervisor;
+    supervisor_open(&supervisor, child_pid);
+    long end_time = 0;
+    int interval_ms = 0;  // First sample right away
 
     // Monitoring Loop
     while (child_running) {
-        pid_t result = waitpid(child_pid, &status, WNOHANG);
+        int event = supervisor_wait(&supervisor, interval_ms, &status);
         
-        if (result == 0) {
+        if (event == SUPERVISE_TICK) {
+            long long tick_start_us = get_monotonic_us();
+            log_data.monitor_ticks++;
+
             // Child still running, collect metrics
-            long current_mem = get_memory_peak(child_pid);
+            // (/proc/[pid]/stat, /proc/[pid]/status, /proc/[pid]/io, /proc/stat
+            //  or cpu.stat, memory.*, pids.current, io.stat of the cgroup)
+            proc_metrics_t metrics;
+            int read_status = !sampler_ok ? -1
+                            : log_data.cgroup_source ? cgroup_sampler_read(&cgroup_sampler, &metrics, &log_data.cgroup)
+                            : proc_sampler_read(&sampler, &metrics);
+            if (read_status != 0 ||
+                (metrics.memory_peak_kb == 0 && log_data.sample_count > 0)) {
+                // Process gone or exiting (zombie without an mm): skip the
+                // sample instead of recording bogus 0 readings.
+                interval_ms = schedule.min_interval_ms;
+                log_data.monitor_us += get_monotonic_us() - tick_start_us;
+                continue;
+            }
+
+            long current_mem = metrics.memory_peak_kb;
             if (current_mem > log_data.memory_peak_kb) {
                 log_data.memory_peak_kb = current_mem;
             }
             
             // Capure CPU ticks and Faults
-            unsigned long minflt = 0, majflt = 0;
-            unsigned long long current_ticks = get_process_metrics(child_pid, &minflt, &majflt);
+            unsigned long majflt = metrics.majflt;
+            unsigned long long current_ticks = metrics.process_ticks;
             if (current_ticks > total_ticks) {
                 total_ticks = current_ticks;
             }
             // Update faults (they are cumulative in stat, so just take latest)
-            log_data.minflt = minflt;
+            log_data.minflt = metrics.minflt;
             log_data.majflt = majflt;
             
-            // Collect I/O syscall counts from /proc/[pid]/io
+            // I/O syscall counts from /proc/[pid]/io
             // These represent read/write syscall activity during process execution.
-            // Captured at same sampling interval as CPU/memory (100ms).
-            unsigned long read_sc = 0, write_sc = 0;
-            get_io_syscalls(child_pid, &read_sc, &write_sc);
+            // Captured at same sampling interval as CPU/memory.
             // Store the latest values (they are cumulative, so we keep the current snapshot)
-            log_data.read_syscalls = read_sc;
-            log_data.write_syscalls = write_sc;
+            log_data.read_syscalls = metrics.read_syscalls;
+            log_data.write_syscalls = metrics.write_syscalls;
             
             /*
              * CPU Usage Calculation (Delta-Based, Multi-Core Aware)
@@ -262,8 +508,8 @@ int main(int argc, char *argv[]) {
              *   - Number of cores: sysconf(_SC_NPROCESSORS_ONLN)
              * 
              * Formula:
-             *   delta_process = current_process_ticks - prev_process_ticks
-             *   delta_total   = current_system_ticks - prev_system_ticks
+             *   delta_process = current_process_ticks - window_start_process_ticks
+             *   delta_total   = current_system_ticks - window_start_system_ticks
              *   CPU% = (delta_process / delta_total) × 100 × num_cores
              * 
              * Why this works:
@@ -271,105 +517,126 @@ int main(int argc, char *argv[]) {
              *   - Multiplying by num_cores normalizes to per-core percentage
              *   - Single-threaded 100% busy process → 100% (matches top/htop)
              * 
+             * The window start is the newest reading at least CPU_WINDOW_MS
+             * old (see cpu_window_update), so fast adaptive sampling does
+             * not turn 10ms clock ticks into 0%/100% spikes.
+             * 
              * Edge cases:
              *   - First sample: No prev data → CPU% = 0
-             *   - delta_total == 0: Should never happen with 100ms sampling
              */
-            unsigned long long current_total_ticks = get_system_cpu_ticks();
-            int current_cpu_percent = 0;
-            
-            if (prev_total_ticks > 0) {
-                // We have previous data, can calculate delta
-                unsigned long long process_delta = current_ticks - prev_process_ticks;
-                unsigned long long total_delta = current_total_ticks - prev_total_ticks;
-                
-                if (total_delta > 0) {
-                    // Calculate: (process_cpu / total_cpu) * 100 * num_cores
-                    current_cpu_percent = (int)((process_delta * 100 * num_cores) / total_delta);
-                    
-                    // Sanity check: cap at (num_cores * 100)% in case of measurement errors
-                    int max_cpu = num_cores * 100;
-                    if (current_cpu_percent > max_cpu) {
-                        current_cpu_percent = max_cpu;
-                    }
-                }
-            }
-            // Else: first sample, keep current_cpu_percent = 0
+            unsigned long long current_total_ticks = metrics.system_ticks;
+            long now_ms = get_current_time_ms();
+            int current_cpu_percent = cpu_window_update(&cpu_window, now_ms, current_ticks,
+                                                        current_total_ticks, num_cores);
             
-            // Update previous readings for next iteration
-            prev_process_ticks = current_ticks;
-            prev_total_ticks = current_total_ticks;
-            
-            // Add time-series sample
-            long elapsed = get_current_time_ms() - start_time;
-            add_sample(&log_data, elapsed, current_cpu_percent, current_mem);
+            // Add time-series sample (interval = wall time this sample covers)
+            long elapsed = now_ms - start_time;
+            add_sample(&log_data, elapsed, (int)(elapsed - prev_sample_ms), current_cpu_percent, current_mem);
+            telemetry_stream_sample(&stream, elapsed, (int)(elapsed - prev_sample_ms), current_cpu_percent, current_mem);
+            telemetry_ring_push(&ring, elapsed, (int)(elapsed - prev_sample_ms), current_cpu_percent, current_mem);
 
             // -------------------------------------------------------------
             // DYNAMIC POLICY ADAPTATION (Phase 5)
             // OS Concept: Runtime Enforcement based on Behavioral Analysis
             // -------------------------------------------------------------
-            if (config.profile == PROFILE_LEARNING) {
-                // Heuristic: If CPU ticks > Threshold or Faults > Threshold
-                // In a real system, this would be more complex or use eBPF data
-                
-                // Thresholds (Arbitrary for demo)
+            // Online detectors run for every profile (recorded in the log);
+            // only LEARNING acts on them, unless --no-adapt (measurement runs
+            // that must end the same way as an unsandboxed baseline).
+            const char *detected = detector_update(&log_data.detector, elapsed, (int)(elapsed - prev_sample_ms),
+                                                   current_cpu_percent, current_mem,
+                                                   metrics.read_syscalls + metrics.write_syscalls);
+            prev_sample_ms = elapsed;
+            if (detected) {
+                printf("[Sandbox-Monitor] Behavior detected at %ld ms: %s\n", elapsed, detected);
+                telemetry_stream_alert(&stream, &log_data.detector);
+            }
+
+            if (config->profile == PROFILE_LEARNING && config->adapt) {
+                // Backstop heuristic: CPU ticks > Threshold or Faults > Threshold
                 unsigned long long cpu_threshold_ticks = sysconf(_SC_CLK_TCK) * 2; // ~2 seconds of full CPU
                 unsigned long fault_threshold = 1000;
                 
-                if (current_ticks > cpu_threshold_ticks || majflt > fault_threshold) {
+                if (detected || current_ticks > cpu_threshold_ticks || majflt > fault_threshold) {
                      printf("\n[Sandbox-Monitor] ⚠️ RISK DETECTED in Learning Mode!\n");
-                     printf("[Sandbox-Monitor] Reason: usage (%llu ticks) or faults (%lu) > threshold.\n", current_ticks, majflt);
+                     if (detected) {
+                         printf("[Sandbox-Monitor] Reason: %s pattern established.\n", detected);
+                     } else {
+                         printf("[Sandbox-Monitor] Reason: usage (%llu ticks) or faults (%lu) > threshold.\n", current_ticks, majflt);
+                     }
                      printf("[Sandbox-Monitor] 🔄 ADAPTING POLICY: Switching to STRICT enforcement (Terminating Process)...\n");
                      
                      kill(child_pid, SIGKILL);
                      child_running = 0;
+                     killed_by_monitor = 1;
                      
                      snprintf(log_data.exit_reason, sizeof(log_data.exit_reason), "POLICY_ADAPATION_KILL");
                 }
             }
 
+            // Wall-clock limit (server clients cannot kill a sandbox they do not own)
+            if (child_running && config->time_limit_ms > 0 && elapsed > config->time_limit_ms) {
+                printf("[Sandbox-Monitor] Time limit (%ld ms) exceeded. Terminating process...\n", config->time_limit_ms);
+                kill(child_pid, SIGKILL);
+                child_running = 0;
+                killed_by_monitor = 1;
+                snprintf(log_data.exit_reason, sizeof(log_data.exit_reason), "TIME_LIMIT_EXCEEDED");
+            }
 
-            
-            usleep(100000); // 100ms sample rate
-        } else if (result == -1) {
-            perror("waitpid");
+
+            // Adaptive sample rate: back off while stable, tighten on change
+            interval_ms = schedule_next_interval(&schedule, current_cpu_percent, current_mem);
+            log_data.monitor_us += get_monotonic_us() - tick_start_us;
+        } else if (event == -1) {
+            perror("supervisor_wait");
             child_running = 0;
         } else {
-            // Child exited
+            // Child exited (already reaped into status)
+            end_time = get_current_time_ms();
             child_running = 0;
         }
     }
     
-    long end_time = get_current_time_ms();
+    if (end_time == 0) {
+        end_time = get_current_time_ms();
+    }
     log_data.runtime_ms = end_time - start_time;
 
+    supervisor_close(&supervisor);
+    telemetry_ring_close(&ring);
+    if (log_data.cgroup_source) {
+        cgroup_sampler_close(&cgroup_sampler);
+    } else if (sampler_ok) {
+        proc_sampler_close(&sampler);
+    }
+
+    // Store the last, partially folded group of samples
+    flush_samples(&log_data);
+
     /*
      * Final CPU Usage Summary
      * 
-     * We take the peak CPU% from all the timeline samples.
+     * We take the peak CPU% from all the samples.
      * This is more accurate than trying to compute an overall average
      * because the delta-based calculation in the monitoring loop already
      * provides correct instantaneous CPU% values.
      * 
      * The peak_cpu value represents the maximum CPU usage observed
-     * during any 100ms sampling interval during the process lifetime.
+     * during any CPU_WINDOW_MS averaging window during the process lifetime.
      */
     if (log_data.sample_count > 0) {
-        // Find peak CPU from timeline samples
-        int peak = 0;
-        for (int i = 0; i < log_data.sample_count; i++) {
-            if (log_data.samples[i].cpu_percent > peak) {
-                peak = log_data.samples[i].cpu_percent;
-            }
-        }
-        log_data.cpu_usage_percent = peak;
+        // Tracked per raw sample: downsampled timeline entries are averages
+        log_data.cpu_usage_percent = log_data.cpu_peak_percent;
     } else {
         // No samples collected (process exited too quickly)
         log_data.cpu_usage_percent = 0;
     }
 
 
-    if (WIFEXITED(status)) {
+    if (killed_by_monitor) {
+        // Reap the killed child; exit_reason was already set by the monitor
+        waitpid(child_pid, &status, 0);
+        snprintf(log_data.termination_signal, sizeof(log_data.termination_signal), "SIG%d", SIGKILL);
+    } else if (WIFEXITED(status)) {
         printf("[Sandbox-Parent] Child exited with status: %d\n", WEXITSTATUS(status));
         snprintf(log_data.exit_reason, sizeof(log_data.exit_reason), "EXITED(%d)", WEXITSTATUS(status));
     } else if (WIFSIGNALED(status)) {
@@ -395,9 +662,938 @@ int main(int argc, char *argv[]) {
     // Generate Log Filename with PID for uniqueness
     char filename[128];
     snprintf(filename, sizeof(filename), "logs/run_%d_%ld.json", child_pid, time(NULL));
+
+    if (result) {
+        result->child_pid = child_pid;
+        snprintf(result->log_path, sizeof(result->log_path), "%s", filename);
+        snprintf(result->exit_reason, sizeof(result->exit_reason), "%s", log_data.exit_reason);
+        result->startup_mode = log_data.startup_mode;
+        result->launch_us = launch_us;
+        result->exec_us = exec_us;
+    }
+
     log_telemetry(filename, &log_data, child_pid);
 
+    telemetry_stream_end(&stream, &log_data, filename);
+    telemetry_stream_close(&stream);
+
+    return 0;
+}
+
+static int parse_profile(const char *name, sandbox_profile_t *profile, const char **profile_str) {
+    if (strcmp(name, "STRICT") == 0) {
+        *profile = PROFILE_STRICT;
+        *profile_str = "STRICT";
+    } else if (strcmp(name, "RESOURCE-AWARE") == 0) {
+        *profile = PROFILE_RESOURCE_AWARE;
+        *profile_str = "RESOURCE-AWARE";
+    } else if (strcmp(name, "LEARNING") == 0) {
+        *profile = PROFILE_LEARNING;
+        *profile_str = "LEARNING";
+    } else {
+        return -1;
+    }
+    return 0;
+}
+
+// -------------------------------------------------------------
+// WARM NAMESPACES (--repeat, --server)
+// A holder process creates the namespaces once and sleeps in them as
+// PID 1; each iteration's child joins them with setns() instead of paying
+// for CLONE_NEW* and the root remount again.
+//
+// The iteration's child is not PID 1 of the PID namespace, so whatever it
+// leaves behind would outlive it: forked processes are reparented to the
+// holder, SysV IPC objects stay in the IPC namespace, and mounts (LEARNING
+// allows mount(2)) stay in the mount namespace. After every warm iteration
+// the launcher asks the holder to scrub the namespaces back to their
+// initial state (warm_sandbox_scrub); if the mount table cannot be
+// restored, the scrub fails and the holder is discarded.
+// -------------------------------------------------------------
+typedef struct {
+    pid_t holder_pid;
+    int ns_fds[WARM_NS_COUNT];   // Order of warm_ns_names
+    int ctl_fd;                  // Launcher end of the holder's control socket
+    char *stack;
+    long setup_us;               // Holder creation + namespace setup
+} warm_sandbox_t;
+
+// Control socketpair: [0] launcher end, [1] holder end. The holder sends
+// WARM_READY once set up, then answers each WARM_SCRUB with WARM_SCRUBBED
+// (or WARM_SCRUB_FAILED when the namespaces could not be restored).
+static int warm_ctl[2];
+#define WARM_READY 'R'
+#define WARM_SCRUB 'S'
+#define WARM_SCRUBBED 'D'
+#define WARM_SCRUB_FAILED 'F'
+
+// Hostname and domain name the holder started with (restored by scrubs)
+static char warm_hostname[HOST_NAME_MAX + 1];
+static char warm_domainname[HOST_NAME_MAX + 1];
+
+// Mount table right after the holder locked the root (restored by scrubs)
+static char *warm_mountinfo;
+// Upper bound on the mounts one iteration may leave behind
+#define WARM_MAX_UNMOUNTS 256
+
+// Contents of /proc/self/mountinfo, NUL-terminated; NULL on failure
+static char *read_mountinfo(void) {
+    int fd = open("/proc/self/mountinfo", O_RDONLY | O_CLOEXEC);
+    if (fd < 0) return NULL;
+    size_t size = 4096, len = 0;
+    char *buf = malloc(size);
+    for (;;) {
+        if (!buf) break;
+        if (len + 1 >= size) {
+            char *bigger = realloc(buf, size *= 2);
+            if (!bigger) {
+                free(buf);
+                buf = NULL;
+                break;
+            }
+            buf = bigger;
+        }
+        ssize_t n = read(fd, buf + len, size - len - 1);
+        if (n < 0 && errno == EINTR) continue;
+        if (n < 0) {
+            free(buf);
+            buf = NULL;
+            break;
+        }
+        if (n == 0) {
+            buf[len] = '\0';
+            break;
+        }
+        len += n;
+    }
+    close(fd);
+    return buf;
+}
+
+// Whether mount ID `id` is in the holder's initial mount table
+static int warm_mount_known(int id) {
+    char needle[24];
+    int n = snprintf(needle, sizeof(needle), "%d ", id);
+    for (const char *line = warm_mountinfo; line && *line; ) {
+        if (strncmp(line, needle, n) == 0) return 1;
+        line = strchr(line, '\n');
+        if (line) line++;
+    }
+    return 0;
+}
+
+// Mount point field of a mountinfo line: octal escapes (\040 etc.) decoded
+static void mountinfo_path(const char *field, char *out, size_t out_size) {
+    size_t o = 0;
+    while (*field && *field != ' ' && *field != '\n' && o + 1 < out_size) {
+        if (field[0] == '\\' && field[1] >= '0' && field[1] <= '3' &&
+            field[2] >= '0' && field[2] <= '7' && field[3] >= '0' && field[3] <= '7') {
+            out[o++] = (char)((field[1] - '0') * 64 + (field[2] - '0') * 8 + (field[3] - '0'));
+            field += 4;
+        } else {
+            out[o++] = *field++;
+        }
+    }
+    out[o] = '\0';
+}
+
+// Puts the holder's mount namespace back to its initial table: unmounts
+// every mount the iteration added (newest first, so stacked mounts come
+// off top-down), re-locks the root read-only (undoing a remount rw), then
+// compares with the snapshot. Changes it cannot undo (e.g. options of
+// another pre-existing mount) make it fail.
+//
+// Returns: 0 if the mount table matches the snapshot, -1 otherwise
+static int warm_holder_restore_mounts(void) {
+    if (!warm_mountinfo) return -1;
+    char path[PATH_MAX];
+    for (int i = 0; i < WARM_MAX_UNMOUNTS; i++) {
+        char *info = read_mountinfo();
+        if (!info) return -1;
+        // mountinfo lists mounts in creation order: keep the last new one
+        int found = 0;
+        for (char *line = info; *line; ) {
+            int id, point = -1;
+            if (sscanf(line, "%d %*d %*s %*s %n", &id, &point) == 1 && point > 0 &&
+                !warm_mount_known(id)) {
+                mountinfo_path(line + point, path, sizeof(path));
+                found = 1;
+            }
+            char *next = strchr(line, '\n');
+            if (!next) break;
+            line = next + 1;
+        }
+        free(info);
+        if (!found) break;
+        if (umount2(path, MNT_DETACH) != 0) {
+            perror("umount leftover mount");
+            return -1;
+        }
+    }
+
+    // Quiet equivalent of lock_root_filesystem() (propagation is checked below)
+    if (mount(NULL, "/", NULL, MS_REMOUNT | MS_BIND | MS_RDONLY, NULL) != 0) {
+        perror("mount / read-only");
+        return -1;
+    }
+
+    char *info = read_mountinfo();
+    int same = info && strcmp(info, warm_mountinfo) == 0;
+    free(info);
+    return same ? 0 : -1;
+}
+
+union warm_semun {
+    int val;
+    struct semid_ds *buf;
+    unsigned short *array;
+    struct seminfo *__buf;
+};
+
+// Removes every SysV shared memory segment, semaphore set and message
+// queue in the caller's IPC namespace
+static void remove_ipc_objects(void) {
+    struct shm_info shm_info;
+    struct shmid_ds shm;
+    int max_index = shmctl(0, SHM_INFO, (struct shmid_ds *)&shm_info);
+    for (int i = 0; i <= max_index; i++) {
+        int id = shmctl(i, SHM_STAT, &shm);
+        if (id >= 0) shmctl(id, IPC_RMID, NULL);
+    }
+
+    struct seminfo sem_info;
+    struct semid_ds sem;
+    union warm_semun arg = {.__buf = &sem_info};
+    max_index = semctl(0, 0, SEM_INFO, arg);
+    arg.buf = &sem;
+    for (int i = 0; i <= max_index; i++) {
+        int id = semctl(i, 0, SEM_STAT, arg);
+        if (id >= 0) semctl(id, 0, IPC_RMID);
+    }
+
+    struct msginfo msg_info;
+    struct msqid_ds msg;
+    max_index = msgctl(0, MSG_INFO, (struct msqid_ds *)&msg_info);
+    for (int i = 0; i <= max_index; i++) {
+        int id = msgctl(i, MSG_STAT, &msg);
+        if (id >= 0) msgctl(id, IPC_RMID, NULL);
+    }
+}
+
+// Runs in the holder: leave it the only process in its namespaces and put
+// their state back as it was at setup.
+//
+// Returns: 0 on success, -1 if the mount table could not be restored
+static int warm_holder_scrub(void) {
+    // As PID 1, kill(-1) reaches every other process in the PID namespace
+    // (and nothing outside it). Children are auto-reaped (SIGCHLD ignored),
+    // so waitpid blocks until all of them are gone, then fails with ECHILD.
+    while (kill(-1, SIGKILL) == 0) {
+        while (waitpid(-1, NULL, 0) >= 0 || errno == EINTR) {}
+    }
+
+    remove_ipc_objects();
+    if (sethostname(warm_hostname, strlen(warm_hostname)) != 0) perror("sethostname");
+    if (setdomainname(warm_domainname, strlen(warm_domainname)) != 0) perror("setdomainname");
+    // Last: no process is left that could mount again
+    return warm_holder_restore_mounts();
+}
+
+// PID 1 of the warm namespaces: lock the root once, then serve scrub
+// requests until the launcher closes the control socket
+static int warm_holder_fn(void *arg) {
+    (void)arg;
+    prctl(PR_SET_PDEATHSIG, SIGKILL);
+    // Orphans reparented to us are reaped by the kernel
+    signal(SIGCHLD, SIG_IGN);
+    lock_root_filesystem();
+    gethostname(warm_hostname, sizeof(warm_hostname) - 1);
+    getdomainname(warm_domainname, sizeof(warm_domainname) - 1);
+    // Without a snapshot every scrub fails, i.e. each holder serves one run
+    warm_mountinfo = read_mountinfo();
+
+    close(warm_ctl[0]);
+    int fd = warm_ctl[1];
+    char msg = WARM_READY;
+    if (write(fd, &msg, 1) != 1) {
+        return 1;
+    }
+
+    for (;;) {
+        ssize_t n = read(fd, &msg, 1);
+        if (n < 0 && errno == EINTR) continue;
+        if (n != 1) return 0;  // Launcher is done with us
+        if (msg != WARM_SCRUB) continue;
+
+        msg = warm_holder_scrub() == 0 ? WARM_SCRUBBED : WARM_SCRUB_FAILED;
+        if (write(fd, &msg, 1) != 1) return 1;
+    }
+}
+
+static void warm_sandbox_destroy(warm_sandbox_t *warm) {
+    for (int i = 0; i < WARM_NS_COUNT; i++) {
+        if (warm->ns_fds[i] >= 0) close(warm->ns_fds[i]);
+        warm->ns_fds[i] = -1;
+    }
+    if (warm->ctl_fd >= 0) {
+        close(warm->ctl_fd);
+        warm->ctl_fd = -1;
+    }
+    if (warm->holder_pid > 0) {
+        kill(warm->holder_pid, SIGKILL);
+        waitpid(warm->holder_pid, NULL, 0);
+        warm->holder_pid = 0;
+    }
+    free(warm->stack);
+    warm->stack = NULL;
+}
+
+/**
+ * Starts the holder and opens its namespaces. The process that will clone
+ * the sandboxed children still has to enter the holder's PID namespace
+ * (warm_sandbox_enter_pid_ns).
+ *
+ * Returns: 0 on success, -1 if the caller should fall back to cold starts
+ */
+static int warm_sandbox_create(warm_sandbox_t *warm) {
+    long long start_us = get_monotonic_us();
+
+    warm->holder_pid = 0;
+    warm->ctl_fd = -1;
+    for (int i = 0; i < WARM_NS_COUNT; i++) warm->ns_fds[i] = -1;
+    warm->stack = malloc(STACK_SIZE);
+    if (!warm->stack) {
+        perror("malloc holder stack");
+        return -1;
+    }
+
+    if (socketpair(AF_UNIX, SOCK_STREAM | SOCK_CLOEXEC, 0, warm_ctl) != 0) {
+        perror("socketpair");
+        warm_sandbox_destroy(warm);
+        return -1;
+    }
+    warm->ctl_fd = warm_ctl[0];
+
+    fflush(stdout);
+    warm->holder_pid = clone(warm_holder_fn, warm->stack + STACK_SIZE,
+                             CLONE_NEWNS | CLONE_NEWPID | CLONE_NEWIPC | CLONE_NEWUTS | CLONE_NEWUSER | SIGCHLD,
+                             NULL);
+    close(warm_ctl[1]);
+    if (warm->holder_pid == -1) {
+        perror("clone holder");
+        warm->holder_pid = 0;
+        warm_sandbox_destroy(warm);
+        return -1;
+    }
+
+    char ready = 0;
+    ssize_t n;
+    while ((n = read(warm->ctl_fd, &ready, 1)) < 0 && errno == EINTR) {}
+    if (n != 1 || ready != WARM_READY) {
+        fprintf(stderr, "[Sandbox-Batch] Namespace holder exited during setup\n");
+        warm_sandbox_destroy(warm);
+        return -1;
+    }
+
+    char path[64];
+    for (int i = 0; i < WARM_NS_COUNT; i++) {
+        snprintf(path, sizeof(path), "/proc/%d/ns/%s", warm->holder_pid, warm_ns_names[i]);
+        warm->ns_fds[i] = open(path, O_RDONLY | O_CLOEXEC);
+        if (warm->ns_fds[i] < 0) {
+            perror(path);
+            warm_sandbox_destroy(warm);
+            return -1;
+        }
+    }
+
+    warm->setup_us = (long)(get_monotonic_us() - start_us);
+    return 0;
+}
+
+/**
+ * Makes every later clone() of the calling process land in the holder's
+ * PID namespace. A process cannot move itself into another PID namespace,
+ * only its future children; so the cloning process enters it, not the child.
+ *
+ * Returns: 0 on success, -1 on failure
+ */
+static int warm_sandbox_enter_pid_ns(const warm_sandbox_t *warm) {
+    char path[64];
+    snprintf(path, sizeof(path), "/proc/%d/ns/pid", warm->holder_pid);
+    int pid_fd = open(path, O_RDONLY | O_CLOEXEC);
+    if (pid_fd < 0 || setns(pid_fd, CLONE_NEWPID) != 0) {
+        perror("setns(pid)");
+        if (pid_fd >= 0) close(pid_fd);
+        return -1;
+    }
+    close(pid_fd);
+    return 0;
+}
+
+/**
+ * Has the holder kill everything the last iteration left running in the
+ * warm namespaces, remove its IPC objects and undo its mounts; blocks
+ * until done.
+ *
+ * Returns: 0 on success, -1 if the holder is gone or could not restore
+ *          the namespaces (either way they must not be reused)
+ */
+static int warm_sandbox_scrub(warm_sandbox_t *warm) {
+    char msg = WARM_SCRUB;
+    ssize_t n;
+    while ((n = write(warm->ctl_fd, &msg, 1)) < 0 && errno == EINTR) {}
+    if (n != 1) return -1;
+    while ((n = read(warm->ctl_fd, &msg, 1)) < 0 && errno == EINTR) {}
+    return n == 1 && msg == WARM_SCRUBBED ? 0 : -1;
+}
+
+// =============================================================
+// SERVER MODE (Zygote)
+// A long-lived launcher keeps everything that does not depend on the
+// request ready: one compiled BPF program per profile, the clone stack,
+// the logs directory and a pool of warm namespace holders. Each request is
+// handled by a forked supervisor that inherits this template and takes an
+// idle holder: its child joins the holder's namespaces with setns(), so the
+// per-run cost is a plain clone + execv. The supervisor scrubs the holder
+// after the run; with every holder busy, the request starts cold.
+//
+// Only root and the server's own user may connect (socket mode 0660 and
+// SO_PEERCRED): the supervisor joins whatever cgroup the request names.
+//
+// Protocol (one request per connection, tab-separated, newline-terminated):
+//   RUN <profile> <time_limit_ms> <cgroup_path|-> <executable> [args...]
+// Reply:
+//   OK <child_pid> <log_path> <exit_reason> <cold|warm> <launch_us> <exec_us>
+//   ERR <message>
+// =============================================================
+
+static struct sock_fprog compiled_filters[NUM_PROFILES];
+static volatile sig_atomic_t server_running = 1;
+
+// Warm holders owned by the server; pool_user is the supervisor using a
+// holder, 0 if idle, -1 if the holder is unavailable
+#define WARM_POOL_SIZE 4
+static warm_sandbox_t warm_pool[WARM_POOL_SIZE];
+static pid_t warm_pool_user[WARM_POOL_SIZE];
+
+// Supervisor exit status: the holder it used was lost during the scrub
+#define SUPERVISOR_WARM_LOST 3
+
+static void handle_server_signal(int sig) {
+    (void)sig;
+    server_running = 0;
+}
+
+static void send_reply(int conn_fd, const char *reply) {
+    size_t len = strlen(reply);
+    while (len > 0) {
+        ssize_t n = write(conn_fd, reply, len);
+        if (n <= 0) return;
+        reply += n;
+        len -= n;
+    }
+}
+
+// Move the calling process into a cgroup v2 group (children inherit it)
+// Returns: 0 on success, -1 if the group cannot be joined
+static int join_cgroup(const char *cgroup_path) {
+    char procs_path[512];
+    snprintf(procs_path, sizeof(procs_path), "%s/cgroup.procs", cgroup_path);
+
+    FILE *fp = fopen(procs_path, "w");
+    if (!fp) {
+        fprintf(stderr, "[Sandbox-Server] WARNING: cannot join cgroup %s (Demo Mode)\n", cgroup_path);
+        return -1;
+    }
+    fprintf(fp, "%d", getpid());
+    return fclose(fp) == 0 ? 0 : -1;
+}
+
+/**
+ * Runs in the forked supervisor: parse one request, run it (in `warm`'s
+ * namespaces if given), reply, then scrub `warm` for the next request.
+ *
+ * Returns: 0, or -1 if `warm` could not be scrubbed (must not be reused)
+ */
+static int handle_request(int conn_fd, char *stack, warm_sandbox_t *warm) {
+    char request[MAX_REQUEST_LEN];
+    size_t used = 0;
+
+    // Read until newline (requests are small, one per connection)
+    while (used < sizeof(request) - 1) {
+        ssize_t n = read(conn_fd, request + used, sizeof(request) - 1 - used);
+        if (n <= 0) break;
+        used += n;
+        if (memchr(request, '\n', used)) break;
+    }
+    request[used] = '\0';
+    char *newline = strchr(request, '\n');
+    if (!newline) {
+        send_reply(conn_fd, "ERR malformed request\n");
+        return 0;
+    }
+    *newline = '\0';
+
+    char *fields[MAX_REQUEST_ARGS + 6];
+    int nfields = 0;
+    char *saveptr = NULL;
+    for (char *tok = strtok_r(request, "\t", &saveptr);
+         tok && nfields < MAX_REQUEST_ARGS + 5;
+         tok = strtok_r(NULL, "\t", &saveptr)) {
+        fields[nfields++] = tok;
+    }
+    fields[nfields] = NULL;
+
+    if (nfields < 5 || strcmp(fields[0], "RUN") != 0) {
+        send_reply(conn_fd, "ERR expected: RUN <profile> <time_limit_ms> <cgroup|-> <executable> [args...]\n");
+        return 0;
+    }
+
+    struct container_config config;
+    if (parse_profile(fields[1], &config.profile, &config.profile_name) != 0) {
+        send_reply(conn_fd, "ERR unknown profile\n");
+        return 0;
+    }
+    config.time_limit_ms = atol(fields[2]);
+    config.adapt = 1;
+    config.binary_path = fields[4];
+    config.args = &fields[4];
+    config.filter = &compiled_filters[config.profile];
+    config.sample_min_ms = DEFAULT_SAMPLE_MIN_MS;
+    config.sample_max_ms = DEFAULT_SAMPLE_MAX_MS;
+    config.max_samples = MAX_SAMPLES;
+    config.stream_path = LIVE_TELEMETRY_SOCKET;
+    config.ring_path = NULL;
+    config.cgroup_path = NULL;
+    config.warm_ns_fds = NULL;
+    config.batch_id = NULL;
+    config.batch_iteration = 0;
+    config.batch_size = 0;
+    config.namespace_setup_us = 0;
+    config.exec_report_fd = -1;
+
+    // Sample the cgroup only if the supervisor (and so the child) is in it
+    if (strcmp(fields[3], "-") != 0 && join_cgroup(fields[3]) == 0) {
+        config.cgroup_path = fields[3];
+    }
+
+    if (warm && warm_sandbox_enter_pid_ns(warm) == 0) {
+        config.warm_ns_fds = warm->ns_fds;
+        config.namespace_setup_us = warm->setup_us;
+    }
+
+    printf("[Sandbox-Server] Request: %s (Profile: %s, %s start)\n", config.binary_path,
+           config.profile_name, config.warm_ns_fds ? "warm" : "cold");
+
+    struct run_result result;
+    char reply[320];
+    if (run_sandbox(&config, stack, &result) != 0) {
+        snprintf(reply, sizeof(reply), "ERR clone failed: %s\n", strerror(errno));
+    } else {
+        snprintf(reply, sizeof(reply), "OK\t%d\t%s\t%s\t%s\t%ld\t%ld\n",
+                 result.child_pid, result.log_path, result.exit_reason,
+                 result.startup_mode, result.launch_us, result.exec_us);
+    }
+    send_reply(conn_fd, reply);
+
+    // Whatever the run left behind must not reach the next request
+    return warm && warm_sandbox_scrub(warm) != 0 ? -1 : 0;
+}
+
+// Only root and the server's own user may submit runs
+static int peer_allowed(int conn_fd) {
+    struct ucred cred;
+    socklen_t len = sizeof(cred);
+    if (getsockopt(conn_fd, SOL_SOCKET, SO_PEERCRED, &cred, &len) != 0) {
+        perror("SO_PEERCRED");
+        return 0;
+    }
+    return cred.uid == 0 || cred.uid == geteuid();
+}
+
+// (Re)creates holder `i` of the pool; it is left unavailable on failure
+static void warm_pool_fill(int i) {
+    warm_pool_user[i] = warm_sandbox_create(&warm_pool[i]) == 0 ? 0 : -1;
+}
+
+// Bookkeeping for an exited child of the server (a supervisor or a holder)
+static void warm_pool_reap(pid_t pid, int status) {
+    for (int i = 0; i < WARM_POOL_SIZE; i++) {
+        if (warm_pool_user[i] == pid) {
+            int lost = WIFEXITED(status) && WEXITSTATUS(status) == SUPERVISOR_WARM_LOST;
+            if (!lost) {
+                warm_pool_user[i] = 0;
+                return;
+            }
+            fprintf(stderr, "[Sandbox-Server] Warm holder %d lost; recreating\n", i);
+            warm_sandbox_destroy(&warm_pool[i]);
+            warm_pool_fill(i);
+            return;
+        }
+        if (warm_pool_user[i] >= 0 && warm_pool[i].holder_pid == pid) {
+            // Holder died on its own; a supervisor using it reports the loss
+            warm_pool[i].holder_pid = 0;
+            if (warm_pool_user[i] == 0) {
+                warm_sandbox_destroy(&warm_pool[i]);
+                warm_pool_fill(i);
+            }
+            return;
+        }
+    }
+}
+
+static int run_server(const char *socket_path) {
+    printf("[Sandbox-Server] Loading compiled seccomp filters...\n");
+    for (int p = 0; p < NUM_PROFILES; p++) {
+        if (get_cached_syscall_filter((sandbox_profile_t)p, &compiled_filters[p]) != 0) {
+            fprintf(stderr, "[Sandbox-Server] Failed to compile filter for profile %d\n", p);
+            return 1;
+        }
+    }
+
+    ensure_logs_directory();
+
+    // Template stack: every supervisor inherits it copy-on-write
+    char *stack = malloc(STACK_SIZE);
+    if (!stack) {
+        perror("malloc stack");
+        return 1;
+    }
+
+    int listen_fd = socket(AF_UNIX, SOCK_STREAM | SOCK_CLOEXEC, 0);
+    if (listen_fd < 0) {
+        perror("socket");
+        free(stack);
+        return 1;
+    }
+
+    struct sockaddr_un addr = {0};
+    addr.sun_family = AF_UNIX;
+    if (strlen(socket_path) >= sizeof(addr.sun_path)) {
+        fprintf(stderr, "[Sandbox-Server] Socket path too long: %s\n", socket_path);
+        close(listen_fd);
+        free(stack);
+        return 1;
+    }
+    strcpy(addr.sun_path, socket_path);
+    unlink(socket_path);
+
+    // Created as 0660 (no window with a wider mode, unlike a later chmod)
+    mode_t old_umask = umask(0117);
+    int bound = bind(listen_fd, (struct sockaddr *)&addr, sizeof(addr));
+    umask(old_umask);
+    if (bound != 0 || listen(listen_fd, 64) != 0) {
+        perror("bind/listen");
+        close(listen_fd);
+        free(stack);
+        return 1;
+    }
+
+    int warm_holders = 0;
+    for (int i = 0; i < WARM_POOL_SIZE; i++) {
+        warm_pool_fill(i);
+        warm_holders += warm_pool_user[i] == 0;
+    }
+    printf("[Sandbox-Server] %d/%d warm namespace holders ready\n", warm_holders, WARM_POOL_SIZE);
+
+    // Supervisors and holders are reaped in the accept loop; SIGINT/SIGTERM stop it
+    struct sigaction sa = {0};
+    sa.sa_handler = handle_server_signal;
+    sigaction(SIGINT, &sa, NULL);
+    sigaction(SIGTERM, &sa, NULL);
+
+    setvbuf(stdout, NULL, _IOLBF, 0);
+    printf("[Sandbox-Server] Listening on %s\n", socket_path);
+
+    while (server_running) {
+        int conn_fd = accept4(listen_fd, NULL, NULL, SOCK_CLOEXEC);
+        if (conn_fd < 0) {
+            if (errno == EINTR) continue;
+            perror("accept");
+            break;
+        }
+        if (!peer_allowed(conn_fd)) {
+            send_reply(conn_fd, "ERR permission denied\n");
+            close(conn_fd);
+            continue;
+        }
+
+        // Free the holders of finished supervisors before picking one
+        int status;
+        pid_t done;
+        while ((done = waitpid(-1, &status, WNOHANG)) > 0) {
+            warm_pool_reap(done, status);
+        }
+        int slot = -1;
+        for (int i = 0; i < WARM_POOL_SIZE && slot < 0; i++) {
+            if (warm_pool_user[i] == 0) slot = i;
+        }
+
+        fflush(stdout);
+        pid_t supervisor = fork();
+        if (supervisor == 0) {
+            signal(SIGINT, SIG_DFL);
+            signal(SIGTERM, SIG_DFL);
+            close(listen_fd);
+            int ok = handle_request(conn_fd, stack, slot >= 0 ? &warm_pool[slot] : NULL) == 0;
+            close(conn_fd);
+            _exit(ok ? 0 : SUPERVISOR_WARM_LOST);
+        } else if (supervisor < 0) {
+            perror("fork supervisor");
+            send_reply(conn_fd, "ERR server overloaded\n");
+        } else if (slot >= 0) {
+            warm_pool_user[slot] = supervisor;
+        }
+        close(conn_fd);
+    }
+
+    printf("[Sandbox-Server] Shutting down\n");
+    close(listen_fd);
+    unlink(socket_path);
+    for (int i = 0; i < WARM_POOL_SIZE; i++) {
+        if (warm_pool_user[i] >= 0) warm_sandbox_destroy(&warm_pool[i]);
+    }
+    for (int p = 0; p < NUM_PROFILES; p++) {
+        free(compiled_filters[p].filter);
+    }
     free(stack);
     return 0;
 }
 
+static int compare_long(const void *a, const void *b) {
+    long x = *(const long *)a, y = *(const long *)b;
+    return (x > y) - (x < y);
+}
+
+/**
+ * --repeat=N: runs the same program N times, all but the first in warm
+ * namespaces. Iteration 1 starts cold so the logs record both costs.
+ */
+static int run_batch(struct container_config *config, char *stack, int iterations, const char *batch_id) {
+    warm_sandbox_t warm;
+    int warm_ok = 0;
+    long *launch_us = calloc(iterations, sizeof(long));
+    if (!launch_us) {
+        perror("calloc");
+        return -1;
+    }
+
+    config->batch_id = batch_id;
+    config->batch_size = iterations;
+
+    int failures = 0;
+    for (int i = 0; i < iterations; i++) {
+        if (i == 1) {
+            warm_ok = warm_sandbox_create(&warm) == 0;
+            if (warm_ok && warm_sandbox_enter_pid_ns(&warm) != 0) {
+                warm_sandbox_destroy(&warm);
+                warm_ok = 0;
+            }
+            if (warm_ok) {
+                config->warm_ns_fds = warm.ns_fds;
+                config->namespace_setup_us = warm.setup_us;
+            } else {
+                fprintf(stderr, "[Sandbox-Batch] Warm namespaces unavailable; every iteration starts cold\n");
+            }
+        }
+
+        config->batch_iteration = i + 1;
+        struct run_result result = {0};
+        if (run_sandbox(config, stack, &result) != 0) {
+            failures++;
+            launch_us[i] = -1;
+        } else {
+            launch_us[i] = result.launch_us;
+        }
+
+        // Nothing from this iteration may leak into the next one (or count
+        // against its RLIMIT_NPROC and cgroup deltas)
+        if (config->warm_ns_fds && warm_sandbox_scrub(&warm) != 0) {
+            fprintf(stderr, "[Sandbox-Batch] Namespace holder lost or not restorable; remaining iterations start cold\n");
+            warm_sandbox_destroy(&warm);
+            warm_ok = 0;
+            config->warm_ns_fds = NULL;
+        }
+    }
+
+    // Summary: cold launch vs. median warm launch (sorted in place)
+    long cold_us = launch_us[0];
+    int warm_count = 0;
+    for (int i = 1; i < iterations; i++) {
+        if (launch_us[i] >= 0) launch_us[warm_count++] = launch_us[i];
+    }
+    qsort(launch_us, warm_count, sizeof(long), compare_long);
+
+    printf("[Sandbox-Batch] %s: %d iterations, %d failed\n", batch_id, iterations, failures);
+    printf("[Sandbox-Batch] cold launch: %ldus\n", cold_us);
+    if (warm_ok && warm_count > 0) {
+        printf("[Sandbox-Batch] warm launch p50: %ldus (namespace setup paid once: %ldus)\n",
+               launch_us[warm_count / 2], warm.setup_us);
+    }
+
+    if (warm_ok) warm_sandbox_destroy(&warm);
+    config->warm_ns_fds = NULL;
+    free(launch_us);
+    return failures ? -1 : 0;
+}
+
+void print_usage(const char *prog) {
+    fprintf(stderr, "Usage: %s [--profile=STRICT|RESOURCE-AWARE|LEARNING] [--sample-min-ms=N] [--sample-max-ms=N] [--max-samples=N] [--cgroup=<dir>] [--stream=<socket>] [--ring=<path>] [--repeat=N [--batch-id=<id>]] [--no-adapt] <executable> [args...]\n", prog);
+    fprintf(stderr, "       %s --server=<socket_path>\n", prog);
+    fprintf(stderr, "       %s --compile-filters\n", prog);
+}
+
+// Rebuild the BPF cache for every profile (e.g. after editing the rules)
+static int compile_filters(void) {
+    for (int p = 0; p < NUM_PROFILES; p++) {
+        struct sock_fprog prog;
+        char path[256];
+        bpf_cache_path((sandbox_profile_t)p, path, sizeof(path));
+
+        if (compile_syscall_filter((sandbox_profile_t)p, &prog) != 0 ||
+            write_cached_filter(path, &prog) != 0) {
+            fprintf(stderr, "Failed to compile filter cache %s\n", path);
+            return 1;
+        }
+        printf("[Sandbox] %s: %u instructions\n", path, prog.len);
+        free(prog.filter);
+    }
+    return 0;
+}
+
+int main(int argc, char *argv[]) {
+    if (argc < 2) {
+        print_usage(argv[0]);
+        return 1;
+    }
+
+    if (strncmp(argv[1], "--server=", 9) == 0) {
+        return run_server(argv[1] + 9);
+    }
+
+    if (strcmp(argv[1], "--compile-filters") == 0) {
+        return compile_filters();
+    }
+
+    // Default profile
+    sandbox_profile_t profile = PROFILE_STRICT;
+    const char *profile_str = "STRICT";
+    
+    int sample_min_ms = DEFAULT_SAMPLE_MIN_MS;
+    int sample_max_ms = DEFAULT_SAMPLE_MAX_MS;
+    int max_samples = MAX_SAMPLES;
+    const char *stream_path = LIVE_TELEMETRY_SOCKET;
+    const char *ring_path = NULL;
+    const char *cgroup_path = NULL;
+    int repeat = 1;
+    const char *batch_id = NULL;
+    int adapt = 1;
+    
+    int bin_index = 1;
+    while (bin_index < argc && strncmp(argv[bin_index], "--", 2) == 0) {
+        char *opt = argv[bin_index];
+        if (strncmp(opt, "--profile=", 10) == 0) {
+            char *pinfo = opt + 10;
+            if (parse_profile(pinfo, &profile, &profile_str) != 0) {
+                 fprintf(stderr, "Unknown profile: %s. Using STRICT.\n", pinfo);
+            }
+        } else if (strncmp(opt, "--sample-min-ms=", 16) == 0) {
+            sample_min_ms = atoi(opt + 16);
+        } else if (strncmp(opt, "--sample-max-ms=", 16) == 0) {
+            sample_max_ms = atoi(opt + 16);
+        } else if (strncmp(opt, "--max-samples=", 14) == 0) {
+            max_samples = atoi(opt + 14);
+            if (max_samples < 2) {
+                fprintf(stderr, "--max-samples must be at least 2\n");
+                return 1;
+            }
+        } else if (strncmp(opt, "--stream=", 9) == 0) {
+            // Live telemetry socket; --stream= (empty) disables streaming
+            stream_path = opt + 9;
+        } else if (strncmp(opt, "--ring=", 7) == 0) {
+            // Shared-memory sample ring, e.g. /dev/shm/sandbox_<id>.ring
+            ring_path = opt + 7;
+        } else if (strncmp(opt, "--cgroup=", 9) == 0) {
+            // Cgroup the launcher was placed in (e.g. by runner/sandbox.py)
+            cgroup_path = opt + 9;
+        } else if (strncmp(opt, "--repeat=", 9) == 0) {
+            // Run the program N times, reusing warm namespaces after the first
+            repeat = atoi(opt + 9);
+            if (repeat < 1) {
+                fprintf(stderr, "--repeat must be at least 1\n");
+                return 1;
+            }
+        } else if (strncmp(opt, "--batch-id=", 11) == 0) {
+            batch_id = opt + 11;
+        } else if (strcmp(opt, "--no-adapt") == 0) {
+            // LEARNING keeps detecting (logged) but never kills the run
+            adapt = 0;
+        } else {
+            fprintf(stderr, "Unknown option: %s\n", opt);
+            print_usage(argv[0]);
+            return 1;
+        }
+        bin_index++;
+    }
+
+    if (bin_index >= argc) {
+        print_usage(argv[0]);
+        return 1;
+    }
+
+    printf("[Sandbox-Parent] Preparing execution environment (Profile: %s)...\n", profile_str);
+    
+    // Ensure logs directory exists
+    ensure_logs_directory();
+
+    // Prepare child stack
+    char *stack = malloc(STACK_SIZE);
+    if (!stack) {
+        perror("malloc stack");
+        exit(1);
+    }
+    
+    // Setup config
+    struct container_config config;
+    config.binary_path = argv[bin_index];
+    config.args = &argv[bin_index]; // Pass the executable + its args
+    config.profile = profile;
+    config.profile_name = profile_str;
+    config.time_limit_ms = 0;
+    config.adapt = adapt;
+    config.sample_min_ms = sample_min_ms;
+    config.sample_max_ms = sample_max_ms;
+    config.max_samples = max_samples;
+    config.stream_path = stream_path;
+    config.ring_path = ring_path;
+    config.cgroup_path = cgroup_path;
+    config.warm_ns_fds = NULL;
+    config.batch_id = NULL;
+    config.batch_iteration = 0;
+    config.batch_size = 0;
+    config.namespace_setup_us = 0;
+    config.exec_report_fd = -1;
+
+    // D. SYSTEM CALL HANDLING: reuse the compiled program from the cache so
+    // the child only needs one prctl(PR_SET_SECCOMP); fall back to building
+    // the filter with libseccomp inside the child if that fails.
+    struct sock_fprog filter = {0};
+    config.filter = get_cached_syscall_filter(profile, &filter) == 0 ? &filter : NULL;
+
+    if (repeat > 1) {
+        char default_batch_id[32];
+        if (!batch_id) {
+            snprintf(default_batch_id, sizeof(default_batch_id), "%d", getpid());
+            batch_id = default_batch_id;
+        }
+        if (run_batch(&config, stack, repeat, batch_id) != 0) {
+            exit(1);
+        }
+    } else if (run_sandbox(&config, stack, NULL) != 0) {
+        exit(1);
+    }
+
+    free(filter.filter);
+    free(stack);
+    return 0;
+}
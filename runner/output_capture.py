@@ -0,0 +1,119 @@
+"""
+Bounded capture of a sandboxed program's stdout/stderr.
+
+communicate() buffers everything a program prints in controller memory; a
+program printing gigabytes inside its time limit can take the controller
+down with it. OutputCapture instead drains the pipe in fixed-size chunks:
+
+- the first `memory_cap // 2` bytes are kept as the head,
+- the last `memory_cap // 2` bytes are kept as the tail,
+- every byte is streamed to a per-run spill file, up to `spill_cap`.
+
+Controller memory is therefore bounded by memory_cap per stream whatever
+the program prints, and the run record says exactly what was dropped.
+"""
+
+import os
+import threading
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_MEMORY_CAP = 1024 * 1024        # bytes kept in memory per stream (head + tail)
+DEFAULT_SPILL_CAP = 256 * 1024 * 1024   # bytes written to the spill file per stream
+
+
+class OutputCapture:
+    """Head/tail in memory plus a capped spill file for one output stream"""
+
+    def __init__(self, name, spill_path=None, memory_cap=DEFAULT_MEMORY_CAP, spill_cap=DEFAULT_SPILL_CAP):
+        self.name = name
+        self.spill_path = spill_path
+        self.head_cap = memory_cap // 2
+        self.tail_cap = memory_cap - self.head_cap
+        self.spill_cap = spill_cap
+
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total_bytes = 0
+        self.spilled_bytes = 0
+        self._spill = None
+        self._thread = None
+
+    def feed(self, chunk):
+        """Account one chunk read from the pipe"""
+        self.total_bytes += len(chunk)
+
+        if len(self.head) < self.head_cap:
+            take = self.head_cap - len(self.head)
+            self.head += chunk[:take]
+            chunk = chunk[take:]
+
+        if chunk:
+            self.tail += chunk
+            if len(self.tail) > self.tail_cap:
+                del self.tail[:len(self.tail) - self.tail_cap]
+
+    def _write_spill(self, chunk):
+        if self.spill_path is None or self.spilled_bytes >= self.spill_cap:
+            return
+        if self._spill is None:
+            os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+            self._spill = open(self.spill_path, "wb")
+        data = chunk[:self.spill_cap - self.spilled_bytes]
+        self._spill.write(data)
+        self.spilled_bytes += len(data)
+
+    def drain(self, pipe):
+        """Read the pipe to EOF (blocking)"""
+        try:
+            while True:
+                chunk = pipe.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                self._write_spill(chunk)
+                self.feed(chunk)
+        finally:
+            pipe.close()
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+
+    def start(self, pipe):
+        """Drain the pipe on a background thread"""
+        self._thread = threading.Thread(target=self.drain, args=(pipe,),
+                                        name=f"capture-{self.name}", daemon=True)
+        self._thread.start()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def truncated(self):
+        """True if part of the output is no longer held in memory"""
+        return self.total_bytes > len(self.head) + len(self.tail)
+
+    def text(self):
+        """Head and tail, with a marker where bytes were dropped"""
+        if not self.truncated:
+            return (bytes(self.head) + bytes(self.tail)).decode(errors='replace')
+
+        omitted = self.total_bytes - len(self.head) - len(self.tail)
+        where = f"; full output in {self.spill_path}" if self.spill_path and self.spill_complete else ""
+        marker = f"\n... [{omitted} bytes omitted{where}] ...\n"
+        return bytes(self.head).decode(errors='replace') + marker + bytes(self.tail).decode(errors='replace')
+
+    @property
+    def spill_complete(self):
+        return self.spill_path is not None and self.spilled_bytes == self.total_bytes
+
+    def record(self):
+        """Summary for the run record"""
+        return {
+            'bytes': self.total_bytes,
+            'head_bytes': len(self.head),
+            'tail_bytes': len(self.tail),
+            'truncated': self.truncated,
+            'spill_path': self.spill_path if self.spilled_bytes else None,
+            'spill_bytes': self.spilled_bytes,
+            'spill_truncated': self.spilled_bytes < self.total_bytes if self.spill_path else None,
+        }
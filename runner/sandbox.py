@@ -7,20 +7,62 @@ import shutil
 import time
 import argparse
 import signal
+import socket
+import json
+import glob
 from pathlib import Path
+from output_capture import OutputCapture, DEFAULT_MEMORY_CAP, DEFAULT_SPILL_CAP
 
 # -------------------------------------------------------------
 # CONSTANTS & CONFIGURATION
 # -------------------------------------------------------------
 CGROUP_ROOT = "/sys/fs/cgroup"
 SANDBOX_CGROUP_PARENT = "sandbox_project"
-LAUNCHER_BIN = "./runner/launcher"
+LAUNCHER_BIN = "./runner/launcher"  # Built by make, not tracked in git
+LAUNCHER_SOURCES = ["runner/launcher.c", "runner/telemetry.c", "runner/telemetry.h",
+                    "policies/seccomp_rules.h"]
+LAUNCHER_SOCKET = "/tmp/sandbox_launcher.sock"  # launcher --server=<path>
+RING_DIR = "/dev/shm"  # launcher --ring=<path> (shared-memory sample ring)
+OUTPUT_DIR = "logs/output"  # Spilled program output + run records
+LOG_DIR = "logs"  # Launcher telemetry logs (cwd-relative, like the launcher)
 UID_MAP_OFFSET = 100000 
 GID_MAP_OFFSET = 100000
+SIZE_SUFFIXES = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def parse_size(value):
+    """Byte count with an optional K/M/G suffix, as memory.max takes them ('100M')"""
+    text = value.strip()
+    multiplier = SIZE_SUFFIXES.get(text[-1:].upper(), 1)
+    if multiplier != 1:
+        text = text[:-1]
+    try:
+        size = int(text) * multiplier
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {value!r} (expected e.g. 4096, 512K, 100M)")
+    if size < 0:
+        raise argparse.ArgumentTypeError("size must not be negative")
+    return size
+
+
+def check_launcher(launcher=LAUNCHER_BIN):
+    """Exit with a clear message if the launcher is missing or older than its sources"""
+    if not os.path.exists(launcher):
+        print(f"CRITICAL: {launcher} not found. Build it with: make")
+        sys.exit(1)
+    built = os.path.getmtime(launcher)
+    newer = [src for src in LAUNCHER_SOURCES if os.path.exists(src) and os.path.getmtime(src) > built]
+    if newer:
+        print(f"CRITICAL: {launcher} is older than {', '.join(newer)} and may lack options this "
+              f"controller passes (--ring, --repeat). Rebuild it with: make")
+        sys.exit(1)
+
 
 class SandboxController:
-    def __init__(self, cpus=0.5, memory="128M", pids=20, time_limit=5):
+    def __init__(self, cpus=0.5, memory="128M", pids=20, time_limit=5, profile="STRICT",
+                 output_cap=DEFAULT_MEMORY_CAP, spill_cap=DEFAULT_SPILL_CAP):
         self.run_id = str(uuid.uuid4())[:8]
+        self.profile = profile
         self.cgroup_path = os.path.join(CGROUP_ROOT, SANDBOX_CGROUP_PARENT, self.run_id)
         
         # Resource Limits
@@ -29,8 +71,13 @@ class SandboxController:
         self.pids_limit = str(pids)
         self.time_limit = time_limit
         
+        # Output capture: bytes held in memory / spilled to disk per stream
+        self.output_cap = output_cap
+        self.spill_cap = spill_cap
+        
         # Paths
         self.exec_path = None
+        self.ring_path = os.path.join(RING_DIR, f"sandbox_{self.run_id}.ring")
 
     def setup_cgroups(self):
         """
@@ -80,6 +127,23 @@ class SandboxController:
         if self.exec_path and os.path.exists(self.exec_path):
             os.remove(self.exec_path)
 
+        if os.path.exists(self.ring_path):
+            os.remove(self.ring_path)
+
+    def open_ring(self):
+        """
+        Attach to the running launcher's shared-memory sample ring.
+        Safe to call from another thread while run() blocks.
+        Returns a telemetry_ring.TelemetryRing, or None if the launcher has
+        not created the ring yet.
+        """
+        from telemetry_ring import TelemetryRing  # NumPy only needed when watching
+
+        try:
+            return TelemetryRing(self.ring_path)
+        except (OSError, ValueError):
+            return None
+
     def compile(self, source_path):
         """
         Compiles untrusted code.
@@ -100,10 +164,18 @@ class SandboxController:
         
         print("[Controller] Compilation Successful.")
 
-    def run(self):
+    def run(self, iterations=1):
         """
         Executes the sandbox.
+        Output is drained by OutputCapture threads (head/tail in memory, the
+        rest spilled to OUTPUT_DIR), so controller memory stays flat however
+        much the program prints.
+        iterations > 1 is a batch run: one launcher and one cgroup execute the
+        binary that many times (launcher --repeat), every run after the first
+        in warm namespaces. time_limit applies per iteration.
+        Returns: run record dict (also saved as OUTPUT_DIR/<run_id>.json)
         """
+        check_launcher()
         print(f"[Controller] Launching Process Isolation Wrapper...")
         
         # We start the wrapper using subprocess
@@ -123,7 +195,25 @@ class SandboxController:
                 
         start_time = time.time()
         
-        cmd = [LAUNCHER_BIN, self.exec_path]
+        cmd = [LAUNCHER_BIN, f"--profile={self.profile}", f"--ring={self.ring_path}"]
+        if os.path.exists(os.path.join(self.cgroup_path, "cgroup.procs")):
+            # Whole-tree telemetry from the cgroup preexec_fn puts us in
+            cmd.append(f"--cgroup={self.cgroup_path}")
+        if iterations > 1:
+            cmd += [f"--repeat={iterations}", f"--batch-id={self.run_id}"]
+        cmd.append(self.exec_path)
+        time_limit = self.time_limit * iterations
+        
+        record = {
+            'run_id': self.run_id,
+            'profile': self.profile,
+            'returncode': None,
+            'timed_out': False,
+        }
+        stdout = OutputCapture("stdout", os.path.join(OUTPUT_DIR, f"{self.run_id}.stdout"),
+                               self.output_cap, self.spill_cap)
+        stderr = OutputCapture("stderr", os.path.join(OUTPUT_DIR, f"{self.run_id}.stderr"),
+                               self.output_cap, self.spill_cap)
         
         try:
             # Running the C wrapper
@@ -133,13 +223,17 @@ class SandboxController:
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE
             )
+            stdout.start(process.stdout)
+            stderr.start(process.stderr)
             
             try:
-                stdout, stderr = process.communicate(timeout=self.time_limit)
+                process.wait(timeout=time_limit)
+                stdout.join()
+                stderr.join()
                 print("\n--- SANDBOX OUTPUT ---")
-                print(stdout.decode(errors='replace'))
+                print(stdout.text())
                 print("--- SANDBOX ERRORS ---")
-                print(stderr.decode(errors='replace'))
+                print(stderr.text())
                 
                 if process.returncode != 0:
                     print(f"Process exited with code {process.returncode}")
@@ -147,12 +241,138 @@ class SandboxController:
                     print("Execution completed successfully.")
 
             except subprocess.TimeoutExpired:
-                print(f"\n[Controller] TIMEOUT ({self.time_limit}s) EXCEEDED! Killing process...")
+                print(f"\n[Controller] TIMEOUT ({time_limit}s) EXCEEDED! Killing process...")
                 process.kill()
+                process.wait()
+                record['timed_out'] = True
+                # The sandboxed child may still hold the pipes open
+                stdout.join(timeout=1)
+                stderr.join(timeout=1)
                 print("Process terminated.")
+            
+            record['returncode'] = process.returncode
                 
         except Exception as e:
             print(f"Execution Error: {e}")
+            record['error'] = str(e)
+        
+        record['runtime_s'] = round(time.time() - start_time, 3)
+        record['stdout'] = stdout.record()
+        record['stderr'] = stderr.record()
+        for name in ('stdout', 'stderr'):
+            if record[name]['truncated']:
+                print(f"[Controller] {name}: {record[name]['bytes']} bytes, truncated in memory "
+                      f"(spill: {record[name]['spill_path']})")
+        if iterations > 1:
+            record['batch'] = self.collect_batch(iterations)
+        
+        try:
+            os.makedirs(OUTPUT_DIR, exist_ok=True)
+            with open(os.path.join(OUTPUT_DIR, f"{self.run_id}.json"), "w") as f:
+                json.dump(record, f, indent=2)
+        except OSError as e:
+            print(f"WARNING: Could not save run record: {e}")
+        
+        return record
+
+    def collect_batch(self, iterations):
+        """
+        Per-iteration telemetry logs of a batch run (matched on batch_id)
+        and the startup cost amortization across them.
+        """
+        iterations_found = []
+        for path in glob.glob(os.path.join(LOG_DIR, "*.json")):
+            try:
+                with open(path) as f:
+                    log = json.load(f)
+            except (OSError, ValueError):
+                continue
+            batch = log.get('batch') or {}
+            if batch.get('batch_id') != self.run_id:
+                continue
+            startup = log.get('startup', {})
+            iterations_found.append({
+                'iteration': batch.get('iteration'),
+                'log': path,
+                'mode': startup.get('mode'),
+                'launch_us': startup.get('launch_us'),
+                'namespace_setup_us': startup.get('namespace_setup_us', 0),
+                'runtime_ms': log.get('summary', {}).get('runtime_ms'),
+                'exit_reason': log.get('summary', {}).get('exit_reason'),
+            })
+        iterations_found.sort(key=lambda it: it['iteration'] or 0)
+
+        # launch_us is -1 (or missing) where the binary never started
+        timed = [it for it in iterations_found if it['launch_us'] is not None and it['launch_us'] >= 0]
+        cold = [it['launch_us'] for it in timed if it['mode'] == 'cold']
+        warm = sorted(it['launch_us'] for it in timed if it['mode'] == 'warm')
+        # Paid once by the launcher; every warm log repeats it
+        setup_us = next((it['namespace_setup_us'] for it in iterations_found if it['mode'] == 'warm'), 0)
+
+        amortization = {
+            'cold_launch_us': cold[0] if cold else None,
+            'warm_launch_p50_us': warm[len(warm) // 2] if warm else None,
+            'warm_launch_mean_us': round(sum(warm) / len(warm), 1) if warm else None,
+            'namespace_setup_us': setup_us,
+        }
+        if cold and warm:
+            # Startup paid by the batch vs. starting every iteration cold
+            batch_total = cold[0] + setup_us + sum(warm)
+            all_cold_total = cold[0] * (len(warm) + 1)
+            amortization['batch_startup_us'] = batch_total
+            amortization['all_cold_startup_us'] = all_cold_total
+            amortization['saved_us'] = all_cold_total - batch_total
+
+        if len(iterations_found) != iterations:
+            print(f"WARNING: batch {self.run_id}: {len(iterations_found)}/{iterations} iteration logs found")
+        else:
+            print(f"[Controller] Batch of {iterations}: cold launch {amortization['cold_launch_us']}us, "
+                  f"warm p50 {amortization['warm_launch_p50_us']}us")
+
+        return {
+            'iterations': iterations,
+            'completed': len(iterations_found),
+            'runs': iterations_found,
+            'amortization': amortization,
+        }
+
+    def run_via_server(self, socket_path=LAUNCHER_SOCKET):
+        """
+        Executes the sandbox through a long-lived launcher (launcher --server=...).
+        The server already holds the compiled seccomp filters and warm
+        namespaces, so only clone + execv are paid per run. The server joins
+        the cgroup and enforces the time limit itself.
+        """
+        print(f"[Controller] Submitting run to launcher server at {socket_path}...")
+
+        cgroup = self.cgroup_path if os.path.exists(os.path.join(self.cgroup_path, "cgroup.procs")) else "-"
+        fields = ["RUN", self.profile, str(int(self.time_limit * 1000)), cgroup, self.exec_path]
+        request = "\t".join(fields) + "\n"
+
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+                # Allow some slack over the limit for log writing
+                conn.settimeout(self.time_limit + 5)
+                conn.connect(socket_path)
+                conn.sendall(request.encode())
+                reply = conn.makefile().readline().rstrip("\n")
+        except (OSError, socket.timeout) as e:
+            print(f"Execution Error: {e}")
+            return None
+
+        parts = reply.split("\t")
+        if parts[0] != "OK" or len(parts) < 4:
+            print(f"Launcher server rejected request: {reply}")
+            return None
+
+        child_pid, log_path, exit_reason = int(parts[1]), parts[2], parts[3]
+        print(f"[Controller] Child {child_pid} finished: {exit_reason} (log: {log_path})")
+        run = {"pid": child_pid, "log": log_path, "exit_reason": exit_reason}
+        if len(parts) >= 7:
+            # Launch latency split (clone -> exec done, of which execv itself)
+            run.update(startup_mode=parts[4], launch_us=int(parts[5]), exec_us=int(parts[6]))
+            print(f"[Controller] {parts[4]} start: launch {parts[5]}us (execv {parts[6]}us)")
+        return run
 
 if __name__ == "__main__":
     if os.getuid() != 0:
@@ -165,13 +385,27 @@ if __name__ == "__main__":
     parser.add_argument('--mem', type=str, default='64M', help='Memory Limit')
     parser.add_argument('--pids', type=int, default=20, help='PID Limit')
     parser.add_argument('--time_limit', type=int, default=5, help='Time Limit (seconds)')
+    parser.add_argument('--profile', default='STRICT', choices=['STRICT', 'RESOURCE-AWARE', 'LEARNING'], help='Sandbox profile')
+    parser.add_argument('--output-cap', type=parse_size, default=DEFAULT_MEMORY_CAP,
+                        help='Bytes of program output kept in memory per stream (head + tail), e.g. 1M')
+    parser.add_argument('--spill-cap', type=parse_size, default=DEFAULT_SPILL_CAP,
+                        help='Bytes of program output spilled to logs/output per stream, e.g. 100M')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Run the binary N times in one warm sandbox (batch run)')
+    parser.add_argument('--server', nargs='?', const=LAUNCHER_SOCKET, default=None,
+                        help='Submit to a running launcher server (launcher --server=<socket>)')
     args = parser.parse_args()
 
-    sandbox = SandboxController(cpus=args.cpu, memory=args.mem, pids=args.pids, time_limit=args.time_limit)
+    sandbox = SandboxController(cpus=args.cpu, memory=args.mem, pids=args.pids,
+                                time_limit=args.time_limit, profile=args.profile,
+                                output_cap=args.output_cap, spill_cap=args.spill_cap)
     
     try:
         sandbox.setup_cgroups()
         sandbox.compile(args.source)
-        sandbox.run()
+        if args.server:
+            sandbox.run_via_server(args.server)
+        else:
+            sandbox.run(iterations=args.repeat)
     finally:
         sandbox.cleanup()
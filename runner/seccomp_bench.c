@@ -0,0 +1,155 @@
+#define _GNU_SOURCE
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <unistd.h>
+#include <fcntl.h>
+#include <time.h>
+#include <sys/wait.h>
+#include "../policies/seccomp_rules.h"
+
+/**
+ * SECCOMP FILTER BENCHMARK
+ *
+ * 1. Consistency check: for every profile, the cached program must be
+ *    byte-identical to a fresh libseccomp export of the same rules.
+ * 2. Install latency: time to get a filter enforced in a fresh process via
+ *      a) install_syscall_filter()  (seccomp_init + rule_add + seccomp_load)
+ *      b) load_compiled_filter()    (single prctl of the cached program)
+ *
+ * Each install runs in a forked child because filters stack and cannot be
+ * removed once loaded.
+ *
+ * Usage: ./runner/seccomp_bench [iterations]
+ */
+
+#define DEFAULT_ITERATIONS 200
+
+static const char *profile_names[] = {"STRICT", "RESOURCE-AWARE", "LEARNING"};
+
+static long long now_ns(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (long long)ts.tv_sec * 1000000000LL + ts.tv_nsec;
+}
+
+static int compare_ll(const void *a, const void *b) {
+    long long x = *(const long long *)a, y = *(const long long *)b;
+    return (x > y) - (x < y);
+}
+
+// Returns 0 if cache and fresh export match (populating the cache if missing)
+static int check_identical(sandbox_profile_t profile) {
+    struct sock_fprog fresh, cached;
+    char path[256];
+    bpf_cache_path(profile, path, sizeof(path));
+
+    if (compile_syscall_filter(profile, &fresh) != 0) {
+        return -1;
+    }
+    if (read_cached_filter(path, &cached) != 0) {
+        write_cached_filter(path, &fresh);
+        if (read_cached_filter(path, &cached) != 0) {
+            fprintf(stderr, "[Bench] Cannot read or create %s\n", path);
+            free(fresh.filter);
+            return -1;
+        }
+    }
+
+    int identical = fresh.len == cached.len &&
+                    memcmp(fresh.filter, cached.filter, fresh.len * sizeof(struct sock_filter)) == 0;
+    printf("[Bench] %-15s %s: %u vs %u instructions -> %s\n", profile_names[profile], path,
+           fresh.len, cached.len, identical ? "IDENTICAL" : "MISMATCH");
+
+    free(fresh.filter);
+    free(cached.filter);
+    return identical ? 0 : -1;
+}
+
+// Time one filter install in a fresh child; returns nanoseconds or -1
+static long long time_install(sandbox_profile_t profile, const struct sock_fprog *prog) {
+    int pipefd[2];
+    if (pipe(pipefd) != 0) return -1;
+
+    pid_t pid = fork();
+    if (pid == 0) {
+        close(pipefd[0]);
+        // Keep the status messages of the install helpers out of the timings
+        int devnull = open("/dev/null", O_WRONLY);
+        dup2(devnull, STDOUT_FILENO);
+
+        long long start = now_ns();
+        if (prog) {
+            load_compiled_filter(prog);
+        } else {
+            install_syscall_filter(profile);
+        }
+        long long elapsed = now_ns() - start;
+
+        // write() and exit_group() are allowed by every profile
+        if (write(pipefd[1], &elapsed, sizeof(elapsed)) != sizeof(elapsed)) _exit(1);
+        _exit(0);
+    }
+
+    close(pipefd[1]);
+    long long elapsed = -1;
+    if (read(pipefd[0], &elapsed, sizeof(elapsed)) != sizeof(elapsed)) elapsed = -1;
+    close(pipefd[0]);
+    waitpid(pid, NULL, 0);
+    return elapsed;
+}
+
+static void report(const char *label, long long *samples, int n) {
+    qsort(samples, n, sizeof(long long), compare_ll);
+    printf("    %-22s p50=%7.1f us  p90=%7.1f us  p99=%7.1f us\n", label,
+           samples[n / 2] / 1000.0, samples[(n * 90) / 100] / 1000.0, samples[(n * 99) / 100] / 1000.0);
+}
+
+int main(int argc, char *argv[]) {
+    int iterations = argc > 1 ? atoi(argv[1]) : DEFAULT_ITERATIONS;
+    if (iterations <= 0) iterations = DEFAULT_ITERATIONS;
+
+    printf("[Bench] Checking cached programs against libseccomp export...\n");
+    int mismatches = 0;
+    for (int p = 0; p < 3; p++) {
+        if (check_identical((sandbox_profile_t)p) != 0) mismatches++;
+    }
+
+    printf("[Bench] Filter install latency (%d iterations per profile)\n", iterations);
+    long long *libseccomp_ns = malloc(sizeof(long long) * iterations);
+    long long *compiled_ns = malloc(sizeof(long long) * iterations);
+
+    for (int p = 0; p < 3; p++) {
+        struct sock_fprog prog;
+        if (get_cached_syscall_filter((sandbox_profile_t)p, &prog) != 0) {
+            mismatches++;
+            continue;
+        }
+
+        int n = 0;
+        for (int i = 0; i < iterations; i++) {
+            long long a = time_install((sandbox_profile_t)p, NULL);
+            long long b = time_install((sandbox_profile_t)p, &prog);
+            if (a < 0 || b < 0) continue;
+            libseccomp_ns[n] = a;
+            compiled_ns[n] = b;
+            n++;
+        }
+
+        printf("  %s (%u instructions)\n", profile_names[p], prog.len);
+        if (n > 0) {
+            report("install_syscall_filter", libseccomp_ns, n);
+            report("load_compiled_filter", compiled_ns, n);
+        }
+        free(prog.filter);
+    }
+
+    free(libseccomp_ns);
+    free(compiled_ns);
+
+    if (mismatches) {
+        fprintf(stderr, "[Bench] FAILED: %d profile(s) with stale or unreadable cache\n", mismatches);
+        return 1;
+    }
+    return 0;
+}
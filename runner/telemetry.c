@@ -4,8 +4,13 @@
 #include <string.h>
 #include <time.h>
 #include <unistd.h>
+#include <fcntl.h>
 #include <sys/time.h>
+#include <errno.h>
 #include <sys/stat.h>
+#include <sys/socket.h>
+#include <sys/mman.h>
+#include <sys/un.h>
 #include "telemetry.h"
 
 // Ensure logs directory exists
@@ -24,23 +29,302 @@ long get_current_time_ms() {
     return (tv.tv_sec * 1000) + (tv.tv_usec / 1000);
 }
 
+/*
+ * Fold sample b (the later one) into a, covering both wall-time windows:
+ *   time_ms     - end of the combined window (b)
+ *   interval_ms - sum, so time-weighted analytics stay exact
+ *   cpu_percent - interval-weighted mean, so sustained-CPU durations hold
+ *   memory_kb   - max (a max bucket: keeps spikes and monotonic growth)
+ */
+static void merge_sample(telemetry_sample_t *a, const telemetry_sample_t *b) {
+    long total = (long)a->interval_ms + b->interval_ms;
+    if (total > 0) {
+        a->cpu_percent = (int)(((long)a->cpu_percent * a->interval_ms +
+                                (long)b->cpu_percent * b->interval_ms + total / 2) / total);
+    } else {
+        a->cpu_percent = a->cpu_percent > b->cpu_percent ? a->cpu_percent : b->cpu_percent;
+    }
+    a->time_ms = b->time_ms;
+    a->interval_ms = (int)total;
+    if (b->memory_kb > a->memory_kb) a->memory_kb = b->memory_kb;
+}
+
+// Halve the stored timeline by merging neighbours; new samples are then
+// folded downsample_factor at a time so resolution stays uniform.
+// Returns 1 if the last stored sample is a half group (odd count)
+static int downsample_timeline(telemetry_log_t *log) {
+    int out = 0;
+    for (int i = 0; i + 1 < log->sample_count; i += 2) {
+        log->samples[out] = log->samples[i];
+        merge_sample(&log->samples[out], &log->samples[i + 1]);
+        out++;
+    }
+    int odd = log->sample_count % 2;
+    if (odd) {
+        log->samples[out++] = log->samples[log->sample_count - 1];
+    }
+    log->sample_count = out;
+    log->downsample_factor *= 2;
+    return odd;
+}
+
+// Append a stored sample, growing or downsampling the buffer as needed
+static void store_sample(telemetry_log_t *log, const telemetry_sample_t *sample) {
+    int cap = log->max_samples > 0 ? log->max_samples : MAX_SAMPLES;
+
+    if (log->sample_count == log->sample_capacity && log->sample_capacity < cap) {
+        int capacity = log->sample_capacity ? log->sample_capacity * 2 : INITIAL_SAMPLE_CAPACITY;
+        if (capacity > cap) capacity = cap;
+        telemetry_sample_t *grown = realloc(log->samples, sizeof(telemetry_sample_t) * capacity);
+        if (!grown) {
+            // Out of memory: keep the run going at the current capacity
+            cap = log->sample_capacity;
+        } else {
+            log->samples = grown;
+            log->sample_capacity = capacity;
+        }
+    }
+
+    if (log->sample_count == log->sample_capacity) {
+        if (log->sample_capacity < 2) return;
+        if (downsample_timeline(log)) {
+            // This sample completes the half group left at the end
+            merge_sample(&log->samples[log->sample_count - 1], sample);
+            return;
+        }
+    }
+
+    log->samples[log->sample_count++] = *sample;
+}
+
+// Monotonic clock in microseconds (latency measurements)
+long long get_monotonic_us(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (long long)ts.tv_sec * 1000000LL + ts.tv_nsec / 1000;
+}
+
 // Add a time-series sample
-void add_sample(telemetry_log_t *log, long elapsed_ms, int cpu_percent, long mem_kb) {
-    if (!log->samples) {
-        log->samples = malloc(sizeof(telemetry_sample_t) * MAX_SAMPLES);
-        log->sample_count = 0;
+void add_sample(telemetry_log_t *log, long elapsed_ms, int interval_ms, int cpu_percent, long mem_kb) {
+    telemetry_sample_t sample = {elapsed_ms, cpu_percent, interval_ms, mem_kb};
+
+    if (log->downsample_factor < 1) log->downsample_factor = 1;
+    if (cpu_percent > log->cpu_peak_percent) log->cpu_peak_percent = cpu_percent;
+
+    if (log->pending_count == 0) {
+        log->pending = sample;
+    } else {
+        merge_sample(&log->pending, &sample);
     }
-    
-    if (log->sample_count < MAX_SAMPLES) {
-        log->samples[log->sample_count].time_ms = elapsed_ms;
-        log->samples[log->sample_count].cpu_percent = cpu_percent;
-        log->samples[log->sample_count].memory_kb = mem_kb;
-        log->sample_count++;
+    log->pending_count++;
+
+    if (log->pending_count >= log->downsample_factor) {
+        log->pending_count = 0;
+        store_sample(log, &log->pending);
+    }
+}
+
+// Store a partially folded group (end of run)
+void flush_samples(telemetry_log_t *log) {
+    if (log->pending_count > 0) {
+        log->pending_count = 0;
+        store_sample(log, &log->pending);
+    }
+}
+
+void schedule_init(sample_schedule_t *schedule, int min_interval_ms, int max_interval_ms) {
+    if (min_interval_ms <= 0) min_interval_ms = DEFAULT_SAMPLE_MIN_MS;
+    if (max_interval_ms < min_interval_ms) max_interval_ms = min_interval_ms;
+
+    schedule->min_interval_ms = min_interval_ms;
+    schedule->max_interval_ms = max_interval_ms;
+    schedule->current_interval_ms = min_interval_ms;
+    schedule->has_prev = 0;
+}
+
+/*
+ * Adaptive sampling (exponential back-off).
+ *
+ * A sample is "stable" when CPU% moved by at most SAMPLE_CPU_TOLERANCE points
+ * and memory by at most max(SAMPLE_MEM_TOLERANCE_KB, SAMPLE_MEM_TOLERANCE_PCT%).
+ *   stable   -> interval = min(interval * 2, max)
+ *   changed  -> interval = min
+ * Short programs are therefore sampled at high frequency from the start,
+ * while long flat phases cost only a sample every max_interval_ms.
+ * With min == max this degrades to the classic fixed-rate sampler.
+ *
+ * Returns: milliseconds to wait before the next sample
+ */
+int schedule_next_interval(sample_schedule_t *schedule, int cpu_percent, long memory_kb) {
+    if (schedule->has_prev) {
+        long mem_delta = labs(memory_kb - schedule->prev_memory_kb);
+        long mem_tolerance = (schedule->prev_memory_kb * SAMPLE_MEM_TOLERANCE_PCT) / 100;
+        if (mem_tolerance < SAMPLE_MEM_TOLERANCE_KB) mem_tolerance = SAMPLE_MEM_TOLERANCE_KB;
+
+        int stable = abs(cpu_percent - schedule->prev_cpu_percent) <= SAMPLE_CPU_TOLERANCE &&
+                     mem_delta <= mem_tolerance;
+
+        if (stable) {
+            schedule->current_interval_ms *= 2;
+            if (schedule->current_interval_ms > schedule->max_interval_ms) {
+                schedule->current_interval_ms = schedule->max_interval_ms;
+            }
+        } else {
+            schedule->current_interval_ms = schedule->min_interval_ms;
+        }
+    }
+
+    schedule->has_prev = 1;
+    schedule->prev_cpu_percent = cpu_percent;
+    schedule->prev_memory_kb = memory_kb;
+    return schedule->current_interval_ms;
+}
+
+/*
+ * Windowed CPU% (delta-based, multi-core aware).
+ *
+ * Same formula as before:
+ *   CPU% = (delta_process / delta_total) × 100 × num_cores
+ * but the deltas are taken against the newest reading that is at least
+ * CPU_WINDOW_MS old, so 5ms samples do not quantize to 0%/100% spikes on
+ * 10ms clock ticks. At intervals >= CPU_WINDOW_MS this is simply the delta
+ * to the previous sample.
+ *
+ * Returns: CPU% (0 for the first reading), capped at num_cores × 100
+ */
+int cpu_window_update(cpu_window_t *window, long now_ms, unsigned long long process_ticks,
+                      unsigned long long total_ticks, int num_cores) {
+    // Drop readings that are no longer needed: keep only the newest one
+    // that is old enough to serve as the window start.
+    while (window->count >= 2) {
+        int next = (window->head + 1) % CPU_WINDOW_SLOTS;
+        if (now_ms - window->readings[next].time_ms < CPU_WINDOW_MS) break;
+        window->head = next;
+        window->count--;
+    }
+
+    int cpu_percent = 0;
+    if (window->count > 0) {
+        cpu_reading_t *base = &window->readings[window->head];
+        unsigned long long process_delta = process_ticks - base->process_ticks;
+        unsigned long long total_delta = total_ticks - base->total_ticks;
+
+        if (total_delta > 0) {
+            cpu_percent = (int)((process_delta * 100 * num_cores) / total_delta);
+            int max_cpu = num_cores * 100;
+            if (cpu_percent > max_cpu) cpu_percent = max_cpu;
+        }
+    }
+
+    // Append the new reading (overwrite the oldest if the ring is full)
+    if (window->count == CPU_WINDOW_SLOTS) {
+        window->head = (window->head + 1) % CPU_WINDOW_SLOTS;
+        window->count--;
+    }
+    int tail = (window->head + window->count) % CPU_WINDOW_SLOTS;
+    window->readings[tail].time_ms = now_ms;
+    window->readings[tail].process_ticks = process_ticks;
+    window->readings[tail].total_ticks = total_ticks;
+    window->count++;
+
+    return cpu_percent;
+}
+
+/*
+ * Online detectors
+ * ----------------
+ * Same rules as BehavioralAnalyzer, restated so each sample costs O(1):
+ *   SUSTAINED_HIGH_CPU      - running total of wall time at high CPU%
+ *   MONOTONIC_MEMORY_GROWTH - counters of increasing 100ms-bucket pairs
+ *   HIGH_IO_SYSCALL_RATE    - syscall delta over a sliding time window
+ * The post-mortem analyzer judges the whole run; online we only decide once
+ * enough evidence exists (a full I/O window, DETECT_MEM_MIN_BUCKETS buckets).
+ */
+void detector_init(online_detector_t *detector) {
+    memset(detector, 0, sizeof(*detector));
+    detector->bucket_id = -1;
+}
+
+// Returns the behavior detected by this sample, or NULL
+static const char *detect_cpu(online_detector_t *d, int interval_ms, int cpu_percent) {
+    if (cpu_percent >= DETECT_HIGH_CPU_PERCENT) d->high_cpu_ms += interval_ms;
+    return d->high_cpu_ms >= DETECT_HIGH_CPU_MS ? "SUSTAINED_HIGH_CPU" : NULL;
+}
+
+static const char *detect_memory(online_detector_t *d, long time_ms, long mem_kb) {
+    if (d->mem_samples++ == 0) d->first_mem_kb = mem_kb;
+    d->last_mem_kb = mem_kb;
+
+    long bucket = time_ms / DETECT_MEM_BUCKET_MS;
+    if (d->bucket_id >= 0 && bucket != d->bucket_id) {
+        // Close the current bucket and compare it with the previous one
+        if (d->closed_buckets > 0) {
+            d->mem_transitions++;
+            if (d->bucket_mem_kb > d->prev_bucket_mem_kb) d->mem_increases++;
+        }
+        d->prev_bucket_mem_kb = d->bucket_mem_kb;
+        d->closed_buckets++;
+    }
+    d->bucket_id = bucket;
+    d->bucket_mem_kb = mem_kb;
+
+    if (d->last_mem_kb - d->first_mem_kb <= DETECT_MEM_GROWTH_KB ||
+        d->mem_samples < DETECT_MEM_MIN_SAMPLES || d->closed_buckets < DETECT_MEM_MIN_BUCKETS) {
+        return NULL;
     }
+    return d->mem_increases * 100 >= d->mem_transitions * DETECT_MEM_GROWTH_PCT ? "MONOTONIC_MEMORY_GROWTH" : NULL;
+}
+
+static const char *detect_io(online_detector_t *d, long time_ms, unsigned long io_syscalls) {
+    // Ring of recent readings; drop those older than needed for one window
+    int tail = (d->io_head + d->io_count) % DETECT_IO_WINDOW_SLOTS;
+    d->io_readings[tail].time_ms = time_ms;
+    d->io_readings[tail].io_syscalls = io_syscalls;
+    if (d->io_count < DETECT_IO_WINDOW_SLOTS) {
+        d->io_count++;
+    } else {
+        d->io_head = (d->io_head + 1) % DETECT_IO_WINDOW_SLOTS;
+    }
+
+    // Keep the newest reading that is still >= one window old as the base
+    while (d->io_count > 2) {
+        int next = (d->io_head + 1) % DETECT_IO_WINDOW_SLOTS;
+        if (time_ms - d->io_readings[next].time_ms < DETECT_IO_WINDOW_MS) break;
+        d->io_head = next;
+        d->io_count--;
+    }
+
+    const io_reading_t *base = &d->io_readings[d->io_head];
+    long span_ms = time_ms - base->time_ms;
+    if (span_ms < DETECT_IO_WINDOW_MS) return NULL;
+
+    d->io_per_100ms = (double)(io_syscalls - base->io_syscalls) * 100.0 / span_ms;
+    return d->io_per_100ms > DETECT_IO_PER_100MS ? "HIGH_IO_SYSCALL_RATE" : NULL;
+}
+
+/*
+ * Feed one sample to every detector.
+ * Returns: the behavior name when a detector fires for the first time,
+ *          NULL otherwise (metrics keep updating after the first detection)
+ */
+const char *detector_update(online_detector_t *detector, long time_ms, int interval_ms, int cpu_percent,
+                            long mem_kb, unsigned long io_syscalls) {
+    const char *cpu = detect_cpu(detector, interval_ms, cpu_percent);
+    const char *memory = detect_memory(detector, time_ms, mem_kb);
+    const char *io = detect_io(detector, time_ms, io_syscalls);
+
+    if (detector->fired) return NULL;
+    const char *fired = memory ? memory : cpu ? cpu : io;
+    if (fired) {
+        detector->fired = fired;
+        detector->fired_at_ms = time_ms;
+    }
+    return fired;
 }
 
 // Write telemetry to JSON file with timeline
 void log_telemetry(const char *filename, telemetry_log_t *log, pid_t child_pid) {
+    long long write_start_us = get_monotonic_us();
     FILE *fp = fopen(filename, "w");
     if (!fp) {
         perror("fopen telemetry log");
@@ -51,6 +335,7 @@ void log_telemetry(const char *filename, telemetry_log_t *log, pid_t child_pid)
     fprintf(fp, "  \"pid\": %d,\n", child_pid);
     fprintf(fp, "  \"program\": \"%s\",\n", log->program_name);
     fprintf(fp, "  \"profile\": \"%s\",\n", log->profile_name);
+    fprintf(fp, "  \"telemetry_source\": \"%s\",\n", log->cgroup_source ? "cgroup" : "proc");
     
     // Timeline data
     fprintf(fp, "  \"timeline\": {\n");
@@ -70,8 +355,68 @@ void log_telemetry(const char *filename, telemetry_log_t *log, pid_t child_pid)
     for (int i = 0; i < log->sample_count; i++) {
         fprintf(fp, "%ld%s", log->samples[i].memory_kb, i < log->sample_count - 1 ? "," : "");
     }
+    fprintf(fp, "],\n");
+
+    fprintf(fp, "    \"interval_ms\": [");
+    for (int i = 0; i < log->sample_count; i++) {
+        fprintf(fp, "%d%s", log->samples[i].interval_ms, i < log->sample_count - 1 ? "," : "");
+    }
     fprintf(fp, "]\n");
     fprintf(fp, "  },\n");
+
+    // Sampling schedule
+    fprintf(fp, "  \"sampling\": {\n");
+    fprintf(fp, "    \"mode\": \"%s\",\n", log->sample_min_ms == log->sample_max_ms ? "fixed" : "adaptive");
+    fprintf(fp, "    \"min_interval_ms\": %d,\n", log->sample_min_ms);
+    fprintf(fp, "    \"max_interval_ms\": %d,\n", log->sample_max_ms);
+    fprintf(fp, "    \"cpu_window_ms\": %d,\n", CPU_WINDOW_MS);
+    fprintf(fp, "    \"max_samples\": %d,\n", log->max_samples > 0 ? log->max_samples : MAX_SAMPLES);
+    fprintf(fp, "    \"downsample_factor\": %d,\n", log->downsample_factor > 0 ? log->downsample_factor : 1);
+    fprintf(fp, "    \"ticks\": %d,\n", log->monitor_ticks);
+    fprintf(fp, "    \"monitor_us\": %lld\n", log->monitor_us);
+    fprintf(fp, "  },\n");
+
+    // Startup cost (amortized across a batch in warm mode)
+    fprintf(fp, "  \"startup\": {\n");
+    fprintf(fp, "    \"mode\": \"%s\",\n", log->startup_mode ? log->startup_mode : "cold");
+    fprintf(fp, "    \"launch_us\": %ld,\n", log->launch_us);
+    fprintf(fp, "    \"child_setup_us\": %ld,\n", log->child_setup_us);
+    fprintf(fp, "    \"exec_us\": %ld,\n", log->exec_us);
+    fprintf(fp, "    \"namespace_setup_us\": %ld\n", log->namespace_setup_us);
+    fprintf(fp, "  },\n");
+    if (log->batch_id) {
+        fprintf(fp, "  \"batch\": {\n");
+        fprintf(fp, "    \"batch_id\": \"%s\",\n", log->batch_id);
+        fprintf(fp, "    \"iteration\": %d,\n", log->batch_iteration);
+        fprintf(fp, "    \"iterations\": %d\n", log->batch_size);
+        fprintf(fp, "  },\n");
+    }
+
+    // Online detector state at the end of the run
+    const online_detector_t *d = &log->detector;
+    fprintf(fp, "  \"online_detection\": {\n");
+    fprintf(fp, "    \"detected\": \"%s\",\n", d->fired ? d->fired : "");
+    fprintf(fp, "    \"detected_at_ms\": %ld,\n", d->fired ? d->fired_at_ms : 0);
+    fprintf(fp, "    \"high_cpu_ms\": %ld,\n", d->high_cpu_ms);
+    fprintf(fp, "    \"memory_growth_kb\": %ld,\n", d->last_mem_kb - d->first_mem_kb);
+    fprintf(fp, "    \"memory_increasing_buckets\": %d,\n", d->mem_increases);
+    fprintf(fp, "    \"memory_bucket_pairs\": %d,\n", d->mem_transitions);
+    fprintf(fp, "    \"io_syscalls_per_100ms\": %.1f\n", d->io_per_100ms);
+    fprintf(fp, "  },\n");
+
+    // Whole-tree cgroup accounting (last reading of the run)
+    if (log->cgroup_source) {
+        fprintf(fp, "  \"cgroup\": {\n");
+        fprintf(fp, "    \"cpu_usage_usec\": %llu,\n", log->cgroup.cpu_usage_usec);
+        fprintf(fp, "    \"memory_current_kb\": %ld,\n", log->cgroup.memory_current_kb);
+        fprintf(fp, "    \"memory_peak_kb\": %ld,\n", log->cgroup.memory_peak_kb);
+        fprintf(fp, "    \"pids_peak\": %lu,\n", log->cgroup.pids_peak);
+        fprintf(fp, "    \"io_read_bytes\": %llu,\n", log->cgroup.io_read_bytes);
+        fprintf(fp, "    \"io_write_bytes\": %llu,\n", log->cgroup.io_write_bytes);
+        fprintf(fp, "    \"io_read_ops\": %llu,\n", log->cgroup.io_read_ops);
+        fprintf(fp, "    \"io_write_ops\": %llu\n", log->cgroup.io_write_ops);
+        fprintf(fp, "  },\n");
+    }
     
     // Summary
     fprintf(fp, "  \"summary\": {\n");
@@ -95,7 +440,8 @@ void log_telemetry(const char *filename, telemetry_log_t *log, pid_t child_pid)
         free(log->samples);
     }
     
-    printf("[Telemetry] Log written to %s (%d samples)\n", filename, log->sample_count);
+    printf("[Telemetry] Log written to %s (%d samples, %lldus)\n", filename, log->sample_count,
+           get_monotonic_us() - write_start_us);
 }
 
 // Parse /proc/[pid]/stat for CPU usage (Simplified for this project)
@@ -251,3 +597,438 @@ void get_io_syscalls(pid_t pid, unsigned long *read_syscalls_out, unsigned long
     *read_syscalls_out = read_count;
     *write_syscalls_out = write_count;
 }
+
+/*
+ * ------------------------------------------------------------------
+ * Persistent /proc sampler
+ * ------------------------------------------------------------------
+ * The files are opened once per child. /proc regenerates their content on
+ * every read from offset 0, so pread() at offset 0 returns a fresh snapshot.
+ * Parsing uses a minimal unsigned integer scanner: the formats are fixed
+ * and sscanf's locale/format handling dominates the cost otherwise.
+ */
+
+// Parse an unsigned decimal at *p (skipping leading blanks), advance *p
+static unsigned long long parse_ull(const char **p) {
+    const char *s = *p;
+    while (*s == ' ' || *s == '\t') s++;
+
+    unsigned long long value = 0;
+    while (*s >= '0' && *s <= '9') {
+        value = value * 10 + (unsigned long long)(*s - '0');
+        s++;
+    }
+    *p = s;
+    return value;
+}
+
+// Skip n space-separated fields
+static const char *skip_fields(const char *s, int n) {
+    while (n-- > 0) {
+        while (*s == ' ') s++;
+        while (*s && *s != ' ') s++;
+    }
+    return s;
+}
+
+// Value of a "Key:   123" line, 0 if the key is absent
+static unsigned long long find_key_value(const char *buf, const char *key) {
+    const char *line = strstr(buf, key);
+    if (!line) return 0;
+    line += strlen(key);
+    return parse_ull(&line);
+}
+
+// pread the whole file into buf (NUL-terminated)
+static int read_fd_at_start(int fd, char *buf, size_t size) {
+    ssize_t n = pread(fd, buf, size - 1, 0);
+    if (n <= 0) return -1;
+    buf[n] = '\0';
+    return 0;
+}
+
+static int read_proc_fd(proc_sampler_t *sampler, int fd) {
+    return read_fd_at_start(fd, sampler->buf, sizeof(sampler->buf));
+}
+
+// Sum of the user..steal columns of the "cpu " line of /proc/stat
+static unsigned long long parse_system_ticks(const char *buf) {
+    unsigned long long total = 0;
+    if (strncmp(buf, "cpu ", 4) != 0) return 0;
+    const char *p = buf + 4;
+    for (int i = 0; i < 8; i++) {
+        total += parse_ull(&p);
+    }
+    return total;
+}
+
+int proc_sampler_open(proc_sampler_t *sampler, pid_t pid) {
+    char path[64];
+
+    snprintf(path, sizeof(path), "/proc/%d/stat", pid);
+    sampler->stat_fd = open(path, O_RDONLY | O_CLOEXEC);
+    snprintf(path, sizeof(path), "/proc/%d/status", pid);
+    sampler->status_fd = open(path, O_RDONLY | O_CLOEXEC);
+    snprintf(path, sizeof(path), "/proc/%d/io", pid);
+    sampler->io_fd = open(path, O_RDONLY | O_CLOEXEC);
+    sampler->system_stat_fd = open("/proc/stat", O_RDONLY | O_CLOEXEC);
+
+    // /proc/[pid]/io may be unavailable (kernel config); the rest is required
+    if (sampler->stat_fd < 0 || sampler->status_fd < 0 || sampler->system_stat_fd < 0) {
+        perror("proc_sampler_open");
+        proc_sampler_close(sampler);
+        return -1;
+    }
+    return 0;
+}
+
+/*
+ * Read all metrics for one sample.
+ * Returns: 0 on success, -1 if the process is gone (reads fail with ESRCH)
+ */
+int proc_sampler_read(proc_sampler_t *sampler, proc_metrics_t *metrics) {
+    memset(metrics, 0, sizeof(*metrics));
+
+    // /proc/[pid]/stat: "pid (comm) state ppid ... minflt cminflt majflt cmajflt utime stime"
+    if (read_proc_fd(sampler, sampler->stat_fd) != 0) return -1;
+    const char *p = strrchr(sampler->buf, ')');
+    if (!p) return -1;
+    p = skip_fields(p + 1, 7);     // state ppid pgrp session tty_nr tpgid flags
+    unsigned long long minflt = parse_ull(&p);
+    unsigned long long cminflt = parse_ull(&p);
+    unsigned long long majflt = parse_ull(&p);
+    unsigned long long cmajflt = parse_ull(&p);
+    unsigned long long utime = parse_ull(&p);
+    unsigned long long stime = parse_ull(&p);
+    metrics->minflt = minflt + cminflt;
+    metrics->majflt = majflt + cmajflt;
+    metrics->process_ticks = utime + stime;
+
+    // /proc/[pid]/status: VmPeak (missing once the process has no mm)
+    if (read_proc_fd(sampler, sampler->status_fd) != 0) return -1;
+    metrics->memory_peak_kb = (long)find_key_value(sampler->buf, "VmPeak:");
+
+    // /proc/[pid]/io: syscr / syscw
+    if (sampler->io_fd >= 0 && read_proc_fd(sampler, sampler->io_fd) == 0) {
+        metrics->read_syscalls = find_key_value(sampler->buf, "syscr:");
+        metrics->write_syscalls = find_key_value(sampler->buf, "syscw:");
+    }
+
+    // /proc/stat: "cpu  user nice system idle iowait irq softirq steal ..."
+    if (read_proc_fd(sampler, sampler->system_stat_fd) == 0) {
+        metrics->system_ticks = parse_system_ticks(sampler->buf);
+    }
+
+    return 0;
+}
+
+void proc_sampler_close(proc_sampler_t *sampler) {
+    if (sampler->stat_fd >= 0) close(sampler->stat_fd);
+    if (sampler->status_fd >= 0) close(sampler->status_fd);
+    if (sampler->io_fd >= 0) close(sampler->io_fd);
+    if (sampler->system_stat_fd >= 0) close(sampler->system_stat_fd);
+    sampler->stat_fd = sampler->status_fd = sampler->io_fd = sampler->system_stat_fd = -1;
+}
+
+/*
+ * ------------------------------------------------------------------
+ * Cgroup v2 sampler
+ * ------------------------------------------------------------------
+ * Same pread-at-offset-0 scheme as the /proc sampler, but over the run's
+ * cgroup directory, so CPU, memory, faults and pids cover the whole process
+ * tree (including anything the sandboxed program forks) in one pass.
+ * The launcher itself lives in the cgroup too, which adds a small constant
+ * to memory and CPU. I/O syscall counters still come from the direct
+ * child's /proc/[pid]/io since cgroups do not account syscalls.
+ */
+
+static int open_in_dir(const char *dir, const char *name) {
+    char path[512];
+    snprintf(path, sizeof(path), "%s/%s", dir, name);
+    return open(path, O_RDONLY | O_CLOEXEC);
+}
+
+// Read a single-number file ("memory.current", "pids.current"); 0 on failure
+static unsigned long long read_single_value(cgroup_sampler_t *sampler, int fd) {
+    if (fd < 0 || read_fd_at_start(fd, sampler->buf, sizeof(sampler->buf)) != 0) return 0;
+    const char *p = sampler->buf;
+    return parse_ull(&p);
+}
+
+int cgroup_sampler_open(cgroup_sampler_t *sampler, const char *cgroup_path, pid_t pid) {
+    char path[64];
+
+    sampler->cpu_stat_fd = open_in_dir(cgroup_path, "cpu.stat");
+    sampler->memory_current_fd = open_in_dir(cgroup_path, "memory.current");
+    sampler->memory_peak_fd = open_in_dir(cgroup_path, "memory.peak");
+    sampler->memory_stat_fd = open_in_dir(cgroup_path, "memory.stat");
+    sampler->pids_current_fd = open_in_dir(cgroup_path, "pids.current");
+    sampler->io_stat_fd = open_in_dir(cgroup_path, "io.stat");
+    snprintf(path, sizeof(path), "/proc/%d/io", pid);
+    sampler->proc_io_fd = open(path, O_RDONLY | O_CLOEXEC);
+    sampler->system_stat_fd = open("/proc/stat", O_RDONLY | O_CLOEXEC);
+    sampler->clk_tck = sysconf(_SC_CLK_TCK);
+    if (sampler->clk_tck <= 0) sampler->clk_tck = 100;
+    sampler->peak_seen_kb = 0;
+    sampler->pids_peak = 0;
+
+    // Controllers may be disabled in the parent's cgroup.subtree_control;
+    // only cpu.stat (always present in v2) and memory.current are required
+    if (sampler->cpu_stat_fd < 0 || sampler->memory_current_fd < 0 || sampler->system_stat_fd < 0) {
+        fprintf(stderr, "cgroup_sampler_open: %s is not a cgroup v2 directory with the memory controller\n",
+                cgroup_path);
+        cgroup_sampler_close(sampler);
+        return -1;
+    }
+
+    memset(&sampler->base, 0, sizeof(sampler->base));
+    sampler->base_minflt = 0;
+    sampler->base_majflt = 0;
+    proc_metrics_t start;
+    cgroup_metrics_t base;
+    if (cgroup_sampler_read(sampler, &start, &base) == 0) {
+        sampler->base = base;
+        sampler->base_minflt = start.minflt;
+        sampler->base_majflt = start.majflt;
+    }
+    sampler->peak_seen_kb = 0;
+    sampler->pids_peak = 0;
+    return 0;
+}
+
+static unsigned long long since_base(unsigned long long value, unsigned long long base) {
+    return value > base ? value - base : 0;
+}
+
+/*
+ * Read one sample. metrics is filled in the same units as the /proc
+ * sampler (clock ticks, KB) so the monitor loop treats both sources alike;
+ * memory_peak_kb is the tree's peak so far. cgroup gets the readings, with
+ * cumulative counters taken relative to cgroup_sampler_open().
+ * Returns: 0 on success, -1 if cpu.stat cannot be read (cgroup removed)
+ */
+int cgroup_sampler_read(cgroup_sampler_t *sampler, proc_metrics_t *metrics, cgroup_metrics_t *cgroup) {
+    memset(metrics, 0, sizeof(*metrics));
+    memset(cgroup, 0, sizeof(*cgroup));
+
+    // cpu.stat: "usage_usec N\nuser_usec N\nsystem_usec N\n..."
+    if (read_fd_at_start(sampler->cpu_stat_fd, sampler->buf, sizeof(sampler->buf)) != 0) return -1;
+    cgroup->cpu_usage_usec = since_base(find_key_value(sampler->buf, "usage_usec"), sampler->base.cpu_usage_usec);
+    metrics->process_ticks = cgroup->cpu_usage_usec * (unsigned long long)sampler->clk_tck / 1000000ULL;
+
+    cgroup->memory_current_kb = (long)(read_single_value(sampler, sampler->memory_current_fd) / 1024);
+    cgroup->memory_peak_kb = (long)(read_single_value(sampler, sampler->memory_peak_fd) / 1024);
+    // memory.peak is a lifetime high-water mark; only trust it once this run raised it
+    if (cgroup->memory_peak_kb <= sampler->base.memory_peak_kb) cgroup->memory_peak_kb = 0;
+    if (cgroup->memory_current_kb > sampler->peak_seen_kb) sampler->peak_seen_kb = cgroup->memory_current_kb;
+    if (cgroup->memory_peak_kb > sampler->peak_seen_kb) sampler->peak_seen_kb = cgroup->memory_peak_kb;
+    metrics->memory_peak_kb = sampler->peak_seen_kb;
+
+    // memory.stat: "pgfault" counts minor + major faults
+    if (sampler->memory_stat_fd >= 0 &&
+        read_fd_at_start(sampler->memory_stat_fd, sampler->buf, sizeof(sampler->buf)) == 0) {
+        unsigned long long pgfault = find_key_value(sampler->buf, "\npgfault ");
+        unsigned long long pgmajfault = find_key_value(sampler->buf, "\npgmajfault ");
+        metrics->majflt = since_base(pgmajfault, sampler->base_majflt);
+        metrics->minflt = since_base(pgfault > pgmajfault ? pgfault - pgmajfault : 0, sampler->base_minflt);
+    }
+
+    cgroup->pids_current = read_single_value(sampler, sampler->pids_current_fd);
+    if (cgroup->pids_current > sampler->pids_peak) sampler->pids_peak = cgroup->pids_current;
+    cgroup->pids_peak = sampler->pids_peak;
+
+    // io.stat: one "MAJ:MIN rbytes=N wbytes=N rios=N wios=N ..." line per device
+    if (sampler->io_stat_fd >= 0 &&
+        read_fd_at_start(sampler->io_stat_fd, sampler->buf, sizeof(sampler->buf)) == 0) {
+        char *saveptr = NULL;
+        for (char *line = strtok_r(sampler->buf, "\n", &saveptr); line; line = strtok_r(NULL, "\n", &saveptr)) {
+            cgroup->io_read_bytes += find_key_value(line, "rbytes=");
+            cgroup->io_write_bytes += find_key_value(line, "wbytes=");
+            cgroup->io_read_ops += find_key_value(line, "rios=");
+            cgroup->io_write_ops += find_key_value(line, "wios=");
+        }
+        cgroup->io_read_bytes = since_base(cgroup->io_read_bytes, sampler->base.io_read_bytes);
+        cgroup->io_write_bytes = since_base(cgroup->io_write_bytes, sampler->base.io_write_bytes);
+        cgroup->io_read_ops = since_base(cgroup->io_read_ops, sampler->base.io_read_ops);
+        cgroup->io_write_ops = since_base(cgroup->io_write_ops, sampler->base.io_write_ops);
+    }
+
+    if (sampler->proc_io_fd >= 0 &&
+        read_fd_at_start(sampler->proc_io_fd, sampler->buf, sizeof(sampler->buf)) == 0) {
+        metrics->read_syscalls = find_key_value(sampler->buf, "syscr:");
+        metrics->write_syscalls = find_key_value(sampler->buf, "syscw:");
+    }
+
+    if (read_fd_at_start(sampler->system_stat_fd, sampler->buf, sizeof(sampler->buf)) == 0) {
+        metrics->system_ticks = parse_system_ticks(sampler->buf);
+    }
+
+    return 0;
+}
+
+void cgroup_sampler_close(cgroup_sampler_t *sampler) {
+    int *fds[] = {&sampler->cpu_stat_fd, &sampler->memory_current_fd, &sampler->memory_peak_fd,
+                  &sampler->memory_stat_fd, &sampler->pids_current_fd, &sampler->io_stat_fd,
+                  &sampler->proc_io_fd, &sampler->system_stat_fd};
+    for (size_t i = 0; i < sizeof(fds) / sizeof(fds[0]); i++) {
+        if (*fds[i] >= 0) close(*fds[i]);
+        *fds[i] = -1;
+    }
+}
+
+/*
+ * ------------------------------------------------------------------
+ * Live telemetry stream
+ * ------------------------------------------------------------------
+ * Each event is a self-contained JSON line in its own datagram, so the
+ * receiver never has to reassemble partial records. Delivery is best
+ * effort: a slow or absent dashboard must never stall the monitor loop.
+ */
+
+int telemetry_stream_open(telemetry_stream_t *stream, const char *socket_path, pid_t pid) {
+    stream->fd = -1;
+    stream->pid = pid;
+    if (!socket_path || !*socket_path) return -1;
+
+    struct sockaddr_un addr = {0};
+    addr.sun_family = AF_UNIX;
+    if (strlen(socket_path) >= sizeof(addr.sun_path)) return -1;
+    strcpy(addr.sun_path, socket_path);
+
+    int fd = socket(AF_UNIX, SOCK_DGRAM | SOCK_CLOEXEC | SOCK_NONBLOCK, 0);
+    if (fd < 0) return -1;
+
+    // No listener (dashboard not running): stay silent, streaming is optional
+    if (connect(fd, (struct sockaddr *)&addr, sizeof(addr)) != 0) {
+        close(fd);
+        return -1;
+    }
+    stream->fd = fd;
+    return 0;
+}
+
+static void stream_send(telemetry_stream_t *stream, const char *event, int len) {
+    if (stream->fd < 0 || len <= 0 || len >= LIVE_EVENT_MAX_LEN) return;
+    if (send(stream->fd, event, len, MSG_DONTWAIT | MSG_NOSIGNAL) < 0 &&
+        errno != EAGAIN && errno != EWOULDBLOCK) {
+        // Listener went away; stop trying for the rest of the run
+        telemetry_stream_close(stream);
+    }
+}
+
+void telemetry_stream_start(telemetry_stream_t *stream, const telemetry_log_t *log) {
+    char event[LIVE_EVENT_MAX_LEN];
+    int len = snprintf(event, sizeof(event),
+                       "{\"event\": \"start\", \"pid\": %d, \"program\": \"%s\", \"profile\": \"%s\", "
+                       "\"telemetry_source\": \"%s\"}\n",
+                       stream->pid, log->program_name, log->profile_name,
+                       log->cgroup_source ? "cgroup" : "proc");
+    stream_send(stream, event, len);
+}
+
+void telemetry_stream_sample(telemetry_stream_t *stream, long elapsed_ms, int interval_ms, int cpu_percent, long mem_kb) {
+    if (stream->fd < 0) return;
+    char event[LIVE_EVENT_MAX_LEN];
+    int len = snprintf(event, sizeof(event),
+                       "{\"event\": \"sample\", \"pid\": %d, \"time_ms\": %ld, \"interval_ms\": %d, "
+                       "\"cpu_percent\": %d, \"memory_kb\": %ld}\n",
+                       stream->pid, elapsed_ms, interval_ms, cpu_percent, mem_kb);
+    stream_send(stream, event, len);
+}
+
+void telemetry_stream_alert(telemetry_stream_t *stream, const online_detector_t *detector) {
+    if (stream->fd < 0 || !detector->fired) return;
+    char event[LIVE_EVENT_MAX_LEN];
+    int len = snprintf(event, sizeof(event),
+                       "{\"event\": \"alert\", \"pid\": %d, \"behavior\": \"%s\", \"time_ms\": %ld}\n",
+                       stream->pid, detector->fired, detector->fired_at_ms);
+    stream_send(stream, event, len);
+}
+
+void telemetry_stream_end(telemetry_stream_t *stream, const telemetry_log_t *log, const char *log_path) {
+    char event[LIVE_EVENT_MAX_LEN];
+    int len = snprintf(event, sizeof(event),
+                       "{\"event\": \"end\", \"pid\": %d, \"runtime_ms\": %ld, \"peak_cpu\": %d, "
+                       "\"peak_memory_kb\": %ld, \"exit_reason\": \"%s\", \"termination\": \"%s\", "
+                       "\"log\": \"%s\"}\n",
+                       stream->pid, log->runtime_ms, log->cpu_usage_percent, log->memory_peak_kb,
+                       log->exit_reason, log->termination_signal, log_path);
+    stream_send(stream, event, len);
+}
+
+void telemetry_stream_close(telemetry_stream_t *stream) {
+    if (stream->fd >= 0) close(stream->fd);
+    stream->fd = -1;
+}
+
+/*
+ * ------------------------------------------------------------------
+ * Shared-memory sample ring
+ * ------------------------------------------------------------------
+ * Layout: 64-byte header followed by capacity telemetry_sample_t records.
+ * Readers snapshot write_seq (acquire), copy the records they need, then
+ * re-read write_seq: any record more than capacity behind the second value
+ * may have been overwritten during the copy and is discarded.
+ */
+
+_Static_assert(sizeof(telemetry_ring_header_t) == 64, "ring header must stay one cache line");
+
+int telemetry_ring_open(telemetry_ring_t *ring, const char *path, pid_t pid) {
+    ring->header = NULL;
+    ring->records = NULL;
+    ring->map_size = 0;
+    if (!path || !*path) return -1;
+
+    size_t size = sizeof(telemetry_ring_header_t) + sizeof(telemetry_sample_t) * RING_CAPACITY;
+    int fd = open(path, O_RDWR | O_CREAT | O_TRUNC | O_CLOEXEC, 0644);
+    if (fd < 0) {
+        perror("telemetry_ring_open");
+        return -1;
+    }
+    if (ftruncate(fd, (off_t)size) != 0) {
+        perror("telemetry_ring_open: ftruncate");
+        close(fd);
+        return -1;
+    }
+
+    void *map = mmap(NULL, size, PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0);
+    close(fd);
+    if (map == MAP_FAILED) {
+        perror("telemetry_ring_open: mmap");
+        return -1;
+    }
+
+    ring->header = map;
+    ring->records = (telemetry_sample_t *)((char *)map + sizeof(telemetry_ring_header_t));
+    ring->map_size = size;
+
+    ring->header->version = RING_VERSION;
+    ring->header->capacity = RING_CAPACITY;
+    ring->header->record_size = sizeof(telemetry_sample_t);
+    ring->header->child_pid = pid;
+    ring->header->finished = 0;
+    // Magic last: readers treat the ring as valid only once it is set
+    __atomic_store_n(&ring->header->magic, RING_MAGIC, __ATOMIC_RELEASE);
+    return 0;
+}
+
+void telemetry_ring_push(telemetry_ring_t *ring, long elapsed_ms, int interval_ms, int cpu_percent, long mem_kb) {
+    if (!ring->header) return;
+
+    uint64_t seq = ring->header->write_seq;
+    telemetry_sample_t *record = &ring->records[seq % RING_CAPACITY];
+    record->time_ms = elapsed_ms;
+    record->cpu_percent = cpu_percent;
+    record->interval_ms = interval_ms;
+    record->memory_kb = mem_kb;
+    __atomic_store_n(&ring->header->write_seq, seq + 1, __ATOMIC_RELEASE);
+}
+
+// Mark the run finished and unmap; the file stays for the reader to remove
+void telemetry_ring_close(telemetry_ring_t *ring) {
+    if (!ring->header) return;
+    __atomic_store_n(&ring->header->finished, 1, __ATOMIC_RELEASE);
+    munmap(ring->header, ring->map_size);
+    ring->header = NULL;
+    ring->records = NULL;
+}
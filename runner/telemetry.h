@@ -2,8 +2,25 @@
 #define TELEMETRY_H
 
 #include <sys/types.h>
+#include <stdint.h>
 
-#define MAX_SAMPLES 1000  // Max 100 seconds at 100ms intervals
+// Default cap on stored timeline samples (--max-samples=N). The buffer grows
+// on demand up to the cap; past it the timeline is downsampled 2:1, so runs
+// of any length produce a bounded log.
+#define MAX_SAMPLES 1000
+#define INITIAL_SAMPLE_CAPACITY 64
+
+// Adaptive sampling defaults (overridable with --sample-min-ms / --sample-max-ms)
+#define DEFAULT_SAMPLE_MIN_MS 5
+#define DEFAULT_SAMPLE_MAX_MS 500
+#define SAMPLE_CPU_TOLERANCE 10        // CPU% points still considered "stable"
+#define SAMPLE_MEM_TOLERANCE_KB 256    // Absolute memory change still "stable"
+#define SAMPLE_MEM_TOLERANCE_PCT 5     // Relative memory change still "stable"
+
+// CPU% is averaged over at least this window, independent of the sampling
+// interval: /proc tick counters only advance every 10ms (USER_HZ=100).
+#define CPU_WINDOW_MS 100
+#define CPU_WINDOW_SLOTS 64
 
 typedef enum {
     PROFILE_STRICT,
@@ -15,9 +32,176 @@ typedef enum {
 typedef struct {
     long time_ms;
     int cpu_percent;
+    int interval_ms;    // Wall time covered by this sample (since previous one)
     long memory_kb;
 } telemetry_sample_t;
 
+// Adaptive sampling schedule: starts at min_interval_ms, doubles while the
+// metrics are stable and snaps back to min_interval_ms on any change.
+typedef struct {
+    int min_interval_ms;
+    int max_interval_ms;
+    int current_interval_ms;
+    int has_prev;
+    int prev_cpu_percent;
+    long prev_memory_kb;
+} sample_schedule_t;
+
+// Recent (time, process ticks, system ticks) readings for windowed CPU%
+typedef struct {
+    long time_ms;
+    unsigned long long process_ticks;
+    unsigned long long total_ticks;
+} cpu_reading_t;
+
+typedef struct {
+    cpu_reading_t readings[CPU_WINDOW_SLOTS];
+    int head;       // Index of the oldest reading
+    int count;
+} cpu_window_t;
+
+// Online behavioral detectors: O(1)-per-sample versions of the
+// BehavioralAnalyzer rules (dashboard/analytics_engine.py), evaluated in the
+// monitor loop. Thresholds mirror the analyzer; keep them in sync.
+#define DETECT_HIGH_CPU_PERCENT 80          // SUSTAINED_HIGH_CPU_THRESHOLD
+#define DETECT_HIGH_CPU_MS 500              // HIGH_CPU_SAMPLES_REQUIRED x 100ms
+#define DETECT_MEM_GROWTH_KB 5000           // Growth before the leak rule applies
+#define DETECT_MEM_MIN_SAMPLES 5
+#define DETECT_MEM_BUCKET_MS 100            // Growth ratio is taken on a 100ms grid
+#define DETECT_MEM_MIN_BUCKETS 10           // Online only: one big allocation is not a trend
+#define DETECT_MEM_GROWTH_PCT 80            // MONOTONIC_GROWTH_THRESHOLD
+#define DETECT_IO_PER_100MS 100             // HIGH_SYSCALL_RATE_THRESHOLD
+#define DETECT_IO_WINDOW_MS 1000            // I/O rate is measured over this window
+#define DETECT_IO_WINDOW_SLOTS 64
+
+typedef struct {
+    long time_ms;
+    unsigned long io_syscalls;
+} io_reading_t;
+
+typedef struct {
+    // Sustained high CPU: total wall time spent at >= DETECT_HIGH_CPU_PERCENT
+    long high_cpu_ms;
+
+    // Monotonic memory growth on the 100ms grid
+    int mem_samples;
+    long first_mem_kb;
+    long last_mem_kb;
+    long bucket_id;             // Current 100ms bucket (last value wins)
+    long bucket_mem_kb;
+    long prev_bucket_mem_kb;    // Value of the previous, closed bucket
+    int closed_buckets;
+    int mem_transitions;        // Closed bucket pairs compared
+    int mem_increases;          // ... of which memory grew
+
+    // I/O syscall rate over the last DETECT_IO_WINDOW_MS
+    io_reading_t io_readings[DETECT_IO_WINDOW_SLOTS];
+    int io_head;
+    int io_count;
+    double io_per_100ms;
+
+    const char *fired;          // First behavior detected (NULL = none)
+    long fired_at_ms;
+} online_detector_t;
+
+// One reading of every /proc metric the monitor needs
+typedef struct {
+    unsigned long long process_ticks;   // utime + stime (/proc/[pid]/stat)
+    unsigned long minflt;               // minflt + cminflt
+    unsigned long majflt;               // majflt + cmajflt
+    long memory_peak_kb;                // VmPeak (/proc/[pid]/status), 0 if exiting
+    unsigned long read_syscalls;        // syscr (/proc/[pid]/io)
+    unsigned long write_syscalls;       // syscw (/proc/[pid]/io)
+    unsigned long long system_ticks;    // Sum of the "cpu" line (/proc/stat)
+} proc_metrics_t;
+
+// Keeps the /proc files of one process open across samples: each sample is
+// a pread(fd, buf, ..., 0) per file into a reusable buffer instead of
+// fopen/fgets/sscanf/fclose.
+#define PROC_READ_BUF_SIZE 4096
+
+typedef struct {
+    int stat_fd;
+    int status_fd;
+    int io_fd;
+    int system_stat_fd;
+    char buf[PROC_READ_BUF_SIZE];
+} proc_sampler_t;
+
+// Whole-tree accounting from the run's cgroup v2 directory (--cgroup=<dir>):
+// covers forked grandchildren, which /proc/[pid] of the direct child misses.
+#define CGROUP_READ_BUF_SIZE 8192  // memory.stat is the largest file read
+
+typedef struct {
+    unsigned long long cpu_usage_usec;  // usage_usec (cpu.stat)
+    long memory_current_kb;             // memory.current
+    long memory_peak_kb;                // memory.peak (0 if unsupported, < 5.19, or not raised this run)
+    unsigned long pids_current;         // pids.current
+    unsigned long pids_peak;            // Highest pids.current seen so far
+    unsigned long long io_read_bytes;   // rbytes/wbytes/rios/wios summed over
+    unsigned long long io_write_bytes;  // all devices (io.stat)
+    unsigned long long io_read_ops;
+    unsigned long long io_write_ops;
+} cgroup_metrics_t;
+
+typedef struct {
+    int cpu_stat_fd;
+    int memory_current_fd;
+    int memory_peak_fd;
+    int memory_stat_fd;     // pgfault / pgmajfault
+    int pids_current_fd;
+    int io_stat_fd;
+    int proc_io_fd;         // /proc/[pid]/io: cgroups have no syscall counters
+    int system_stat_fd;     // /proc/stat, denominator of CPU%
+    long clk_tck;
+    long peak_seen_kb;      // Running max when memory.peak is unavailable
+    unsigned long pids_peak;
+    // Readings when the sampler was opened: the cgroup may outlive one run
+    // (--repeat batches), so cumulative counters are reported as deltas
+    cgroup_metrics_t base;
+    unsigned long long base_minflt;
+    unsigned long long base_majflt;
+    char buf[CGROUP_READ_BUF_SIZE];
+} cgroup_sampler_t;
+
+// Live telemetry: one NDJSON datagram per event (start / sample / end) to a
+// Unix datagram socket the dashboard listens on. Only enabled if something
+// is bound to the socket when the run starts; sends never block.
+#define LIVE_TELEMETRY_SOCKET "/tmp/sandbox_telemetry.sock"
+#define LIVE_EVENT_MAX_LEN 512
+
+typedef struct {
+    int fd;             // -1 = streaming disabled
+    pid_t pid;
+} telemetry_stream_t;
+
+// Shared-memory sample ring (--ring=<path>, normally under /dev/shm) for a
+// supervising controller: single producer (the launcher), lock-free readers.
+// The launcher writes record write_seq % capacity, then publishes it by
+// storing write_seq + 1 with release ordering. Readers map the file and
+// view the records as a NumPy structured array (runner/telemetry_ring.py),
+// so watching many sandboxes costs no syscalls per sample.
+#define RING_MAGIC 0x52584253u      // "SBXR" (little endian)
+#define RING_VERSION 1
+#define RING_CAPACITY 4096          // Records; readers lagging further lose the oldest
+
+typedef struct {
+    uint32_t magic;
+    uint32_t version;
+    uint32_t capacity;
+    uint32_t record_size;           // sizeof(telemetry_sample_t)
+    uint64_t write_seq;             // Records published so far
+    int32_t child_pid;
+    int32_t finished;               // Set once the child has been reaped
+    uint64_t reserved[4];           // Pad to 64 bytes (one cache line)
+} telemetry_ring_header_t;
+
+typedef struct {
+    telemetry_ring_header_t *header;    // NULL = ring disabled
+    telemetry_sample_t *records;
+    size_t map_size;
+} telemetry_ring_t;
+
 // Structure to hold telemetry data with timeline
 typedef struct {
     char *program_name;
@@ -42,18 +226,71 @@ typedef struct {
     // Time-series data
     telemetry_sample_t *samples;
     int sample_count;
+    int sample_capacity;        // Allocated slots (grows up to max_samples)
+    int max_samples;            // 0 = MAX_SAMPLES
+    int downsample_factor;      // Raw samples folded into each stored sample
+    telemetry_sample_t pending; // Raw samples not yet folded into a stored one
+    int pending_count;
+    int cpu_peak_percent;       // Peak over all raw samples (survives downsampling)
+
+    // Sampling schedule (recorded so analytics can weight samples by time)
+    int sample_min_ms;
+    int sample_max_ms;
+    long long monitor_us;       // Launcher time spent handling sampling ticks
+    int monitor_ticks;
+
+    // Online detectors (evaluated every sample)
+    online_detector_t detector;
+
+    // Startup cost: "cold" (fresh namespaces) or "warm" (--repeat, joined)
+    const char *startup_mode;
+    long launch_us;             // clone() -> successful execv (-1 if execv failed)
+    long child_setup_us;        // clone() -> about to execv (namespaces, mounts, rlimits, seccomp)
+    long exec_us;               // execv() itself (-1 if the child never reported or execv failed)
+    long namespace_setup_us;    // Warm only: one-off namespace creation
+    const char *batch_id;       // NULL unless part of a --repeat batch
+    int batch_iteration;
+    int batch_size;
+
+    // Telemetry source: /proc/[pid] of the direct child, or the run's cgroup
+    int cgroup_source;
+    cgroup_metrics_t cgroup;    // Last cgroup reading (cgroup_source only)
 } telemetry_log_t;
 
 // Function prototypes
 void ensure_logs_directory();
 void log_telemetry(const char *filename, telemetry_log_t *log, pid_t child_pid);
-void add_sample(telemetry_log_t *log, long elapsed_ms, int cpu_percent, long mem_kb);
+void add_sample(telemetry_log_t *log, long elapsed_ms, int interval_ms, int cpu_percent, long mem_kb);
+void flush_samples(telemetry_log_t *log);
+void schedule_init(sample_schedule_t *schedule, int min_interval_ms, int max_interval_ms);
+int schedule_next_interval(sample_schedule_t *schedule, int cpu_percent, long memory_kb);
+int cpu_window_update(cpu_window_t *window, long now_ms, unsigned long long process_ticks,
+                      unsigned long long total_ticks, int num_cores);
+void detector_init(online_detector_t *detector);
+const char *detector_update(online_detector_t *detector, long time_ms, int interval_ms, int cpu_percent,
+                            long mem_kb, unsigned long io_syscalls);
 long get_current_time_ms();
+long long get_monotonic_us(void);
 int get_cpu_usage(pid_t pid);
 unsigned long long get_cpu_ticks(pid_t pid);
 unsigned long long get_process_metrics(pid_t pid, unsigned long *minflt_out, unsigned long *majflt_out);
 unsigned long long get_system_cpu_ticks(void);
 long get_memory_peak(pid_t pid);
 void get_io_syscalls(pid_t pid, unsigned long *read_syscalls_out, unsigned long *write_syscalls_out);
+int proc_sampler_open(proc_sampler_t *sampler, pid_t pid);
+int proc_sampler_read(proc_sampler_t *sampler, proc_metrics_t *metrics);
+void proc_sampler_close(proc_sampler_t *sampler);
+int telemetry_stream_open(telemetry_stream_t *stream, const char *socket_path, pid_t pid);
+void telemetry_stream_start(telemetry_stream_t *stream, const telemetry_log_t *log);
+void telemetry_stream_sample(telemetry_stream_t *stream, long elapsed_ms, int interval_ms, int cpu_percent, long mem_kb);
+void telemetry_stream_alert(telemetry_stream_t *stream, const online_detector_t *detector);
+void telemetry_stream_end(telemetry_stream_t *stream, const telemetry_log_t *log, const char *log_path);
+void telemetry_stream_close(telemetry_stream_t *stream);
+int telemetry_ring_open(telemetry_ring_t *ring, const char *path, pid_t pid);
+void telemetry_ring_push(telemetry_ring_t *ring, long elapsed_ms, int interval_ms, int cpu_percent, long mem_kb);
+void telemetry_ring_close(telemetry_ring_t *ring);
+int cgroup_sampler_open(cgroup_sampler_t *sampler, const char *cgroup_path, pid_t pid);
+int cgroup_sampler_read(cgroup_sampler_t *sampler, proc_metrics_t *metrics, cgroup_metrics_t *cgroup);
+void cgroup_sampler_close(cgroup_sampler_t *sampler);
 
 #endif
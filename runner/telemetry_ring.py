@@ -0,0 +1,133 @@
+"""
+Reader for the launcher's shared-memory sample ring (launcher --ring=<path>).
+
+The file is a 64-byte header followed by RING_CAPACITY telemetry_sample_t
+records (runner/telemetry.h). It is mapped read-only and the records are
+viewed in place as a NumPy structured array, so polling any number of
+sandboxes costs no syscalls per sample.
+
+Concurrency: the launcher is the only writer and publishes each record by
+bumping write_seq after writing it. A reader copies the records it wants and
+then re-checks write_seq; records the writer may have lapped during the copy
+are dropped.
+"""
+
+import mmap
+import os
+
+import numpy as np
+
+RING_MAGIC = 0x52584253  # "SBXR"
+RING_VERSION = 1
+RING_DIR = "/dev/shm"
+
+HEADER_DTYPE = np.dtype([
+    ('magic', '<u4'),
+    ('version', '<u4'),
+    ('capacity', '<u4'),
+    ('record_size', '<u4'),
+    ('write_seq', '<u8'),
+    ('child_pid', '<i4'),
+    ('finished', '<i4'),
+    ('reserved', '<u8', (4,)),
+])
+
+# telemetry_sample_t on LP64 (long = 8 bytes)
+SAMPLE_DTYPE = np.dtype([
+    ('time_ms', '<i8'),
+    ('cpu_percent', '<i4'),
+    ('interval_ms', '<i4'),
+    ('memory_kb', '<i8'),
+])
+
+assert HEADER_DTYPE.itemsize == 64
+
+
+def ring_path(run_id):
+    """Conventional ring location for a controller run id"""
+    return os.path.join(RING_DIR, f"sandbox_{run_id}.ring")
+
+
+class TelemetryRing:
+    """
+    Read-only view of one launcher's sample ring.
+
+    Usage:
+        ring = TelemetryRing(path)
+        samples, cursor = ring.read_since(0)
+        ...
+        samples, cursor = ring.read_since(cursor)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._header = np.frombuffer(self._map, dtype=HEADER_DTYPE, count=1)
+        header = self._header[0]
+        if header['magic'] != RING_MAGIC or header['version'] != RING_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not an initialized telemetry ring")
+        if header['record_size'] != SAMPLE_DTYPE.itemsize:
+            self.close()
+            raise ValueError(f"{path}: record size {header['record_size']} != {SAMPLE_DTYPE.itemsize}")
+
+        self.capacity = int(header['capacity'])
+        self.child_pid = int(header['child_pid'])
+        # Zero-copy view of all slots
+        self.records = np.frombuffer(self._map, dtype=SAMPLE_DTYPE, count=self.capacity,
+                                     offset=HEADER_DTYPE.itemsize)
+
+    @property
+    def write_seq(self):
+        return int(self._header['write_seq'][0])
+
+    @property
+    def finished(self):
+        return bool(self._header['finished'][0])
+
+    def read_since(self, cursor):
+        """
+        Records published after sequence number `cursor`.
+        Returns: (structured array copy, new cursor). If the reader fell more
+        than `capacity` records behind, the oldest ones are skipped.
+        """
+        end = self.write_seq
+        start = max(cursor, end - self.capacity)
+        if start >= end:
+            return np.empty(0, dtype=SAMPLE_DTYPE), end
+
+        slots = np.arange(start, end) % self.capacity
+        samples = self.records[slots]  # Fancy indexing copies
+
+        # Drop anything the writer overwrote while we were copying. The slot
+        # of record write_seq is rewritten before write_seq advances, so the
+        # record `capacity` behind it may already be gone.
+        lapped = self.write_seq + 1 - self.capacity
+        if lapped > start:
+            samples = samples[lapped - start:]
+        return samples, end
+
+    def latest(self, count=1):
+        """Most recent `count` records (oldest first)"""
+        end = self.write_seq
+        samples, _ = self.read_since(max(0, end - count))
+        return samples
+
+    def close(self):
+        self.records = None
+        self._header = None
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # A caller still holds a view; the map closes with it
+                pass
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
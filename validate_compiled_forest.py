@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+CompiledForest Parity Validation Test
+Checks that the flattened-tree inference path (ml_model.CompiledForest)
+predicts exactly what sklearn does for the same fitted RiskClassifier.
+
+Data is synthetic and fixed (SEED): ROWS runs with random feature values
+over several orders of magnitude, random programs and exit reasons (so
+auto_label yields every class), and some zero / missing features. The
+classifier is trained on the first TRAIN_ROWS; parity is checked on all
+rows, seen and unseen, for an unlimited-depth and a depth-limited forest.
+
+Parity: identical predicted labels and class probabilities within
+PROBA_TOLERANCE (float rounding of the tree average) on every row.
+
+Usage: python3 validate_compiled_forest.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "dashboard"))
+
+from ml_model import RiskClassifier, CompiledForest, FEATURE_COLS  # noqa: E402
+
+SEED = 0
+ROWS = 400
+TRAIN_ROWS = 300
+MAX_DEPTHS = [None, 4]
+PROBA_TOLERANCE = 1e-9
+
+PROGRAMS = ["moderate_work", "quick_exit", "sleep_test", "cpu_stress", "memory_leak", "file_io_test"]
+EXIT_REASONS = ["EXITED(0)", "EXITED(1)", "SECURITY_VIOLATION", "POLICY_ADAPATION_KILL", "KILLED_BY_OS"]
+
+
+def build_runs(seed=SEED, rows=ROWS):
+    """Synthetic feature rows in extract_features()' layout"""
+    rng = np.random.default_rng(seed)
+    features = pd.DataFrame(rng.lognormal(3.0, 2.5, size=(rows, len(FEATURE_COLS))), columns=FEATURE_COLS)
+    # Exact zeros and missing values, as in short or unsampled runs
+    features = features.mask(rng.random(features.shape) < 0.05, 0.0)
+    features = features.mask(rng.random(features.shape) < 0.02)
+    features['pid'] = np.arange(1, rows + 1)
+    features['program'] = rng.choice(PROGRAMS, size=rows)
+    features['profile'] = rng.choice(["STRICT", "LEARNING"], size=rows)
+    features['exit_reason'] = rng.choice(EXIT_REASONS, size=rows)
+    return features
+
+
+def sklearn_proba(classifier, X):
+    return classifier.model.predict_proba(classifier.scaler.transform(X))
+
+
+def check_parity(classifier, X):
+    """Rows where CompiledForest and sklearn disagree on the label or probabilities"""
+    expected = sklearn_proba(classifier, X)
+    actual = classifier.compiled.predict_proba(X)
+    labels_differ = expected.argmax(axis=1) != actual.argmax(axis=1)
+    proba_differ = np.abs(expected - actual).max(axis=1) > PROBA_TOLERANCE
+    return np.flatnonzero(labels_differ | proba_differ)
+
+
+def main():
+    runs = build_runs()
+    X = runs[FEATURE_COLS].fillna(0).values
+
+    print("=" * 80)
+    print(f"COMPILEDFOREST PARITY VALIDATION ({TRAIN_ROWS} train / {ROWS} checked rows, seed {SEED})")
+    print("=" * 80)
+
+    failures = 0
+    for max_depth in MAX_DEPTHS:
+        classifier = RiskClassifier(config={'max_depth': max_depth})
+        classifier.train(runs.iloc[:TRAIN_ROWS])
+        if classifier.compiled is None:
+            classifier.compiled = CompiledForest(classifier.model, classifier.scaler)
+
+        mismatches = check_parity(classifier, X)
+        name = f"max_depth={max_depth or 'unlimited'}"
+        detail = (f"{len(classifier.model.estimators_)} trees, depth {classifier.compiled.depth}, "
+                  f"{len(classifier.model.classes_)} classes")
+        if len(mismatches):
+            failures += 1
+            print(f"[✗] {name}: {len(mismatches)}/{ROWS} rows differ (first: {mismatches[:5].tolist()}) - {detail}")
+        else:
+            print(f"[✓] {name}: identical predictions on {ROWS} rows - {detail}")
+
+    print("=" * 80)
+    if failures:
+        print(f"FAILED: {failures}/{len(MAX_DEPTHS)} configurations disagree with sklearn")
+        return 1
+    print("SUCCESSFUL: CompiledForest matches sklearn for every configuration")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
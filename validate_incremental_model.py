@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Incremental Training Validation Test
+Checks the RiskClassifier incremental mode (reservoir + warm_start trees)
+over many updates, past the point where the tree window is full.
+
+Every update adds trees_per_update trees and drops the oldest beyond
+max_estimators. Each added tree must get its own random_state: repeated
+seeds would give every update's trees the same bootstrap and feature
+sampling streams. Also checked: the forest stays at max_estimators, and
+re-sending already learned runs does not refit.
+
+Data is validate_compiled_forest.py's synthetic runs, a fresh batch (new
+pids, fixed seed) per update.
+
+Usage: python3 validate_incremental_model.py
+"""
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "dashboard"))
+
+from ml_model import RiskClassifier  # noqa: E402
+from validate_compiled_forest import build_runs  # noqa: E402
+
+UPDATES = 25
+BATCH_ROWS = 40
+MAX_ESTIMATORS = 12
+TREES_PER_UPDATE = 2
+
+
+def main():
+    classifier = RiskClassifier(incremental=True, trees_per_update=TREES_PER_UPDATE,
+                                max_estimators=MAX_ESTIMATORS, config={'n_estimators': 10})
+
+    print("=" * 80)
+    print(f"INCREMENTAL TRAINING VALIDATION ({UPDATES} updates, max {MAX_ESTIMATORS} trees)")
+    print("=" * 80)
+
+    seen = {}  # id -> tree; holding the trees keeps ids from being reused
+    seeds = []
+    batch = None
+    for update in range(UPDATES):
+        batch = build_runs(seed=update, rows=BATCH_ROWS)
+        batch['pid'] += update * BATCH_ROWS
+        classifier.train(batch)
+        for tree in classifier.model.estimators_:
+            if id(tree) not in seen:
+                seen[id(tree)] = tree
+                seeds.append(tree.random_state)
+
+    failures = 0
+    checks = [
+        (len(seeds) == len(set(seeds)),
+         f"{len(seeds)} trees added, {len(set(seeds))} distinct random_states"),
+        (len(classifier.model.estimators_) == MAX_ESTIMATORS,
+         f"forest holds {len(classifier.model.estimators_)} trees (window {MAX_ESTIMATORS})"),
+    ]
+    version = classifier.model_version
+    classifier.train(batch)
+    checks.append((classifier.model_version == version, "re-sent runs do not refit the model"))
+
+    for ok, description in checks:
+        failures += 0 if ok else 1
+        print(f"[{'✓' if ok else '✗'}] {description}")
+
+    print("=" * 80)
+    if failures:
+        print(f"FAILED: {failures}/{len(checks)} checks")
+        return 1
+    print("SUCCESSFUL: incremental updates add independently seeded trees")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -116,7 +116,7 @@ def test_analytics():
     if 'syscall_flood' in test_mapping:
         pid = test_mapping['syscall_flood']
         analysis = service.get_execution_analysis(pid)
-        log = service.log_cache.get(pid)
+        log = service.get_log(pid)
         
         print(f"\nProgram: {analysis['program']} (PID: {pid})")
         print(f"Risk Level: {analysis['risk_level']}")
@@ -177,7 +177,7 @@ def test_analytics():
     if 'policy_violation' in test_mapping:
         pid = test_mapping['policy_violation']
         analysis = service.get_execution_analysis(pid)
-        log = service.log_cache.get(pid)
+        log = service.get_log(pid)
         
         print(f"\nProgram: {analysis['program']} (PID: {pid})")
         print(f"Risk Level: {analysis['risk_level']}")
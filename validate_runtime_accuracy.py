@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Runtime Accuracy Validation Test
+Measures how far the launcher's recorded runtime_ms deviates from the
+child's true lifetime.
+
+The child is /bin/sleep with a known duration, run under LEARNING (default
+action LOG) because it is dynamically linked and STRICT's allowlist kills
+it in the loader. Its lifetime is bounded:
+    lower bound: the requested sleep
+    upper bound: wall time of the whole launcher invocation (measured here)
+A recorded runtime outside [sleep, wall] is wrong; the distance above the
+sleep duration is the exit-detection lag plus exec/startup cost.
+
+Usage: python3 validate_runtime_accuracy.py [--launcher runner/launcher]
+"""
+
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+LAUNCHER = os.path.join(PROJECT_ROOT, "runner", "launcher")
+
+# (sleep seconds, sampling bounds) - the 500ms max interval is the case the
+# old WNOHANG polling got wrong by up to a full interval
+CASES = [
+    (0.05, (5, 500)),
+    (0.3, (5, 500)),
+    (1.0, (5, 500)),
+    (1.0, (500, 500)),
+    (2.0, (100, 100)),
+]
+
+# Allowed lag between the end of the sleep and the recorded exit
+MAX_DEVIATION_MS = 50
+
+
+def run_case(launcher, seconds, sample_bounds):
+    """Run one sleep under the launcher; returns (runtime_ms, wall_ms)"""
+    before = set(glob.glob("logs/*.json"))
+    cmd = [launcher, "--profile=LEARNING",
+           f"--sample-min-ms={sample_bounds[0]}", f"--sample-max-ms={sample_bounds[1]}",
+           "/bin/sleep", str(seconds)]
+
+    start = time.monotonic()
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    wall_ms = (time.monotonic() - start) * 1000
+
+    new_logs = sorted(set(glob.glob("logs/*.json")) - before, key=os.path.getmtime)
+    if not new_logs:
+        return None, wall_ms
+    with open(new_logs[-1]) as fh:
+        log = json.load(fh)
+    return log["summary"]["runtime_ms"], wall_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check recorded runtime against true child lifetime")
+    parser.add_argument("--launcher", default=LAUNCHER, help="Launcher binary")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.launcher):
+        print(f"[✗] Launcher not found: {args.launcher} (run make)")
+        return 1
+
+    os.makedirs("logs", exist_ok=True)
+
+    print("=" * 80)
+    print("RUNTIME ACCURACY VALIDATION TEST")
+    print("=" * 80)
+    print(f"{'sleep':>8} {'sampling':>10} {'runtime':>9} {'wall':>9} {'deviation':>10}  result")
+
+    failures = 0
+    for seconds, bounds in CASES:
+        runtime_ms, wall_ms = run_case(args.launcher, seconds, bounds)
+        expected_ms = seconds * 1000
+        sampling = f"{bounds[0]}-{bounds[1]}ms"
+
+        if runtime_ms is None:
+            print(f"{expected_ms:>6.0f}ms {sampling:>10} {'-':>9} {wall_ms:>7.0f}ms {'-':>10}  ✗ FAIL (no log)")
+            failures += 1
+            continue
+
+        deviation = runtime_ms - expected_ms
+        ok = 0 <= deviation <= MAX_DEVIATION_MS and runtime_ms <= wall_ms + 1
+        failures += 0 if ok else 1
+        print(f"{expected_ms:>6.0f}ms {sampling:>10} {runtime_ms:>7}ms {wall_ms:>7.0f}ms "
+              f"{deviation:>+8.0f}ms  {'✓ PASS' if ok else '✗ FAIL'}")
+
+    print("=" * 80)
+    if failures:
+        print(f"FAILED: {failures}/{len(CASES)} runs outside the {MAX_DEVIATION_MS}ms tolerance")
+        return 1
+    print(f"SUCCESSFUL: all runs within {MAX_DEVIATION_MS}ms of the true lifetime")
+    return 0
+
+
+if __name__ == "__main__":
+    os.chdir(PROJECT_ROOT)
+    sys.exit(main())
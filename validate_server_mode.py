@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Server Mode Validation Test
+Starts `launcher --server=<socket>` and submits runs the way
+runner/sandbox.py --server does.
+
+Checks:
+    - the socket is not accessible to other users (mode 0660 or tighter),
+      and a client running as another user is turned away (root only)
+    - sequential requests succeed and start warm (setns into a pooled
+      holder); the launch/exec split of each run is reported
+    - a background process left behind by one run does not survive into
+      the next (the holder is scrubbed after every request)
+    - more concurrent requests than warm holders all succeed (the rest
+      start cold)
+
+Programs run under LEARNING: /bin/true and /bin/sh are dynamically linked
+and STRICT kills them in the loader. Logs written by these runs are
+removed afterwards.
+
+Usage: python3 validate_server_mode.py [--launcher runner/launcher]
+"""
+
+import argparse
+import glob
+import os
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+LAUNCHER = os.path.join(PROJECT_ROOT, "runner", "launcher")
+
+SEQUENTIAL_RUNS = 10
+CONCURRENT_RUNS = 6  # More than the launcher's WARM_POOL_SIZE
+LEFTOVER_MARKER = "31.337"  # sleep argument identifying the leftover process
+STARTUP_TIMEOUT_S = 10
+SCRUB_TIMEOUT_S = 3
+
+
+def submit(socket_path, argv, profile="LEARNING", time_limit_ms=5000):
+    """One RUN request; returns the reply fields"""
+    request = "\t".join(["RUN", profile, str(time_limit_ms), "-"] + argv) + "\n"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(time_limit_ms / 1000 + 10)
+        conn.connect(socket_path)
+        conn.sendall(request.encode())
+        return conn.makefile().readline().rstrip("\n").split("\t")
+
+
+def leftover_running():
+    """Whether the background sleep from the leftover run still exists"""
+    for cmdline in glob.glob("/proc/[0-9]*/cmdline"):
+        try:
+            with open(cmdline, "rb") as fh:
+                args = fh.read().split(b"\0")
+        except OSError:
+            continue
+        if args[:1] == [b"sleep"] and LEFTOVER_MARKER.encode() in args:
+            return True
+    return False
+
+
+def other_user_denied(socket_path):
+    """Connect as nobody (needs root); True if the server refused"""
+    code = ("import socket,sys\n"
+            "s=socket.socket(socket.AF_UNIX)\n"
+            "try:\n"
+            f"    s.connect({socket_path!r}); s.sendall(b'RUN\\tLEARNING\\t1000\\t-\\t/bin/true\\n')\n"
+            "    sys.exit(0 if s.makefile().readline().startswith('ERR') else 1)\n"
+            "except OSError:\n"
+            "    sys.exit(0)\n")
+    proc = subprocess.run([sys.executable, "-c", code], user=65534, group=65534, check=False)
+    return proc.returncode == 0
+
+
+def check(results, ok, description):
+    results.append(ok)
+    print(f"[{'✓' if ok else '✗'}] {description}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate launcher server mode")
+    parser.add_argument("--launcher", default=LAUNCHER, help="Launcher binary")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.launcher):
+        print(f"[✗] Launcher not found: {args.launcher} (run make)")
+        return 1
+
+    print("=" * 80)
+    print("SERVER MODE VALIDATION TEST")
+    print("=" * 80)
+
+    results = []
+    logs_before = set(glob.glob("logs/*.json"))
+    with tempfile.TemporaryDirectory(prefix="sandbox_server_") as tmp:
+        socket_path = os.path.join(tmp, "launcher.sock")
+        server = subprocess.Popen([args.launcher, f"--server={socket_path}"],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.monotonic() + STARTUP_TIMEOUT_S
+            while not os.path.exists(socket_path) and time.monotonic() < deadline and server.poll() is None:
+                time.sleep(0.05)
+            if not os.path.exists(socket_path):
+                print(f"[✗] Server did not start (exit {server.poll()})")
+                return 1
+
+            mode = stat.S_IMODE(os.stat(socket_path).st_mode)
+            check(results, mode & 0o007 == 0, f"socket mode {oct(mode)} (no access for other users)")
+            if os.getuid() == 0:
+                check(results, other_user_denied(socket_path), "request from another user refused")
+
+            # Sequential: every run should get a warm holder
+            replies = [submit(socket_path, ["/bin/true"]) for _ in range(SEQUENTIAL_RUNS)]
+            ok = [r for r in replies if r[0] == "OK" and len(r) >= 7]
+            check(results, len(ok) == SEQUENTIAL_RUNS, f"{len(ok)}/{SEQUENTIAL_RUNS} sequential runs succeeded")
+            warm = [r for r in ok if r[4] == "warm"]
+            check(results, len(warm) == len(ok) > 0, f"{len(warm)}/{len(ok)} sequential runs started warm")
+            if warm:
+                launch = sorted(int(r[5]) for r in warm)
+                execs = sorted(int(r[6]) for r in warm)
+                print(f"    warm launch p50 {launch[len(launch) // 2]}us, "
+                      f"of which execv p50 {execs[len(execs) // 2]}us")
+
+            # A run leaving a background process behind
+            reply = submit(socket_path, ["/bin/sh", "-c", f"sleep {LEFTOVER_MARKER} & exit 0"])
+            deadline = time.monotonic() + SCRUB_TIMEOUT_S
+            while leftover_running() and time.monotonic() < deadline:
+                time.sleep(0.05)
+            check(results, reply[0] == "OK" and not leftover_running(),
+                  "process left behind by a run is killed before the next")
+
+            # Concurrent: more requests than warm holders
+            concurrent = [None] * CONCURRENT_RUNS
+
+            def worker(i):
+                concurrent[i] = submit(socket_path, ["/bin/sleep", "0.2"])
+
+            threads = [threading.Thread(target=worker, args=(i,)) for i in range(CONCURRENT_RUNS)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            ok = [r for r in concurrent if r and r[0] == "OK"]
+            modes = [r[4] for r in ok if len(r) >= 7]
+            check(results, len(ok) == CONCURRENT_RUNS,
+                  f"{len(ok)}/{CONCURRENT_RUNS} concurrent runs succeeded "
+                  f"({modes.count('warm')} warm, {modes.count('cold')} cold)")
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    for path in set(glob.glob("logs/*.json")) - logs_before:
+        os.remove(path)
+
+    failures = results.count(False)
+    print("=" * 80)
+    if failures:
+        print(f"FAILED: {failures}/{len(results)} checks")
+        return 1
+    print("SUCCESSFUL: server mode runs warm, isolated and restricted to its owner")
+    return 0
+
+
+if __name__ == "__main__":
+    os.chdir(PROJECT_ROOT)
+    sys.exit(main())